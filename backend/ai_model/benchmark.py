@@ -0,0 +1,325 @@
+"""
+Parser benchmarks.
+
+    python -m ai_model.benchmark
+    python -m ai_model.benchmark parsers [--output report.json] [--baseline old.json]
+
+The first form prints how long the tokenizer and each pipeline component
+take per text for the full schedule_ner pipeline and for the pruned one the
+app loads, plus the process RSS after each load.
+
+The second runs ScheduleParser.parse, HybridScheduleParser.parse,
+ConstraintExtractor.parse and parse_course_text over the sentences of test_data.py and training_data.py at
+several batch sizes and writes a JSON report with p50/p95 batch latency,
+throughput and per-label constraint precision/recall for each parser. With
+--baseline the differences to an earlier report are printed, so the cost of
+a parser change can be read off directly.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+from .evaluation import gold_constraints, per_label_scores, predicted_constraints
+from .test_data import TEST_DATA
+from .training_data import TRAIN_DATA
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+DEFAULT_REPEAT = 5
+
+
+def rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def component_latency(nlp, texts, repeat=20):
+    """
+    Mean milliseconds per text spent in the tokenizer and in every enabled
+    component, measured by running them one at a time.
+    """
+    totals = {"tokenizer": 0.0}
+    totals.update({name: 0.0 for name, _ in nlp.pipeline})
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            doc = nlp.make_doc(text)
+            totals["tokenizer"] += time.perf_counter() - start
+            for name, component in nlp.pipeline:
+                start = time.perf_counter()
+                doc = component(doc)
+                totals[name] += time.perf_counter() - start
+    runs = repeat * len(texts)
+    return {name: total * 1000 / runs for name, total in totals.items()}
+
+
+def print_latency(title, latency):
+    print(f"\n{title}")
+    for name, ms in latency.items():
+        print(f"  {name:<16} {ms:8.3f} ms")
+    print(f"  {'total':<16} {sum(latency.values()):8.3f} ms")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+@contextlib.contextmanager
+def quiet():
+    """The parsers print while they work; keep that out of the timings and the report."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure_latency(run, texts, batch_size, repeat=DEFAULT_REPEAT):
+    """
+    Latency of run(batch, batch_size) over `texts` cut into batches of
+    batch_size, `repeat` times over. Returns milliseconds per batch (p50/p95),
+    per text and the throughput in texts per second.
+    """
+    batches = [texts[k:k + batch_size] for k in range(0, len(texts), batch_size)]
+    timings = []
+    with quiet():
+        run(batches[0], batch_size)  # warm-up: lazy loading, first-call caches
+        for _ in range(repeat):
+            for batch in batches:
+                start = time.perf_counter()
+                run(batch, batch_size)
+                timings.append(time.perf_counter() - start)
+    total = sum(timings)
+    return {
+        "batches": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "per_text_ms": round(total * 1000 / (len(texts) * repeat), 3),
+        "throughput_per_s": round(len(texts) * repeat / total, 1) if total else None
+    }
+
+
+def constraint_scores(run, data):
+    """
+    Per-label precision/recall of the constraints `run` finds in annotated
+    data, and how many texts made the parser raise.
+    """
+    with quiet():
+        results = run([text for text, _ in data], len(data))
+    pairs = [
+        (gold_constraints(text, annotations), predicted_constraints(result["constraints"]))
+        for (text, annotations), result in zip(data, results)
+    ]
+    return per_label_scores(pairs), sum(1 for result in results if "error" in result)
+
+
+def tolerant(parse_one, parse_many=None):
+    """
+    A runner around a parser's per-text and batch calls. A text the parser
+    raises on yields {"constraints": [], "error": ...} instead of ending the
+    benchmark; a failing batch is redone text by text.
+    """
+    def parse_each(texts):
+        results = []
+        for text in texts:
+            try:
+                results.append(parse_one(text))
+            except Exception as e:
+                results.append({"constraints": [], "error": str(e)})
+        return results
+
+    def run(texts, batch_size):
+        if batch_size == 1 or parse_many is None:
+            return parse_each(texts)
+        try:
+            return parse_many(texts, batch_size)
+        except Exception:
+            return parse_each(texts)
+    return run
+
+
+def parser_runners():
+    """
+    name -> run(texts, batch_size) returning one parse result per text, or
+    the exception raised while setting the parser up. Batches of one go
+    through the per-text call the app makes; larger ones use the batch API.
+    """
+    runners = {}
+    try:
+        from .ml_parser import ScheduleParser
+        from .registry import pipelines
+        with quiet():
+            ml_parser = ScheduleParser(nlp=pipelines.get("schedule_ner"))
+        runners["ScheduleParser.parse"] = tolerant(
+            ml_parser.parse, lambda texts, batch_size: ml_parser.parse_batch(texts, batch_size=batch_size)
+        )
+    except Exception as e:
+        runners["ScheduleParser.parse"] = e
+
+    try:
+        from .hybrid_parser import HybridScheduleParser
+        from .registry import pipelines
+        with quiet():
+            hybrid = HybridScheduleParser(nlp=pipelines.get("tokenizer"))
+        runners["HybridScheduleParser.parse"] = tolerant(
+            hybrid.parse, lambda texts, batch_size: hybrid.parse_batch(texts, batch_size=batch_size)
+        )
+    except Exception as e:
+        runners["HybridScheduleParser.parse"] = e
+
+    try:
+        from .extraction import ConstraintExtractor
+        from .registry import pipelines
+        with quiet():
+            extractor = ConstraintExtractor(pipelines.get("constraints"))
+        runners["ConstraintExtractor.parse"] = tolerant(
+            extractor.parse, lambda texts, batch_size: extractor.parse_batch(texts, batch_size=batch_size)
+        )
+    except Exception as e:
+        runners["ConstraintExtractor.parse"] = e
+
+    try:
+        from schedule.parserAI import parse_course_text
+        # No batch API: a batch is that many calls in a row
+        runners["parse_course_text"] = tolerant(parse_course_text)
+    except Exception as e:
+        runners["parse_course_text"] = e
+    return runners
+
+
+@contextlib.contextmanager
+def parse_caches_disabled():
+    """Repeated benchmark texts must not be answered from the course text cache."""
+    try:
+        from schedule.parserAI import course_text_cache
+    except ImportError:
+        yield
+        return
+    maxsize = course_text_cache.maxsize
+    course_text_cache.maxsize = 0
+    course_text_cache.invalidate()
+    try:
+        yield
+    finally:
+        course_text_cache.maxsize = maxsize
+
+
+def build_report(runners, datasets, batch_sizes=DEFAULT_BATCH_SIZES, repeat=DEFAULT_REPEAT):
+    """Latency and accuracy of every runner; `datasets` maps a name to annotated data."""
+    import spacy
+    from . import fast_path
+
+    texts = [text for data in datasets.values() for text, _ in data]
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "spacy_version": spacy.__version__,
+        "settings": {
+            "batch_sizes": batch_sizes,
+            "repeat": repeat,
+            "texts": len(texts),
+            "fast_path": fast_path.ENABLED
+        },
+        "datasets": {name: len(data) for name, data in datasets.items()},
+        "parsers": {}
+    }
+    with parse_caches_disabled():
+        for name, run in runners.items():
+            if isinstance(run, Exception):
+                report["parsers"][name] = {"error": str(run)}
+                continue
+            result = {
+                "latency": {str(size): measure_latency(run, texts, size, repeat) for size in batch_sizes},
+                "accuracy": {},
+                "errors": {}
+            }
+            for dataset, data in datasets.items():
+                result["accuracy"][dataset], result["errors"][dataset] = constraint_scores(run, data)
+            report["parsers"][name] = result
+    return report
+
+
+def print_report(report, baseline=None):
+    """Summary table of a report, with differences to `baseline` when given."""
+    def delta(value, old):
+        return f" ({value - old:+.3f})" if old is not None else ""
+
+    for name, result in report["parsers"].items():
+        print(f"\n{name}")
+        if "error" in result:
+            print(f"  unavailable: {result['error']}")
+            continue
+        old = (baseline or {}).get("parsers", {}).get(name, {})
+        for size, latency in result["latency"].items():
+            old_latency = old.get("latency", {}).get(size, {})
+            print(f"  batch {size:>4}: p50 {latency['p50_ms']:8.3f} ms{delta(latency['p50_ms'], old_latency.get('p50_ms'))}"
+                  f"  p95 {latency['p95_ms']:8.3f} ms{delta(latency['p95_ms'], old_latency.get('p95_ms'))}"
+                  f"  {latency['throughput_per_s']} texts/s")
+        for dataset, errors in result["errors"].items():
+            if errors:
+                print(f"  {dataset:<6} parser raised on {errors} of {report['datasets'][dataset]} texts")
+        for dataset, scores in result["accuracy"].items():
+            old_scores = old.get("accuracy", {}).get(dataset, {})
+            for label, score in scores.items():
+                old_score = old_scores.get(label, {})
+                print(f"  {dataset:<6} {label:<16} precision {score['precision']:.3f}{delta(score['precision'], old_score.get('precision'))}"
+                      f"  recall {score['recall']:.3f}{delta(score['recall'], old_score.get('recall'))}")
+
+
+def benchmark_parsers(args):
+    report = build_report(
+        parser_runners(),
+        {"test": TEST_DATA, "train": TRAIN_DATA},
+        batch_sizes=args.batch_sizes,
+        repeat=args.repeat
+    )
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report written to {args.output}")
+
+
+def benchmark_components():
+    import spacy
+    from .registry import SCHEDULE_NER_PATH, load_schedule_ner
+
+    texts = [text for text, _ in TEST_DATA]
+
+    print(f"RSS before loading: {rss_mb():.1f} MB")
+    pruned = load_schedule_ner()
+    print(f"RSS with pruned pipeline: {rss_mb():.1f} MB")
+    print_latency(f"Pruned pipeline {pruned.pipe_names}", component_latency(pruned, texts))
+
+    full = spacy.load(SCHEDULE_NER_PATH, disable=[])
+    print(f"\nRSS with full pipeline also loaded: {rss_mb():.1f} MB")
+    print_latency(f"Full pipeline {full.pipe_names}", component_latency(full, texts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parser benchmarks")
+    parser.add_argument("mode", nargs="?", choices=["components", "parsers"], default="components")
+    parser.add_argument("--output", default="benchmark_report.json", help="where the parsers report is written")
+    parser.add_argument("--baseline", help="earlier parsers report to compare against")
+    parser.add_argument("--batch-sizes", type=lambda v: [int(size) for size in v.split(",")],
+                        default=DEFAULT_BATCH_SIZES, help="comma-separated, e.g. 1,8,32")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+    if args.mode == "parsers":
+        benchmark_parsers(args)
+    else:
+        benchmark_components()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Scoring helpers shared by train_ner.py and benchmark.py.
+"""
+
+import re
+from collections import defaultdict
+
+WORD_HOURS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12
+}
+
+DAY_ABBREVIATIONS = {
+    "monday": "Mon", "tuesday": "Tue", "wednesday": "Wed", "thursday": "Thu",
+    "friday": "Fri", "saturday": "Sat", "sunday": "Sun"
+}
+
+# Constraint types the parsers return, by the NER label they come from
+CONSTRAINT_LABELS = {
+    "no_classes_before": ("NO_CLASS_BEFORE", "time"),
+    "no_classes_after": ("NO_CLASS_AFTER", "time"),
+    "no_day": ("NO_CLASS_DAY", "day"),
+    "avoid_ta": ("AVOID_TA", "name"),
+}
+
+
+def per_label_scores(pairs):
+    """
+    Precision and recall per label.
+
+    `pairs` yields (expected, predicted) sets for one text each; items are
+    tuples whose last element is the label, e.g. (start, end, label) spans.
+    """
+    tp = defaultdict(int)
+    fp = defaultdict(int)
+    fn = defaultdict(int)
+    for expected, predicted in pairs:
+        for item in expected & predicted:
+            tp[item[-1]] += 1
+        for item in predicted - expected:
+            fp[item[-1]] += 1
+        for item in expected - predicted:
+            fn[item[-1]] += 1
+
+    scores = {}
+    for label in sorted(set(tp) | set(fp) | set(fn)):
+        found = tp[label] + fp[label]
+        support = tp[label] + fn[label]
+        scores[label] = {
+            "tp": tp[label],
+            "fp": fp[label],
+            "fn": fn[label],
+            "precision": round(tp[label] / found, 4) if found else 0.0,
+            "recall": round(tp[label] / support, 4) if support else 0.0
+        }
+    return scores
+
+
+def hour_value(text):
+    """Hour of a time expression ("9:30am", "5pm", "noon", "eleven"), or None."""
+    text = text.strip().lower()
+    if text == "noon":
+        return 12
+    if text == "midnight":
+        return 0
+    if text in WORD_HOURS:
+        return WORD_HOURS[text]
+    match = re.match(r"(\d{1,2})(?::\d{2})?\s*(am|pm)?", text)
+    if not match:
+        return None
+    hour = int(match.group(1))
+    if match.group(2) == "pm" and hour < 12:
+        hour += 12
+    elif match.group(2) == "am" and hour == 12:
+        hour = 0
+    return hour
+
+
+def gold_constraints(text, annotations):
+    """The (value, label) constraints the annotated entities of `text` stand for."""
+    constraints = set()
+    for start, end, label in annotations["entities"]:
+        span = text[start:end]
+        if label in ("NO_CLASS_BEFORE", "NO_CLASS_AFTER"):
+            value = hour_value(span)
+        elif label == "NO_CLASS_DAY":
+            value = DAY_ABBREVIATIONS.get(span.lower().rstrip("s"))
+        else:
+            value = span.lower()
+        constraints.add((value, label))
+    return constraints
+
+
+def predicted_constraints(constraints):
+    """(value, label) pairs of parser output ({"type": "no_day", "day": "Fri"}, ...)."""
+    predicted = set()
+    for constraint in constraints:
+        if constraint.get("type") not in CONSTRAINT_LABELS:
+            continue
+        label, key = CONSTRAINT_LABELS[constraint["type"]]
+        value = constraint.get(key)
+        predicted.add((value.lower() if label == "AVOID_TA" else value, label))
+    return predicted
@@ -0,0 +1,144 @@
+"""
+Single-pass constraint extraction shared by every parse endpoint.
+
+A text the regex fast path fully covers is answered without spaCy. Any other
+text is tokenized once and run through the entity ruler (patterns.PATTERNS,
+which with_entity_ruler() installs over whatever ruler the model was saved
+with) followed by the NER component: the ruler claims the phrasings it knows and
+NER, which keeps entities that are already set, labels the rest.
+
+constraint_items() turns the entities of that doc into the items the fast
+path produces, {"label", "value", "text", "start", "end"}, so every text
+yields one list of items whichever route it took. /api/parse renders them as
+"No Class Before" constraints, parse_course_text as "no_classes_before" ones;
+neither runs its own matching anymore.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from .evaluation import CONSTRAINT_LABELS, WORD_HOURS, hour_value
+from .fast_path import DAY_ABBREVIATIONS, fast_path
+from .patterns import PATTERNS
+
+_TIME = re.compile(
+    r"(?<!\w)(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)?|noon|midnight|" + "|".join(WORD_HOURS) + r")(?![\w:])",
+    re.IGNORECASE
+)
+_DAY = re.compile(
+    r"(?<!\w)ב?(?P<day>" + "|".join(sorted(DAY_ABBREVIATIONS, key=len, reverse=True)) + r")s?(?!\w)",
+    re.IGNORECASE
+)
+_WORD = re.compile(r"[^\W\d_][\w'\-]*")
+# Words around a TA name in AVOID_TA entities ("avoid TA Smith", "no tutor Cohen")
+_TA_WORDS = {"avoid", "not", "no", "don't", "dont", "the", "ta", "tutor", "with", "as", "a",
+             "מתרגל", "מתרגלת", "המתרגל", "המתרגלת"}
+
+# Constraint types of parse_course_text by NER label
+COURSE_TEXT_TYPES = {label: (constraint_type, key) for constraint_type, (label, key) in CONSTRAINT_LABELS.items()}
+
+
+def with_entity_ruler(nlp):
+    """
+    Make sure `nlp` runs an entity ruler with PATTERNS ahead of its NER.
+    schedule_ner ships one, but it was saved while disabled for training and
+    with older patterns, so it is switched back on and its patterns are
+    replaced; a pipeline without one gets a new ruler.
+    """
+    if "entity_ruler" in nlp.disabled:
+        nlp.enable_pipe("entity_ruler")
+    if "entity_ruler" in nlp.pipe_names:
+        ruler = nlp.get_pipe("entity_ruler")
+        if ruler.patterns != PATTERNS:
+            ruler.clear()
+            ruler.add_patterns(PATTERNS)
+    else:
+        ruler = nlp.add_pipe("entity_ruler", before="ner" if "ner" in nlp.pipe_names else None)
+        ruler.add_patterns(PATTERNS)
+    return nlp
+
+
+def _item(label, value, text, offset, span=None):
+    start, end = span if span else (0, len(text))
+    return {"label": label, "value": value, "text": text[start:end], "start": offset + start, "end": offset + end}
+
+
+def _entity_items(label, text, offset):
+    if label in ("NO_CLASS_BEFORE", "NO_CLASS_AFTER"):
+        # Ruler entities include the cue word ("before 9 am"), NER ones only the time
+        match = _TIME.search(text)
+        if not match:
+            return [_item(label, None, text, offset)]
+        hour = hour_value(match.group(0))
+        return [_item(label, hour if hour is not None and 0 <= hour <= 24 else None, text, offset, match.span())]
+    if label == "NO_CLASS_DAY":
+        days = list(_DAY.finditer(text))
+        if not days:
+            return [_item(label, None, text, offset)]
+        return [
+            _item(label, DAY_ABBREVIATIONS[day.group("day").lower()], text, offset, day.span("day"))
+            for day in days
+        ]
+    if label == "AVOID_TA":
+        words = [word for word in _WORD.finditer(text) if word.group(0).lower() not in _TA_WORDS]
+        if not words:
+            return [_item(label, None, text, offset)]
+        span = (words[0].start(), words[-1].end())
+        return [_item(label, text[span[0]:span[1]], text, offset, span)]
+    return [_item(label, None, text, offset)]
+
+
+def constraint_items(doc) -> List[Dict[str, Any]]:
+    """
+    Items of the entities of a processed doc, in text order. An entity whose
+    value cannot be read (a time without a number, say) is kept with value
+    None so callers can still report it.
+    """
+    items = []
+    for ent in doc.ents:
+        items.extend(_entity_items(ent.label_, ent.text, ent.start_char))
+    return items
+
+
+def course_text_constraints(items) -> List[Dict[str, Any]]:
+    """Items as parse_course_text constraints ({"type": "no_day", "day": "Fri", "matched_text": ...})."""
+    constraints = []
+    for item in items:
+        if item["value"] is None or item["label"] not in COURSE_TEXT_TYPES:
+            continue
+        constraint_type, key = COURSE_TEXT_TYPES[item["label"]]
+        constraints.append({"type": constraint_type, key: item["value"], "matched_text": item["text"]})
+    return constraints
+
+
+class ConstraintExtractor:
+    """The fast path, then one pass of the ruler + NER pipeline."""
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+
+    def extract(self, text: str, caller: str = "extractor") -> List[Dict[str, Any]]:
+        found = fast_path.parse(text, caller)
+        if found is not None:
+            return found
+        return constraint_items(self.nlp(text))
+
+    def extract_batch(self, texts: List[str], batch_size: int = 256, caller: str = "extractor") -> List[List[Dict[str, Any]]]:
+        """extract() for many texts; the ones the fast path misses share nlp.pipe calls."""
+        results = [fast_path.parse(text, caller) for text in texts]
+        pending = [k for k, found in enumerate(results) if found is None]
+        docs = self.nlp.pipe((texts[k] for k in pending), batch_size=batch_size)
+        for k, doc in zip(pending, docs):
+            results[k] = constraint_items(doc)
+        return results
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """Constraints in the parse_course_text format, plus the items they came from."""
+        items = self.extract(text, "course_text")
+        return {"constraints": course_text_constraints(items), "entities": items}
+
+    def parse_batch(self, texts: List[str], batch_size: int = 256) -> List[Dict[str, Any]]:
+        return [
+            {"constraints": course_text_constraints(items), "entities": items}
+            for items in self.extract_batch(texts, batch_size=batch_size, caller="course_text")
+        ]
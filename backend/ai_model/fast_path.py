@@ -0,0 +1,186 @@
+"""
+Rule-based fast path for the most common constraint phrasings.
+
+Most inputs are short sentences like "no classes before 9am", "no classes on
+friday", "avoid TA Smith" or their Hebrew equivalents ("בלי שיעורים לפני 9",
+"אין שיעורים ביום שישי"). These are recognized by a handful of precompiled
+regular expressions without tokenizing or running any spaCy component.
+
+The scanner walks the text from left to right: at each position it skips
+separators and filler words, then takes the longest constraint pattern that
+matches there. The text counts as covered only if the scan reaches the end;
+otherwise parse() returns None and the caller falls back to spaCy, so
+anything unusual still gets the full parser.
+"""
+
+import os
+import re
+import threading
+
+ENABLED = os.environ.get("CONSTRAINT_FAST_PATH", "1") == "1"
+
+NO_CLASS_BEFORE = "NO_CLASS_BEFORE"
+NO_CLASS_AFTER = "NO_CLASS_AFTER"
+NO_CLASS_DAY = "NO_CLASS_DAY"
+AVOID_TA = "AVOID_TA"
+
+DAY_ABBREVIATIONS = {
+    "monday": "Mon", "tuesday": "Tue", "wednesday": "Wed", "thursday": "Thu",
+    "friday": "Fri", "saturday": "Sat", "sunday": "Sun",
+    "mon": "Mon", "tue": "Tue", "tues": "Tue", "wed": "Wed", "thu": "Thu",
+    "thur": "Thu", "thurs": "Thu", "fri": "Fri", "sat": "Sat", "sun": "Sun",
+    "ראשון": "Sun", "שני": "Mon", "שלישי": "Tue", "רביעי": "Wed",
+    "חמישי": "Thu", "שישי": "Fri", "שבת": "Sat",
+}
+
+# --- English (matched against the lower-cased text) ---
+_NEG = (r"(?:no|not|avoid|nothing|"
+        r"(?:i\s+)?(?:don'?t|do\s+not)\s+(?:want|schedule|have|need)(?:\s+(?:any|anything))?|"
+        r"(?:i\s+)?(?:can'?t|cannot)\s+(?:do|attend|make)(?:\s+(?:any|anything))?)")
+_CLASSES = (r"(?:(?:early|morning|late|evening)\s+)*"
+            r"(?:classes|class|lectures|lecture|sessions|session|anything)")
+_TIME = r"(?P<time>\d{1,2}(?::\d{2})?\s*(?:am|pm)?|noon|midnight)(?![\w:])"
+_DAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tues|tue|wed|thurs|thur|thu|fri|sat|sun)s?"
+_DAYS = rf"(?P<days>{_DAY}(?:\s*(?:,|/|&|\bor\b|\band\b)\s*{_DAY})*)(?!\w)"
+_NAME = r"(?P<name>[^\W\d_][\w'\-]*)"
+
+# --- Hebrew ---
+_H_NEG = r"(?:בלי|ללא|אין|לא|אל\s+תשבץ|(?:אני\s+)?לא\s+רוצה|להימנע\s+מ)"
+_H_CLASSES = r"(?:שיעורים|שיעור|הרצאות|הרצאה|תרגולים|תרגול|לימודים)"
+_H_TIME = (r"(?:השעה\s+|ה-?)?(?P<time>\d{1,2}(?::\d{2})?)(?![\w:])"
+           r"(?:\s*(?P<period>בבוקר|בערב|בצהריים|בלילה|אחה\"צ|אחה״צ))?")
+_H_DAY = r"(?:ראשון|שני|שלישי|רביעי|חמישי|שישי|שבת)"
+_H_DAY_PREFIX = r"(?:ב?(?:יום|ימי)\s+|ב)?"
+_H_DAYS = (rf"(?P<days>{_H_DAY_PREFIX}{_H_DAY}"
+           rf"(?:(?:\s*[,/]\s*|\s+או\s+|\s+ו-?){_H_DAY_PREFIX}{_H_DAY})*)(?!\w)")
+
+PATTERNS = [
+    (NO_CLASS_BEFORE, rf"{_NEG}\s+(?:{_CLASSES}\s+)?(?:before|earlier\s+than|until)\s+{_TIME}"),
+    (NO_CLASS_BEFORE, rf"(?:(?:classes|class)\s+)?(?:should\s+)?(?:start|starts|begin|begins)\s+(?:after|from)\s+{_TIME}"),
+    (NO_CLASS_AFTER, rf"{_NEG}\s+(?:{_CLASSES}\s+)?(?:after|later\s+than|past)\s+{_TIME}"),
+    (NO_CLASS_AFTER, rf"(?:(?:classes|class)\s+)?(?:should\s+)?(?:finish|finishes|end|ends|be\s+done)\s+(?:by|before)\s+{_TIME}"),
+    (NO_CLASS_DAY, rf"{_NEG}\s+(?:{_CLASSES}\s+)?(?:on\s+)?{_DAYS}"),
+    (NO_CLASS_DAY, rf"(?:no|avoid)\s+{_DAYS}\s+(?:classes|class|lectures)"),
+    (NO_CLASS_DAY, rf"{_DAYS}\s+off"),
+    (AVOID_TA, rf"{_NEG}\s+(?:the\s+)?(?:ta|tutor)\s+{_NAME}"),
+    (AVOID_TA, rf"avoid\s+{_NAME}\s+as\s+(?:a\s+)?(?:ta|tutor)"),
+    (NO_CLASS_BEFORE, rf"{_H_NEG}\s+(?:{_H_CLASSES}\s+)?(?:לפני|מוקדם\s+מ-?)\s*{_H_TIME}"),
+    (NO_CLASS_AFTER, rf"{_H_NEG}\s+(?:{_H_CLASSES}\s+)?(?:אחרי|מאוחר\s+מ-?)\s*{_H_TIME}"),
+    (NO_CLASS_DAY, rf"{_H_NEG}\s+(?:{_H_CLASSES}\s+)?{_H_DAYS}"),
+    (AVOID_TA, rf"{_H_NEG}\s*(?:עם\s+)?ה?(?:מתרגל|מתרגלת)\s+{_NAME}"),
+]
+COMPILED_PATTERNS = [(label, re.compile(pattern)) for label, pattern in PATTERNS]
+
+# Text that may appear between constraints without changing their meaning
+_SKIP = re.compile(
+    r"(?:[\s,.;:!?()\-]+"
+    r"|\b(?:and|or|also|but|please|thanks|thank\s+you|if\s+possible|i\s+want|i\s+would\s+like|i'd\s+like"
+    r"|i\s+prefer|prefer|i\s+need)\b"
+    r"|(?:בבקשה|תודה|אם\s+אפשר|אני\s+רוצה|אני\s+מעדיפה?|גם)(?!\w)"
+    r"|ו(?=(?:בלי|ללא|אין|לא|להימנע|גם)(?!\w)))+"
+)
+_DAY_TOKEN = re.compile(rf"{_DAY}|{_H_DAY}")
+
+
+def _hour(time_text, period=None):
+    """Hour of a matched time, using the same conventions as the spaCy parsers."""
+    time_text = time_text.strip()
+    if time_text == "noon":
+        return 12
+    if time_text == "midnight":
+        return 0
+    match = re.match(r"(\d{1,2})(?::\d{2})?\s*(am|pm)?", time_text)
+    hour = int(match.group(1))
+    suffix = match.group(2)
+    if suffix == "pm" or period in ("בערב", "בלילה", 'אחה"צ', "אחה״צ"):
+        if hour < 12:
+            hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+    return hour if 0 <= hour <= 24 else None
+
+
+class FastPathParser:
+    """Regex fast path with per-caller coverage counters."""
+
+    def __init__(self, patterns=COMPILED_PATTERNS):
+        self.patterns = patterns
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def _record(self, caller, covered):
+        with self._lock:
+            counts = self._counts.setdefault(caller, {"attempts": 0, "covered": 0})
+            counts["attempts"] += 1
+            counts["covered"] += covered
+
+    def parse(self, text, caller="default"):
+        """
+        Constraints of a fully covered text, or None to fall back to spaCy.
+
+        Each constraint is {"label", "value", "text", "start", "end"} where
+        label is one of the NER labels, value is the hour, the three-letter
+        day or the TA name, and text/start/end locate it in the input.
+        """
+        found = self._scan(text) if ENABLED and isinstance(text, str) else None
+        self._record(caller, found is not None)
+        return found
+
+    def _scan(self, text):
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Offsets into the lower-cased text would not line up with the original
+            return None
+        found = []
+        pos = 0
+        while True:
+            skipped = _SKIP.match(lowered, pos)
+            if skipped:
+                pos = skipped.end()
+            if pos >= len(lowered):
+                return found
+            best = None
+            for label, pattern in self.patterns:
+                match = pattern.match(lowered, pos)
+                if match and (best is None or match.end() > best[1].end()):
+                    best = (label, match)
+            if best is None or best[1].end() == pos:
+                return None
+            constraints = self._constraints(text, *best)
+            if constraints is None:
+                return None
+            found.extend(constraints)
+            pos = best[1].end()
+
+    def _constraints(self, text, label, match):
+        groups = match.groupdict()
+        if label in (NO_CLASS_BEFORE, NO_CLASS_AFTER):
+            hour = _hour(groups["time"], groups.get("period"))
+            if hour is None:
+                return None
+            start, end = match.span("time")
+            return [{"label": label, "value": hour, "text": text[start:end], "start": start, "end": end}]
+        if label == NO_CLASS_DAY:
+            offset = match.start("days")
+            constraints = []
+            for day in _DAY_TOKEN.finditer(match.group("days")):
+                name = day.group(0)
+                abbreviation = DAY_ABBREVIATIONS.get(name) or DAY_ABBREVIATIONS.get(name.rstrip("s"))
+                start, end = offset + day.start(), offset + day.end()
+                constraints.append({
+                    "label": label, "value": abbreviation, "text": text[start:end], "start": start, "end": end
+                })
+            return constraints
+        start, end = match.span("name")
+        name = text[start:end]
+        return [{"label": label, "value": name, "text": name, "start": start, "end": end}]
+
+    def stats(self):
+        with self._lock:
+            return {
+                caller: dict(counts, coverage=round(counts["covered"] / counts["attempts"], 4))
+                for caller, counts in self._counts.items()
+            }
+
+
+fast_path = FastPathParser()
@@ -6,13 +6,23 @@ import re
 from typing import Dict, List, Any
 from datetime import datetime
 
+from .fast_path import fast_path
+
 class HybridScheduleParser:
     """
     Advanced parser that combines rule-based patterns with ML for better accuracy
     """
     
-    def __init__(self):
+    def __init__(self, nlp=None):
         print("🔍 HYBRID PARSER: Initializing HybridScheduleParser...")
+        if nlp is not None:
+            # Shared pipeline (see registry.pipelines); only its tokenizer and vocab are used
+            self.nlp = nlp
+        else:
+            self._load_base_model()
+        self._build_matcher()
+
+    def _load_base_model(self):
         # Load base English model
         print("🔍 HYBRID PARSER: About to load en_core_web_sm model...")
         try:
@@ -61,6 +71,7 @@ class HybridScheduleParser:
                     print(traceback.format_exc())
                     raise
         
+    def _build_matcher(self):
         print("🔍 HYBRID PARSER: Creating Matcher...")
         try:
             self.matcher = Matcher(self.nlp.vocab)
@@ -190,9 +201,60 @@ class HybridScheduleParser:
         
         return None
     
+    # Fast path labels and the constraint types/confidences the matcher produces for them
+    FAST_PATH_TYPES = {
+        "NO_CLASS_BEFORE": ("TIME_BEFORE", "no_classes_before", "time", 0.9),
+        "NO_CLASS_AFTER": ("TIME_AFTER", "no_classes_after", "time", 0.9),
+        "NO_CLASS_DAY": ("DAY_CONSTRAINT", "no_day", "day", 0.95),
+        "AVOID_TA": ("TA_CONSTRAINT", "avoid_ta", "name", 0.85),
+    }
+
+    def _parse_fast_path(self, found: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Result of parse() for text the regex fast path fully covered."""
+        constraints = []
+        raw_matches = []
+        for item in found:
+            match_label, constraint_type, key, confidence = self.FAST_PATH_TYPES[item["label"]]
+            constraints.append({
+                "type": constraint_type,
+                key: item["value"],
+                "confidence": confidence,
+                "matched_text": item["text"]
+            })
+            # Character offsets here, not token offsets: the text was never tokenized
+            raw_matches.append({
+                "text": item["text"],
+                "label": match_label,
+                "start": item["start"],
+                "end": item["end"]
+            })
+        return {"constraints": constraints, "raw_matches": raw_matches, "fast_path": True}
+
     def parse(self, text: str) -> Dict[str, Any]:
         """Parse text using hybrid approach"""
-        doc = self.nlp(text)
+        found = fast_path.parse(text, "hybrid")
+        if found is not None:
+            return self._parse_fast_path(found)
+
+        # The patterns only look at lexical attributes, so tokenizing is enough
+        return self._parse_doc(self.nlp.make_doc(text))
+
+    def parse_batch(self, texts: List[str], batch_size: int = 256) -> List[Dict[str, Any]]:
+        """parse() for many texts, tokenizing the ones the fast path misses in batches."""
+        results = [None] * len(texts)
+        pending = []
+        for k, text in enumerate(texts):
+            found = fast_path.parse(text, "hybrid")
+            if found is not None:
+                results[k] = self._parse_fast_path(found)
+            else:
+                pending.append(k)
+        docs = self.nlp.tokenizer.pipe((texts[k] for k in pending), batch_size=batch_size)
+        for k, doc in zip(pending, docs):
+            results[k] = self._parse_doc(doc)
+        return results
+
+    def _parse_doc(self, doc) -> Dict[str, Any]:
         matches = self.matcher(doc)
         constraints = []
         
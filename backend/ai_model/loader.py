@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import traceback
+
+# How models get loaded when the app starts:
+#   background - start loading right away in a daemon thread (default)
+#   lazy       - load on first use
+#   eager      - load before the module finishes importing (old behavior)
+#   preload    - like eager; set for gunicorn --preload (see gunicorn.conf.py) so
+#                the master loads everything once and the workers fork from it
+LOADING_MODE = os.environ.get("AI_MODEL_LOADING", "background")
+
+IDLE = "idle"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+class BackgroundLoader:
+    """
+    Load an expensive object (a spaCy pipeline, a parser) once per process,
+    either on first use or in a background thread, and report its state.
+
+    Callers that must not block (request handlers) use get(wait=False) and
+    answer 503 while the status is still idle or loading.
+    """
+
+    def __init__(self, name, factory, enabled=True):
+        self.name = name
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+        self._started_at = None
+        self._load_time_ms = None
+        self._status = IDLE if enabled else DISABLED
+        self._reset_listeners = []
+        if not enabled:
+            self._done.set()
+
+    @property
+    def status(self):
+        return self._status
+
+    def is_ready(self):
+        return self._status == READY
+
+    def is_settled(self):
+        """True once loading can no longer change anything (ready, failed or disabled)."""
+        return self._status in (READY, FAILED, DISABLED)
+
+    def start(self, background=True):
+        """Begin loading if nobody has yet; returns immediately when background is True."""
+        with self._lock:
+            if self._status != IDLE:
+                return
+            self._status = LOADING
+            self._started_at = time.time()
+        if background:
+            threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        print(f"🔄 Loading {self.name}...")
+        start = time.perf_counter()
+        try:
+            value = self.factory()
+        except Exception as e:
+            print(f"❌ Failed to load {self.name}: {e}")
+            print(traceback.format_exc())
+            self._error = str(e)
+            self._status = FAILED
+        else:
+            self._value = value
+            self._status = READY
+            print(f"✅ {self.name} loaded")
+        self._load_time_ms = int((time.perf_counter() - start) * 1000)
+        self._done.set()
+
+    def get(self, wait=True, timeout=None):
+        """
+        The loaded object, or None if it failed, is disabled or (with
+        wait=False) is not loaded yet. Triggers loading when still idle.
+        """
+        if self._status == READY:
+            return self._value
+        self.start(background=not wait)
+        if wait:
+            self._done.wait(timeout)
+        return self._value if self._status == READY else None
+
+    def reload(self):
+        """
+        Build a fresh object and swap it in while the old one keeps serving:
+        unlike reset(), get() never blocks or comes back empty meanwhile.
+        Only a loaded object is replaced; returns whether that happened.
+        """
+        if self._status != READY:
+            return False
+        try:
+            value = self.factory()
+        except Exception as e:
+            print(f"❌ Failed to reload {self.name}, keeping the current one: {e}")
+            return False
+        self._replace(value, READY)
+        print(f"✅ {self.name} reloaded")
+        return True
+
+    def on_reset(self, callback):
+        """
+        Call `callback()` whenever the loaded object is dropped (reset()) or
+        replaced (reload()), e.g. to clear caches of its results.
+        """
+        self._reset_listeners.append(callback)
+
+    def reset(self):
+        """Forget the loaded object so the next get() loads a fresh one."""
+        if self._status == LOADING:
+            self._done.wait()
+        self._replace(None, IDLE)
+
+    def _replace(self, value, status):
+        """The one place the loaded object changes after loading; notifies the on_reset listeners."""
+        with self._lock:
+            if self._status == DISABLED:
+                return
+            self._value = value
+            self._error = None
+            self._status = status
+            if status == IDLE:
+                self._done.clear()
+        for callback in self._reset_listeners:
+            callback()
+
+    def snapshot(self):
+        return {
+            "status": self._status,
+            "error": self._error,
+            "load_time_ms": self._load_time_ms
+        }
+
+    def warm_up(self):
+        """Apply LOADING_MODE: load now, start a background load, or do nothing."""
+        if LOADING_MODE in ("eager", "preload"):
+            self.start(background=False)
+        elif LOADING_MODE != "lazy":
+            self.start()
@@ -0,0 +1,85 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collect single items submitted by concurrent callers into small batches.
+
+    The first item that arrives opens a batch; the worker then waits at most
+    max_wait_ms for more, up to max_batch_size items, hands the whole batch to
+    process_batch (which must return one result per item, in order) and wakes
+    every caller with its own result. A failing batch raises in every caller.
+
+    The worker thread starts on first use and is restarted after a fork, so a
+    batcher created before gunicorn forks its workers keeps working.
+    """
+
+    def __init__(self, process_batch, max_wait_ms=5, max_batch_size=32, name="microbatch"):
+        self.process_batch = process_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # A queue inherited from the parent process may hold items nobody will answer
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, item, timeout=None):
+        """Process one item as part of the next batch and return its result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        self._batches += 1
+        self._items += len(batch)
+        self._largest = max(self._largest, len(batch))
+        try:
+            results = self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+            "largest_batch": self._largest,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size
+        }
@@ -2,23 +2,35 @@ import spacy
 from typing import Dict, List, Any
 import re
 import os
+from .registry import SCHEDULE_NER_UNUSED
 
 class ScheduleParser:
-    def __init__(self):
+    def __init__(self, nlp=None):
+        """Use an already loaded pipeline (see registry.pipelines) or load schedule_ner."""
+        if nlp is not None:
+            self.nlp = nlp
+            return
         model_path = os.path.join(
             os.path.dirname(__file__),  # Changed to look in ai_model directory
             "schedule_ner"
         )
         if not os.path.exists(model_path):
             raise IOError(f"Model not found at {model_path}")
-        self.nlp = spacy.load(model_path)
+        self.nlp = spacy.load(model_path, exclude=SCHEDULE_NER_UNUSED)
         print(f"Successfully loaded model from {model_path}")
 
     def parse(self, text: str) -> Dict[str, Any]:
         """Parse text to extract scheduling constraints."""
         # Preprocess text to handle case sensitivity
         normalized_text = text.lower()
-        doc = self.nlp(normalized_text)
+        return self._parse_doc(self.nlp(normalized_text))
+
+    def parse_batch(self, texts: List[str], batch_size: int = 256) -> List[Dict[str, Any]]:
+        """parse() for many texts, run through nlp.pipe; results in input order."""
+        docs = self.nlp.pipe((text.lower() for text in texts), batch_size=batch_size)
+        return [self._parse_doc(doc) for doc in docs]
+
+    def _parse_doc(self, doc) -> Dict[str, Any]:
         constraints = []
         
         for ent in doc.ents:
@@ -0,0 +1,81 @@
+import copy
+import os
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = int(os.environ.get("PARSE_CACHE_SIZE", "2048"))
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_DAY_RE = re.compile(r"\b(" + "|".join(DAY_NAMES) + r")", re.IGNORECASE)
+
+
+def canonical_text(text):
+    """
+    Whitespace collapsed and day names title-cased. Parsers are fed this
+    text, so two inputs with the same canonical text always parse the same and
+    can share a cache entry. Other casing is kept: TA names depend on it.
+    """
+    return _DAY_RE.sub(lambda m: m.group(1).title(), " ".join(text.split()))
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parse results keyed on canonical text.
+
+    Values are deep-copied on the way in and out so callers can never mutate
+    a cached result. invalidate() must be called whenever the model behind
+    the parser is reloaded.
+    """
+
+    def __init__(self, name, maxsize=DEFAULT_CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Cached result for a canonical text, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -86,10 +86,16 @@ PATTERNS = [
             ]
         },
         
-        # NO_CLASS_DAY patterns
+        # NO_CLASS_DAY patterns; a day on its own ("meets on Monday") is not a constraint
         {
             "label": "NO_CLASS_DAY",
-            "pattern": [{"LOWER": {"IN": ["monday", "tuesday", "wednesday", "thursday", "friday"]}}]
+            "pattern": [
+                {"LOWER": {"IN": ["no", "not", "avoid", "without"]}},
+                {"LOWER": {"IN": ["class", "classes", "lectures", "sessions"]}, "OP": "?"},
+                {"LOWER": "on", "OP": "?"},
+                {"LOWER": {"IN": ["monday", "tuesday", "wednesday", "thursday", "friday",
+                                  "mondays", "tuesdays", "wednesdays", "thursdays", "fridays"]}}
+            ]
         },
         {
             "label": "NO_CLASS_DAY",
@@ -100,16 +106,13 @@ PATTERNS = [
             ]
         },
         
-        # AVOID_TA patterns
-        {
-            "label": "AVOID_TA",
-            "pattern": [{"LOWER": "ta"}, {"IS_TITLE": True}]
-        },
+        # AVOID_TA patterns; "TA" followed by a name only counts after an avoid cue
         {
             "label": "AVOID_TA",
             "pattern": [
-                {"LOWER": {"IN": ["avoid", "no"]}},
-                {"LOWER": "ta"},
+                {"LOWER": {"IN": ["avoid", "no", "not"]}},
+                {"LOWER": {"IN": ["the", "with"]}, "OP": "?"},
+                {"LOWER": {"IN": ["ta", "tutor"]}},
                 {"IS_TITLE": True}
             ]
         }
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+SCHEDULE_NER_PATH = os.path.join(os.path.dirname(__file__), "schedule_ner")
+# Built by `python -m ai_model.snapshot`; used instead of SCHEDULE_NER_PATH when present and current
+SCHEDULE_NER_SNAPSHOT = os.environ.get("SCHEDULE_NER_SNAPSHOT", SCHEDULE_NER_PATH + ".snapshot")
+
+# schedule_ner ships everything it was trained from (en_core_web_md), but only
+# the tokenizer, the entity ruler and the NER component (which has its own
+# tok2vec layer) are used. Excluded components are never deserialized, saving
+# load time and RSS.
+SCHEDULE_NER_UNUSED = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+
+def load_schedule_ner():
+    """schedule_ner with its entity ruler running ahead of NER (see extraction.py)."""
+    import spacy
+    from .extraction import with_entity_ruler
+    from .snapshot import SnapshotError, load_snapshot
+    if os.path.exists(SCHEDULE_NER_SNAPSHOT):
+        try:
+            return with_entity_ruler(load_snapshot(SCHEDULE_NER_SNAPSHOT, source=SCHEDULE_NER_PATH))
+        except SnapshotError as e:
+            print(f"⚠️ PIPELINES: Ignoring snapshot {SCHEDULE_NER_SNAPSHOT} ({e})")
+    if not os.path.exists(SCHEDULE_NER_PATH):
+        raise IOError(f"Model not found at {SCHEDULE_NER_PATH}")
+    return with_entity_ruler(spacy.load(SCHEDULE_NER_PATH, exclude=SCHEDULE_NER_UNUSED))
+
+
+class PipelineRegistry:
+    """
+    Process-wide cache of spaCy pipelines, each loaded at most once.
+
+    Pipelines are registered by name with a zero-argument loader; get() loads
+    on first use (thread-safe) and returns the same object afterwards.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._pipelines = {}
+        self._load_times = {}
+        self._baselines = {}
+        self._refreshes = {}
+        # Reentrant: one pipeline's loader may get() another (see load_tokenizer_pipeline)
+        self._lock = threading.RLock()
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+
+    def get(self, name):
+        nlp = self._pipelines.get(name)
+        if nlp is not None:
+            return nlp
+        with self._lock:
+            if name not in self._pipelines:
+                start = time.perf_counter()
+                nlp = self._loaders[name]()
+                self._load_times[name] = int((time.perf_counter() - start) * 1000)
+                self._baselines[name] = len(nlp.vocab.strings)
+                self._pipelines[name] = nlp
+            return self._pipelines[name]
+
+    def refresh(self, name):
+        """
+        Load a fresh copy of a loaded pipeline and put it in place of the old
+        one under every name that shares it. The load happens outside the
+        lock, so get() keeps answering with the old pipeline meanwhile, and
+        callers already holding the old one can keep using it.
+        """
+        old = self._pipelines.get(name)
+        start = time.perf_counter()
+        nlp = self._loaders[name]()
+        with self._lock:
+            for key, current in list(self._pipelines.items()):
+                if key == name or (old is not None and current is old):
+                    self._pipelines[key] = nlp
+                    self._baselines[key] = len(nlp.vocab.strings)
+                    self._load_times[key] = int((time.perf_counter() - start) * 1000)
+                    self._refreshes[key] = self._refreshes.get(key, 0) + 1
+        return nlp
+
+    def vocab_growth(self):
+        """Strings each loaded pipeline's StringStore gained since it was loaded."""
+        return {
+            name: len(nlp.vocab.strings) - self._baselines.get(name, 0)
+            for name, nlp in list(self._pipelines.items())
+        }
+
+    def is_loaded(self, name):
+        return name in self._pipelines
+
+    def stats(self):
+        return {
+            name: {
+                "components": list(nlp.pipe_names),
+                "vocab_strings": len(nlp.vocab.strings),
+                "vocab_growth": len(nlp.vocab.strings) - self._baselines.get(name, 0),
+                "refreshes": self._refreshes.get(name, 0),
+                "snapshot_sha256": nlp.meta.get("snapshot", {}).get("sha256"),
+                "load_time_ms": self._load_times.get(name)
+            }
+            for name, nlp in list(self._pipelines.items())
+        }
+
+
+def load_tokenizer_pipeline():
+    """
+    Pipeline for the rule-based (Matcher) parser. The Matcher only looks at
+    lexical attributes, so it reuses schedule_ner and thereby shares its vocab
+    instead of loading en_core_web_sm; a blank English pipeline (same
+    tokenizer rules) stands in when schedule_ner is not available.
+    """
+    try:
+        return pipelines.get("schedule_ner")
+    except Exception as e:
+        print(f"⚠️ PIPELINES: schedule_ner unavailable ({e}), using blank 'en' for tokenization")
+        import spacy
+        return spacy.blank("en")
+
+
+def load_constraint_pipeline():
+    """
+    Pipeline for constraint extraction outside the NER endpoints: schedule_ner
+    itself, or the entity ruler alone on blank English when schedule_ner is
+    not available, so rule-based extraction keeps working without the model.
+    """
+    try:
+        return pipelines.get("schedule_ner")
+    except Exception as e:
+        print(f"⚠️ PIPELINES: schedule_ner unavailable ({e}), extracting constraints with the entity ruler only")
+        import spacy
+        from .extraction import with_entity_ruler
+        return with_entity_ruler(spacy.blank("en"))
+
+
+pipelines = PipelineRegistry()
+pipelines.register("schedule_ner", load_schedule_ner)
+pipelines.register("tokenizer", load_tokenizer_pipeline)
+pipelines.register("constraints", load_constraint_pipeline)
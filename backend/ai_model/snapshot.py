@@ -0,0 +1,162 @@
+"""
+Single-file snapshots of a loaded spaCy pipeline.
+
+    python -m ai_model.snapshot            # build step, run once per deploy
+
+writes ai_model/schedule_ner.snapshot: the pruned pipeline the app uses
+(config + nlp.to_bytes()) in one file, prefixed by a small JSON header that
+carries the SHA-256 of the payload. Loading it means one memory-mapped read
+instead of spacy.load parsing config files and many small component files.
+
+Every worker that loads a snapshot reports its hash (see
+PipelineRegistry.stats), so checking that all workers run the same model is
+a string comparison.
+
+File layout: MAGIC, 4-byte little-endian header length, header JSON, payload.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"SCHEDNLP"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct("<I")
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, corrupt, stale or from another spaCy version."""
+
+
+def source_fingerprint(path):
+    """Cheap fingerprint of a pipeline directory (file names, sizes and mtimes, no contents)."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            stat = os.stat(full)
+            digest.update(f"{os.path.relpath(full, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def build_snapshot(nlp, path, source=None):
+    """Serialize `nlp` into a snapshot file at `path`; returns the header written."""
+    import spacy
+    from spacy.util import get_lang_class
+
+    # from_config already builds the default tokenizer; when the pipeline's
+    # tokenizer is that default, storing and loading it again is wasted time
+    exclude = []
+    fresh = get_lang_class(nlp.lang).from_config(nlp.config)
+    if fresh.tokenizer.to_bytes(exclude=["vocab"]) == nlp.tokenizer.to_bytes(exclude=["vocab"]):
+        exclude.append("tokenizer")
+    payload = nlp.to_bytes(exclude=exclude)
+    header = {
+        "format": FORMAT_VERSION,
+        "lang": nlp.lang,
+        "pipeline": list(nlp.pipe_names),
+        "excluded": exclude,
+        "spacy_version": spacy.__version__,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "payload_bytes": len(payload),
+        "built_at": time.time(),
+        "source_fingerprint": source_fingerprint(source) if source else None,
+        "config": nlp.config.to_str()
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    # Write next to the target and rename, so a worker never maps a half-written file
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    """The header of a snapshot file, without touching the payload."""
+    with open(path, "rb") as f:
+        header, _ = _parse_header(f.read(len(MAGIC) + _LENGTH.size), f)
+    return header
+
+
+def _parse_header(prefix, f):
+    if len(prefix) < len(MAGIC) + _LENGTH.size or prefix[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("not a pipeline snapshot")
+    (length,) = _LENGTH.unpack_from(prefix, len(MAGIC))
+    try:
+        header = json.loads(f.read(length).decode("utf-8"))
+    except ValueError as e:
+        raise SnapshotError(f"corrupt header: {e}")
+    if header.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format {header.get('format')}")
+    return header, len(MAGIC) + _LENGTH.size + length
+
+
+def load_snapshot(path, source=None, verify=True):
+    """
+    Load a pipeline from a snapshot file.
+
+    With `source`, the snapshot is rejected when the pipeline directory it was
+    built from has changed since; with `verify`, the payload hash is checked.
+    Raises SnapshotError when the snapshot cannot be used.
+    """
+    import spacy
+    from spacy.util import get_lang_class
+    from thinc.api import Config
+
+    if not os.path.exists(path):
+        raise SnapshotError(f"no snapshot at {path}")
+    with open(path, "rb") as f:
+        header, offset = _parse_header(f.read(len(MAGIC) + _LENGTH.size), f)
+        if header["spacy_version"] != spacy.__version__:
+            raise SnapshotError(f"built with spaCy {header['spacy_version']}, running {spacy.__version__}")
+        if source and header.get("source_fingerprint") != source_fingerprint(source):
+            raise SnapshotError(f"stale: {source} changed after the snapshot was built")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            payload = memoryview(mapped)[offset:]
+            try:
+                if len(payload) != header["payload_bytes"]:
+                    raise SnapshotError("truncated payload")
+                if verify and hashlib.sha256(payload).hexdigest() != header["sha256"]:
+                    raise SnapshotError("payload does not match its hash")
+                config = Config().from_str(header["config"])
+                nlp = get_lang_class(header["lang"]).from_config(config)
+                nlp.from_bytes(payload, exclude=header["excluded"])
+            finally:
+                # The mmap cannot close while a view of it is alive
+                payload.release()
+
+    nlp.meta["snapshot"] = {"path": path, "sha256": header["sha256"], "built_at": header["built_at"]}
+    return nlp
+
+
+def main():
+    from .extraction import with_entity_ruler
+    from .registry import SCHEDULE_NER_PATH, SCHEDULE_NER_SNAPSHOT, SCHEDULE_NER_UNUSED
+    import spacy
+
+    start = time.perf_counter()
+    nlp = spacy.load(SCHEDULE_NER_PATH, exclude=SCHEDULE_NER_UNUSED)
+    directory_ms = (time.perf_counter() - start) * 1000
+    # Snapshot the ruler the app runs (PATTERNS), not the one saved with the model
+    nlp = with_entity_ruler(nlp)
+
+    header = build_snapshot(nlp, SCHEDULE_NER_SNAPSHOT, source=SCHEDULE_NER_PATH)
+    print(f"✅ Wrote {SCHEDULE_NER_SNAPSHOT} ({header['payload_bytes'] / 1e6:.1f} MB, sha256 {header['sha256'][:12]})")
+
+    start = time.perf_counter()
+    load_snapshot(SCHEDULE_NER_SNAPSHOT, source=SCHEDULE_NER_PATH)
+    snapshot_ms = (time.perf_counter() - start) * 1000
+    print(f"spacy.load: {directory_ms:.0f} ms, snapshot: {snapshot_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
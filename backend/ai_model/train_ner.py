@@ -1,41 +1,88 @@
+"""
+Train the schedule_ner model.
+
+    python train_ner.py                          # one run with the default settings
+    python train_ner.py --sweep [--processes N]  # hyperparameter sweep, keeps the best model
+
+Examples are preprocessed once and reused every epoch, each minibatch is a
+single nlp.update call and evaluation goes through nlp.pipe. The sweep trains
+every combination of SWEEP_GRID in its own process and keeps the model with
+the best accuracy on a dev split held out of TRAIN_DATA, the same split
+early stopping uses. TEST_DATA is only scored for the model that is kept.
+"""
+
+import argparse
+import itertools
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import spacy
 from spacy.training.example import Example
 from training_data import TRAIN_DATA
 from test_data import TEST_DATA
 from patterns import PATTERNS  # Assuming you have a patterns.py file with your entity patterns
+from evaluation import per_label_scores
 import random
 import os
 from spacy.util import minibatch, compounding
 from spacy.scorer import Scorer
-from collections import defaultdict
 
-def calculate_accuracy(nlp, test_data):
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_ner")
+BASE_MODEL = "en_core_web_md"
+
+# Settings of the sweep; every combination is trained once
+SWEEP_GRID = {
+    "drop_rate": [0.1, 0.2, 0.3],
+    "n_iter": [50, 100],
+    "batch_sizes": [(4, 32), (8, 64)],
+}
+
+# Share of TRAIN_DATA held out for early stopping and sweep selection. The
+# split is seeded on its own so every sweep candidate sees the same one.
+DEV_FRACTION = 0.2
+DEV_SEED = 0
+
+def split_dev(data, fraction=DEV_FRACTION, seed=DEV_SEED):
+    """(train, dev) examples of `data`, the same for the same seed."""
+    shuffled = list(data)
+    random.Random(seed).shuffle(shuffled)
+    n_dev = max(1, int(len(shuffled) * fraction))
+    return shuffled[n_dev:], shuffled[:n_dev]
+
+def predict_entities(nlp, test_data, batch_size=64):
+    """Predicted (start, end, label) entities of every text, in order, via nlp.pipe."""
+    texts = [text for text, _ in test_data]
+    return [
+        {(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents}
+        for doc in nlp.pipe(texts, batch_size=batch_size)
+    ]
+
+def calculate_accuracy(nlp, test_data, verbose=True):
     correct = 0
     total = 0
     
-    print("\nEvaluating on test data:")
-    for text, annotations in test_data:
-        doc = nlp(text)
+    if verbose:
+        print("\nEvaluating on test data:")
+    for (text, annotations), predicted_entities in zip(test_data, predict_entities(nlp, test_data)):
         expected_entities = set([
             (start, end, label) 
             for start, end, label in annotations["entities"]
         ])
-        predicted_entities = set([
-            (ent.start_char, ent.end_char, ent.label_) 
-            for ent in doc.ents
-        ])
         
         # Print each test case result
-        print(f"\nText: {text}")
-        print(f"Expected: {expected_entities}")
-        print(f"Predicted: {predicted_entities}")
+        if verbose:
+            print(f"\nText: {text}")
+            print(f"Expected: {expected_entities}")
+            print(f"Predicted: {predicted_entities}")
         
         # Count correct predictions
         correct += len(expected_entities.intersection(predicted_entities))
         total += len(expected_entities)
     
     accuracy = (correct / total) * 100 if total > 0 else 0
-    print(f"\nAccuracy: {accuracy:.2f}% ({correct}/{total} entities correctly identified)")
+    if verbose:
+        print(f"\nAccuracy: {accuracy:.2f}% ({correct}/{total} entities correctly identified)")
     return accuracy
 
 def print_confusion_matrix(nlp, test_data):
@@ -44,10 +91,9 @@ def print_confusion_matrix(nlp, test_data):
         "NO_CLASS_AFTER": {"correct": 0, "confused_as_before": 0}
     }
     
-    for text, annotations in test_data:
-        doc = nlp(text)
+    for (text, annotations), predicted in zip(test_data, predict_entities(nlp, test_data)):
         true_labels = {(s, e): l for s, e, l in annotations["entities"]}
-        pred_labels = {(e.start_char, e.end_char): e.label_ for e in doc.ents}
+        pred_labels = {(s, e): l for s, e, l in predicted}
         
         for (start, end), true_label in true_labels.items():
             if true_label in ["NO_CLASS_BEFORE", "NO_CLASS_AFTER"]:
@@ -74,22 +120,18 @@ def print_confusion_matrix(nlp, test_data):
                       f"({stats['confused_as_before']/total*100:.1f}%)")
 
 def per_label_accuracy(nlp, test_data):
-    correct = defaultdict(int)
-    total = defaultdict(int)
-
-    for text, ann in test_data:
+    pairs = []
+    for (text, ann), predicted in zip(test_data, predict_entities(nlp, test_data)):
         expected = {(start, end, label) for start, end, label in ann["entities"]}
-        predicted = {(ent.start_char, ent.end_char, ent.label_) for ent in nlp(text).ents}
-        
-        for _, _, label in ann["entities"]:
-            total[label] += 1
-
-        for ent in expected & predicted:
-            correct[ent[2]] += 1
+        pairs.append((expected, predicted))
 
-    for label in total:
-        acc = (correct[label] / total[label]) * 100 if total[label] else 0
-        print(f"{label}: {acc:.2f}% ({correct[label]}/{total[label]})")
+    scores = per_label_scores(pairs)
+    for label, score in scores.items():
+        total = score["tp"] + score["fn"]
+        if total:
+            print(f"{label}: {score['recall'] * 100:.2f}% ({score['tp']}/{total}), "
+                  f"precision {score['precision'] * 100:.2f}%")
+    return scores
 
 def add_pattern_matching(nlp):
     # Create an entity ruler and add it BEFORE the NER component
@@ -124,9 +166,27 @@ def preprocess_text(nlp, text):
     
     return normalized
 
-def train_ner():
+def make_examples(nlp, data):
+    """Preprocessed, aligned Examples; built once and reused every epoch."""
+    examples = []
+    for text, annotations in data:
+        processed_text = preprocess_text(nlp, text)
+        doc = nlp.make_doc(processed_text)
+        examples.append(Example.from_dict(doc, annotations))
+    return examples
+
+def train_ner(n_iter=100, batch_sizes=(4, 32), drop_rate=0.2, learn_rate=0.001, patience=8,
+              seed=0, output_dir=OUTPUT_DIR, base_model=BASE_MODEL, verbose=True):
+    """
+    Train on TRAIN_DATA minus its dev split, keep the checkpoint with the best
+    dev accuracy, save it to output_dir and return that accuracy.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    random.seed(seed)
+    spacy.util.fix_random_seed(seed)
+
     # Create blank English model
-    nlp = spacy.load("en_core_web_md")
+    nlp = spacy.load(base_model) if base_model else spacy.blank("en")
     
     # Remove existing pipes we'll recreate
     if "ner" in nlp.pipe_names:
@@ -148,9 +208,12 @@ def train_ner():
     for _, annotations in TRAIN_DATA:
         for _, _, label in annotations.get("entities"):
             label_counts[label] = label_counts.get(label, 0) + 1
-    print("\nLabel distribution in training data:")
+    log("\nLabel distribution in training data:")
     for label, count in label_counts.items():
-        print(f"{label}: {count} examples")
+        log(f"{label}: {count} examples")
+
+    train_data, dev_data = split_dev(TRAIN_DATA)
+    examples = make_examples(nlp, train_data)
 
     # Get names of other pipes to disable during training
     pipe_exceptions = ["ner", "trf_wordpiecer", "trf_tok2vec"]
@@ -158,49 +221,31 @@ def train_ner():
     with nlp.disable_pipes(*other_pipes):
         # Initialize the model with transfer learning settings
         optimizer = nlp.begin_training()
-        optimizer.learn_rate = 0.001
+        optimizer.learn_rate = learn_rate
         
-        # Training parameters optimized for transfer learning
-        n_iter = 100  # Fewer iterations needed with pre-trained model
-        batch_size = 4
-        drop_rate = 0.2  # Lower dropout for stability
-        patience = 8  # Number of evaluations without improvement before stopping
         best_accuracy = 0  # Track best accuracy for early stopping
         best_model = None
         no_improve = 0
         
         # Use compound batches for better learning
-        sizes = compounding(batch_size, 32.0, 1.001)
+        sizes = compounding(batch_sizes[0], batch_sizes[1], 1.001)
         
         # Training loop
         for itn in range(n_iter):
-            random.shuffle(TRAIN_DATA)
-            batches = list(minibatch(TRAIN_DATA, size=sizes))
+            random.shuffle(examples)
             losses = {}
             
-            # Update for each batch
-            for batch in batches:
-                for text, annotations in batch:
-                    processed_text = preprocess_text(nlp, text)
-                    doc = nlp.make_doc(processed_text)
-                    example = Example.from_dict(doc, annotations)
-                    nlp.update([example], drop=drop_rate, losses=losses)
+            # One update per batch
+            for batch in minibatch(examples, size=sizes):
+                nlp.update(batch, drop=drop_rate, losses=losses, sgd=optimizer)
                     
             # Evaluate every 10 iterations (more frequent with fewer total iterations)
             if itn % 10 == 0:
-                print(f"\nIteration #{itn}")
-                print(f"Losses: {losses}")
-                
-                # Calculate accuracy per label silently
-                with open(os.devnull, 'w') as f:
-                    # Temporarily redirect stdout
-                    import sys
-                    old_stdout = sys.stdout
-                    sys.stdout = f
-                    interim_accuracy = calculate_accuracy(nlp, TEST_DATA)
-                    sys.stdout = old_stdout
+                log(f"\nIteration #{itn}")
+                log(f"Losses: {losses}")
                 
-                print(f"Current accuracy: {interim_accuracy:.2f}%")
+                interim_accuracy = calculate_accuracy(nlp, dev_data, verbose=False)
+                log(f"Current dev accuracy: {interim_accuracy:.2f}%")
                 
                 # Early stopping check
                 if interim_accuracy > best_accuracy:
@@ -210,27 +255,75 @@ def train_ner():
                 else:
                     no_improve += 1
                     if no_improve >= patience:
-                        print("\nStopping early: no improvement in accuracy")
+                        log("\nStopping early: no improvement in accuracy")
                         break
 
         # Load best model from memory for final evaluation
         if best_model is not None:
             nlp.from_bytes(best_model)
 
-        print("\n--- Final Evaluation ---")
-        final_accuracy = calculate_accuracy(nlp, TEST_DATA)
-        print("\n--- Per Label Accuracy ---")
-        per_label_accuracy(nlp, TEST_DATA)
+        if verbose:
+            print("\n--- Final Evaluation ---")
+            calculate_accuracy(nlp, TEST_DATA)
+            print("\n--- Per Label Accuracy ---")
+            per_label_accuracy(nlp, TEST_DATA)
 
-        print("\n--- Confusion Matrix Analysis ---")
-        print_confusion_matrix(nlp, TEST_DATA)
+            print("\n--- Confusion Matrix Analysis ---")
+            print_confusion_matrix(nlp, TEST_DATA)
         
         # Save only the final best model
-        output_dir = os.path.join(os.path.dirname(__file__), "schedule_ner")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         nlp.to_disk(output_dir)
-        print(f"\nBest model saved with accuracy: {best_accuracy:.2f}%")
+        log(f"\nBest model saved with dev accuracy: {best_accuracy:.2f}%")
+    return best_accuracy
+
+def sweep_configs(grid=SWEEP_GRID):
+    """Every combination of the grid's values, as train_ner keyword arguments."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _train_candidate(job):
+    config, output_dir, base_model = job
+    accuracy = train_ner(output_dir=output_dir, base_model=base_model, verbose=False, **config)
+    print(f"🔍 SWEEP: {config} -> dev {accuracy:.2f}%")
+    return accuracy
+
+def sweep(grid=SWEEP_GRID, processes=None, output_dir=OUTPUT_DIR, base_model=BASE_MODEL):
+    """
+    Train every configuration of the grid, `processes` at a time, and move
+    the model with the best dev accuracy to output_dir. Only that model is
+    scored on TEST_DATA.
+    Returns (best config, its dev accuracy, its test accuracy).
+    """
+    configs = sweep_configs(grid)
+    workdir = tempfile.mkdtemp(prefix="ner-sweep-")
+    jobs = [(config, os.path.join(workdir, f"candidate-{k}"), base_model) for k, config in enumerate(configs)]
+    processes = processes or min(len(jobs), os.cpu_count() or 1)
+    try:
+        if processes > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                accuracies = list(pool.map(_train_candidate, jobs))
+        else:
+            accuracies = [_train_candidate(job) for job in jobs]
+
+        best = max(range(len(jobs)), key=lambda k: accuracies[k])
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        shutil.copytree(jobs[best][1], output_dir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    test_accuracy = calculate_accuracy(spacy.load(output_dir), TEST_DATA, verbose=False)
+    print(f"\nBest of {len(configs)} configurations: {configs[best]} (dev {accuracies[best]:.2f}%, "
+          f"test {test_accuracy:.2f}%), saved to {output_dir}")
+    return configs[best], accuracies[best], test_accuracy
 
 if __name__ == "__main__":
-    train_ner()
+    parser = argparse.ArgumentParser(description="Train the schedule_ner model")
+    parser.add_argument("--sweep", action="store_true", help="train every SWEEP_GRID configuration and keep the best")
+    parser.add_argument("--processes", type=int, help="parallel trainings during a sweep (default: CPU count)")
+    args = parser.parse_args()
+    if args.sweep:
+        sweep(processes=args.processes)
+    else:
+        train_ner()
@@ -0,0 +1,71 @@
+import os
+import threading
+
+# Strings a pipeline may gain after loading before a fresh copy replaces it
+VOCAB_MAX_NEW_STRINGS = int(os.environ.get("VOCAB_MAX_NEW_STRINGS", "100000"))
+
+
+class VocabGuard:
+    """
+    Keep the StringStores of long-lived pipelines from growing without bound.
+
+    Every new word a pipeline sees is added to its vocab for good, so a worker
+    that parses user text for days keeps growing. check() is cheap (one len()
+    per pipeline) and meant to run after every request; once a pipeline has
+    gained more than max_new_strings strings, a background thread loads a
+    fresh copy through the registry (from the snapshot when there is one) and
+    then rebuilds the parsers built on it (`dependents`, BackgroundLoaders),
+    whose on_reset listeners drop results cached from the old pipeline.
+    Requests in flight keep the objects they already hold, so none is dropped.
+    """
+
+    def __init__(self, registry, dependents=(), max_new_strings=VOCAB_MAX_NEW_STRINGS):
+        self.registry = registry
+        self.dependents = list(dependents)
+        self.max_new_strings = max_new_strings
+        self._refreshing = threading.Lock()
+        self.refreshes = 0
+        self.last_error = None
+
+    def over_limit(self):
+        return [name for name, growth in self.registry.vocab_growth().items() if growth > self.max_new_strings]
+
+    def check(self, background=True):
+        """Start a refresh if some pipeline is over the limit; returns whether one started."""
+        if self.max_new_strings <= 0 or self._refreshing.locked() or not self.over_limit():
+            return False
+        if not self._refreshing.acquire(blocking=False):
+            return False
+        if background:
+            threading.Thread(target=self._refresh, name="vocab-guard", daemon=True).start()
+        else:
+            self._refresh()
+        return True
+
+    def _refresh(self):
+        try:
+            # Refreshing one name also replaces every name sharing that pipeline,
+            # so the list is re-read after each refresh
+            while True:
+                names = self.over_limit()
+                if not names:
+                    break
+                print(f"🔄 VOCAB GUARD: {names[0]} grew past {self.max_new_strings} new strings, loading a fresh copy")
+                self.registry.refresh(names[0])
+            for loader in self.dependents:
+                loader.reload()
+            self.refreshes += 1
+            self.last_error = None
+        except Exception as e:
+            print(f"❌ VOCAB GUARD: Refresh failed: {e}")
+            self.last_error = str(e)
+        finally:
+            self._refreshing.release()
+
+    def stats(self):
+        return {
+            "max_new_strings": self.max_new_strings,
+            "refreshing": self._refreshing.locked(),
+            "refreshes": self.refreshes,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,213 @@
+"""
+Course Catalog Store - courses.json loaded once per process, shared by all blueprints
+
+Every course is indexed by its id and its events are pre-filtered per
+semester, together with the summary the course details endpoints return, so
+a course lookup is a dictionary access instead of reading the 400 KB JSON
+file and scanning it on every request.
+
+A loaded catalog is never modified. Reloading builds a new Catalog and swaps
+it in, so a request keeps a consistent view even while the file is reloaded.
+Callers must treat courses and views as read-only and copy before changing
+anything (e.g. {**course, 'events': ...}). Indexes derived from a catalog,
+like its FuzzyIndex and FacetIndex, are built on first use and live as long as it does.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from .facets import FacetIndex
+from .search_index import FuzzyIndex
+
+logger = logging.getLogger(__name__)
+
+COURSES_PATH = os.path.join(os.path.dirname(__file__), '..', 'integrations', 'courses.json')
+
+
+def _summary(events):
+    """Lecturers, categories, days, semesters and locations of a list of events."""
+    lecturers = set()
+    categories = set()
+    days = set()
+    semesters = set()
+    locations = set()
+    for event in events:
+        lecturers.update(event.get('lecturers', []) or [])
+        if event.get('category'):
+            categories.add(event['category'])
+        if event.get('location'):
+            locations.add(event['location'])
+        for slot in event.get('timeSlots', []) or []:
+            if slot.get('day'):
+                days.add(slot['day'])
+            if slot.get('semester'):
+                semesters.add(slot['semester'])
+    return {
+        'lecturers': list(lecturers),
+        'categories': list(categories),
+        'days': list(days),
+        'semesters': list(semesters),
+        'locations': list(locations),
+        'events_count': len(events)
+    }
+
+
+def _semester_events(events, semester):
+    """Events with time slots in `semester`, each keeping only those slots."""
+    filtered = []
+    for event in events:
+        slots = [slot for slot in event.get('timeSlots', []) if slot.get('semester') == semester]
+        if slots:
+            filtered.append({**event, 'timeSlots': slots})
+    return filtered
+
+
+class CourseView:
+    """A course's events for one semester (or all of them) and their summary."""
+
+    __slots__ = ('events', 'summary')
+
+    def __init__(self, events):
+        self.events = events
+        self.summary = _summary(events)
+
+
+_EMPTY_VIEW = CourseView([])
+
+
+class Catalog:
+    """One loaded version of the catalog, indexed by course id."""
+
+    def __init__(self, data, version=0, source_mtime=None):
+        self.data = data
+        self.courses = data.get('courses', [])
+        self.version = version
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+        self.by_id = {}
+        self.semesters = set()
+        self._views = {}
+        self._fuzzy = None
+        self._facets = None
+        for course in self.courses:
+            course_id = course.get('id')
+            self.by_id[course_id] = course
+            events = course.get('events', [])
+            self._views[(course_id, '')] = CourseView(events)
+            course_semesters = {
+                slot.get('semester')
+                for event in events for slot in event.get('timeSlots', []) if slot.get('semester')
+            }
+            for semester in course_semesters:
+                self._views[(course_id, semester)] = CourseView(_semester_events(events, semester))
+            self.semesters.update(course_semesters)
+
+    def get(self, course_id):
+        """The course with this id, or None."""
+        return self.by_id.get(course_id)
+
+    def view(self, course_id, semester=''):
+        """
+        Events and summary of a course, limited to `semester` when given, or
+        None for an unknown course. A semester the course has no slots in
+        yields an empty view.
+        """
+        if course_id not in self.by_id:
+            return None
+        return self._views.get((course_id, semester or ''), _EMPTY_VIEW)
+
+    @property
+    def fuzzy(self):
+        """FuzzyIndex of course ids, names and lecturers, keyed by course id."""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(
+                (course.get('id'), [course.get('id', ''), course.get('name', '')] + self._views[(course.get('id'), '')].summary['lecturers'])
+                for course in self.courses
+            )
+        return self._fuzzy
+
+    @property
+    def facets(self):
+        """FacetIndex of categories, lecturers, days and semesters, by course position."""
+        if self._facets is None:
+            self._facets = FacetIndex(self.courses)
+        return self._facets
+
+    def __len__(self):
+        return len(self.courses)
+
+
+class CatalogStore:
+    """
+    Holds the current Catalog of a courses.json file. The file is read on
+    first use (or by load()); reload() and reload_if_changed() replace it.
+    """
+
+    def __init__(self, path=COURSES_PATH):
+        self.path = path
+        self._catalog = None
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._load_time_ms = None
+
+    def get(self):
+        catalog = self._catalog
+        if catalog is not None:
+            return catalog
+        with self._lock:
+            if self._catalog is None:
+                self._load_locked()
+            return self._catalog
+
+    def load(self):
+        """Read the file now and swap in the new catalog; returns it."""
+        with self._lock:
+            return self._load_locked()
+
+    reload = load
+
+    def reload_if_changed(self):
+        """Reload when the file changed since it was loaded; returns the current catalog."""
+        catalog = self.get()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return catalog
+        if mtime != catalog.source_mtime:
+            return self.load()
+        return catalog
+
+    def _load_locked(self):
+        start = time.perf_counter()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading course catalog from {self.path}: {e}")
+            if self._catalog is None:
+                self._catalog = Catalog({'courses': []})
+            return self._catalog
+
+        self._loads += 1
+        self._catalog = Catalog(data, version=self._loads, source_mtime=mtime)
+        self._load_time_ms = int((time.perf_counter() - start) * 1000)
+        logger.info(f"Loaded {len(self._catalog)} courses into the catalog store (version {self._loads})")
+        return self._catalog
+
+    def stats(self):
+        catalog = self._catalog
+        return {
+            'loaded': catalog is not None,
+            'courses': len(catalog) if catalog is not None else 0,
+            'version': catalog.version if catalog is not None else None,
+            'loads': self._loads,
+            'load_time_ms': self._load_time_ms
+        }
+
+
+# Process-wide store of integrations/courses.json
+catalog_store = CatalogStore()
@@ -4,33 +4,17 @@ This handles the large collection of Hebrew courses
 """
 
 from flask import Blueprint, request, jsonify
-import json
-import os
 import logging
 from auth.routes import token_required
+from .catalog_store import catalog_store
 
 logger = logging.getLogger(__name__)
 
 courses_bp = Blueprint('courses', __name__)
 
-# Cache for courses data
-_courses_cache = None
-
 def load_courses_data():
-    """Load courses data from JSON file with caching"""
-    global _courses_cache
-    
-    if _courses_cache is None:
-        try:
-            courses_path = os.path.join(os.path.dirname(__file__), '..', 'integrations', 'courses.json')
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                _courses_cache = json.load(f)
-            logger.info(f"Loaded {len(_courses_cache.get('courses', []))} courses from courses.json")
-        except Exception as e:
-            logger.error(f"Error loading courses data: {e}")
-            _courses_cache = {'courses': []}
-    
-    return _courses_cache
+    """Courses data of courses.json, from the shared catalog store (read-only)"""
+    return catalog_store.get().data
 
 @courses_bp.route('/courses/search', methods=['GET'])
 @token_required
@@ -44,6 +28,9 @@ def search_courses():
     - lecturer: Filter by lecturer name
     - day: Filter by day of week
     - semester: Filter by semester (A, B)
+    Category, lecturer, day and semester are matched with the catalog's
+    facet bitsets; a day and semester must be on the same time slot. Without
+    any of them, courses are scanned in order and the scan stops at limit.
     """
     try:
         query = request.args.get('q', '').strip()
@@ -53,61 +40,37 @@ def search_courses():
         day = request.args.get('day', '').strip()
         semester = request.args.get('semester', '').strip()
         
-        courses_data = load_courses_data()
-        all_courses = courses_data.get('courses', [])
+        catalog = catalog_store.get()
+        all_courses = catalog.courses
+        
+        faceted = bool(category or lecturer or day or semester)
+        if faceted:
+            # Events matching category, lecturer, day and semester, by course
+            facets = catalog.facets
+            matching = facets.matching_events(facets.filter_rows(category, lecturer, day, semester))
+            candidates = ((all_courses[position], events) for position, events in matching.items())
+        else:
+            # Every course with events matches; walk the catalog only up to limit
+            candidates = ((course, None) for course in all_courses if course.get('events'))
         
         # Filter courses
         filtered_courses = []
         
-        for course in all_courses:
+        for course, event_positions in candidates:
             # Text search in course name or ID
             if query:
                 if (query.lower() not in course['name'].lower() and 
                     query not in course['id']):
                     continue
             
-            # Filter by category, lecturer, day, semester
-            course_matches = False
-            filtered_events = []
-            
-            for event in course.get('events', []):
-                event_matches = True
-                
-                # Category filter
-                if category and category.lower() not in event.get('category', '').lower():
-                    event_matches = False
-                
-                # Lecturer filter  
-                if lecturer and not any(lecturer.lower() in lec.lower() 
-                                      for lec in event.get('lecturers', [])):
-                    event_matches = False
-                
-                # Day and semester filters (check timeSlots)
-                if (day or semester) and event.get('timeSlots'):
-                    slot_matches = False
-                    for slot in event['timeSlots']:
-                        if day and day.lower() != slot.get('day', '').lower():
-                            continue
-                        if semester and semester.upper() != slot.get('semester', '').upper():
-                            continue
-                        slot_matches = True
-                        break
-                    if not slot_matches:
-                        event_matches = False
-                
-                if event_matches:
-                    filtered_events.append(event)
-                    course_matches = True
+            # Create a filtered version of the course
+            filtered_course = course.copy()
+            if faceted:
+                filtered_course['events'] = [course['events'][e] for e in event_positions]
+            filtered_courses.append(filtered_course)
             
-            if course_matches:
-                # Create a filtered version of the course
-                filtered_course = course.copy()
-                if category or lecturer or day or semester:
-                    filtered_course['events'] = filtered_events
-                filtered_courses.append(filtered_course)
-                
-                if len(filtered_courses) >= limit:
-                    break
+            if len(filtered_courses) >= limit:
+                break
         
         # Format results for frontend
         results = []
@@ -237,11 +200,10 @@ def get_course_details(course_id):
     """Get detailed information for a specific course"""
     try:
         semester = request.args.get('semester', '').strip()
-        courses_data = load_courses_data()
-        all_courses = courses_data.get('courses', [])
+        catalog = catalog_store.get()
         
         # Find course by ID
-        course = next((c for c in all_courses if c['id'] == course_id), None)
+        course = catalog.get(course_id)
         
         if not course:
             return jsonify({
@@ -251,58 +213,12 @@ def get_course_details(course_id):
                 'course_id': course_id
             }), 404
         
-        # Filter events by semester if specified
-        filtered_events = course.get('events', [])
-        if semester:
-            filtered_events = []
-            for event in course.get('events', []):
-                # Filter time slots by semester
-                filtered_time_slots = [
-                    slot for slot in event.get('timeSlots', []) 
-                    if slot.get('semester') == semester
-                ]
-                
-                # Only include event if it has time slots for the requested semester
-                if filtered_time_slots:
-                    filtered_event = {
-                        **event,
-                        'timeSlots': filtered_time_slots
-                    }
-                    filtered_events.append(filtered_event)
-        
-        # Create filtered course
-        filtered_course = {
-            **course,
-            'events': filtered_events
-        }
-        
-        # Enhance course data with summary
-        lecturers = set()
-        categories = set()
-        days = set()
-        semesters = set()
-        locations = set()
-        
-        for event in filtered_events:
-            lecturers.update(event.get('lecturers', []))
-            categories.add(event.get('category', ''))
-            if event.get('location'):
-                locations.add(event['location'])
-            
-            for slot in event.get('timeSlots', []):
-                days.add(slot.get('day', ''))
-                semesters.add(slot.get('semester', ''))
-        
+        # Events of the requested semester and their summary are precomputed
+        view = catalog.view(course_id, semester)
         enhanced_course = {
-            **filtered_course,
-            'summary': {
-                'lecturers': list(lecturers),
-                'categories': list(categories), 
-                'days': list(days),
-                'semesters': list(semesters),
-                'locations': list(filter(None, locations)),
-                'events_count': len(filtered_events)
-            }
+            **course,
+            'events': view.events,
+            'summary': view.summary
         }
         
         return jsonify({
@@ -323,33 +239,21 @@ def get_course_details(course_id):
 @courses_bp.route('/courses/filters', methods=['GET'])
 @token_required
 def get_filter_options():
-    """Get available filter options (lecturers, categories, days, semesters)"""
+    """
+    Get available filter options (lecturers, categories, days, semesters)
+    Options are precomputed per catalog version. `counts` holds the number of
+    courses per option among the courses matching the optional category,
+    lecturer, day and semester query parameters.
+    """
     try:
-        courses_data = load_courses_data()
-        all_courses = courses_data.get('courses', [])
-        
-        lecturers = set()
-        categories = set()
-        days = set()
-        semesters = set()
-        
-        for course in all_courses:
-            for event in course.get('events', []):
-                lecturers.update(event.get('lecturers', []))
-                categories.add(event.get('category', ''))
-                
-                for slot in event.get('timeSlots', []):
-                    days.add(slot.get('day', ''))
-                    semesters.add(slot.get('semester', ''))
+        facets = catalog_store.get().facets
+        selected = [request.args.get(name, '').strip() for name in ('category', 'lecturer', 'day', 'semester')]
+        courses = facets.course_mask(facets.filter_rows(*selected)) if any(selected) else None
         
         return jsonify({
             'success': True,
-            'filters': {
-                'lecturers': sorted(list(filter(None, lecturers))),
-                'categories': sorted(list(filter(None, categories))),
-                'days': sorted(list(filter(None, days))),
-                'semesters': sorted(list(filter(None, semesters)))
-            }
+            'filters': facets.options,
+            'counts': facets.counts(courses)
         }), 200
         
     except Exception as e:
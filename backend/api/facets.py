@@ -0,0 +1,136 @@
+"""
+Facet bitsets of the course catalog
+
+Every time slot of every event is a row (an event without slots is one row
+that day and semester filters let through), numbered in catalog order. For each value of
+each facet (category, lecturer, day, semester) FacetIndex keeps the rows
+having it as one int bitset, so a filter combination is a bitwise AND and
+"category, lecturer, day and semester on the same slot" needs no loops over
+events. A second set of bitsets over course positions gives facet counts as
+popcounts.
+
+A FacetIndex is built once per catalog version (Catalog.facets) and never
+modified; the option lists of /courses/filters are computed with it.
+"""
+
+FACETS = ('categories', 'lecturers', 'days', 'semesters')
+
+# Facets matched by equality; the others match values containing the filter text
+_EXACT = {'days', 'semesters'}
+
+
+def bitset(positions, size):
+    """Int with the given bit positions set."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def positions(bits):
+    """Set bit positions of an int bitset, ascending."""
+    text = bin(bits)[:1:-1]
+    position = text.find('1')
+    while position != -1:
+        yield position
+        position = text.find('1', position + 1)
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+class FacetIndex:
+    """Row and course bitsets of every facet value of a list of courses."""
+
+    def __init__(self, courses):
+        self.rows = []  # (course position, event position) of each row
+        unscheduled = []  # rows of events without time slots
+        row_values = {facet: {} for facet in FACETS}
+        course_values = {facet: {} for facet in FACETS}
+        for c, course in enumerate(courses):
+            for e, event in enumerate(course.get('events', []) or []):
+                if not event.get('timeSlots'):
+                    unscheduled.append(len(self.rows))
+                for slot in event.get('timeSlots') or [{}]:
+                    row = len(self.rows)
+                    self.rows.append((c, e))
+                    values = {
+                        'categories': [event.get('category')],
+                        'lecturers': event.get('lecturers', []) or [],
+                        'days': [slot.get('day')],
+                        'semesters': [slot.get('semester')],
+                    }
+                    for facet, facet_values in values.items():
+                        for value in facet_values:
+                            if value:
+                                row_values[facet].setdefault(value, []).append(row)
+                                course_values[facet].setdefault(value, set()).add(c)
+
+        self.size = len(courses)
+        self.all_rows = (1 << len(self.rows)) - 1
+        self.all_courses = (1 << self.size) - 1
+        self.unscheduled = bitset(unscheduled, len(self.rows))
+        self.row_bits = {
+            facet: {value: bitset(rows, len(self.rows)) for value, rows in values.items()}
+            for facet, values in row_values.items()
+        }
+        self.course_bits = {
+            facet: {value: bitset(members, self.size) for value, members in values.items()}
+            for facet, values in course_values.items()
+        }
+        # Filter option lists, served as they are
+        self.options = {facet: sorted(values) for facet, values in self.course_bits.items()}
+
+    def value_rows(self, facet, text):
+        """
+        Rows of the facet values matching `text`, case-insensitively: equal
+        to it for days and semesters, containing it for categories and
+        lecturers (as the filters always matched).
+        """
+        text = text.lower()
+        bits = 0
+        for value, rows in self.row_bits[facet].items():
+            if (value.lower() == text) if facet in _EXACT else (text in value.lower()):
+                bits |= rows
+        return bits
+
+    def filter_rows(self, category='', lecturer='', day='', semester=''):
+        """Rows whose event and slot match every given filter."""
+        rows = self.all_rows
+        for facet, text in zip(FACETS, (category, lecturer, day, semester)):
+            if text:
+                matched = self.value_rows(facet, text)
+                if facet in _EXACT:
+                    # Events without time slots have never been excluded by day or semester
+                    matched |= self.unscheduled
+                rows &= matched
+                if not rows:
+                    break
+        return rows
+
+    def matching_events(self, rows):
+        """{course position: [event positions]} of the rows, both ascending."""
+        matches = {}
+        for row in positions(rows):
+            course, event = self.rows[row]
+            events = matches.setdefault(course, [])
+            if not events or events[-1] != event:
+                events.append(event)
+        return matches
+
+    def course_mask(self, rows):
+        """Courses having at least one of the rows."""
+        return bitset({self.rows[row][0] for row in positions(rows)}, self.size)
+
+    def counts(self, courses=None):
+        """Courses per facet value, among `courses` (default: all of them)."""
+        courses = self.all_courses if courses is None else courses
+        counts = {}
+        for facet, values in self.course_bits.items():
+            counts[facet] = {}
+            for value, bits in values.items():
+                count = popcount(bits & courses)
+                if count:
+                    counts[facet][value] = count
+        return counts
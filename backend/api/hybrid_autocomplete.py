@@ -11,10 +11,11 @@ Strategy:
 
 from flask import Blueprint, request, jsonify
 import json
-import os
 import logging
 from datetime import datetime, timedelta
 from auth.routes import token_required
+from .catalog_store import catalog_store
+from .search_index import AutocompleteIndex, normalize_text
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,16 @@ hybrid_autocomplete_bp = Blueprint('hybrid_autocomplete', __name__)
 
 # Cache for autocomplete data
 _autocomplete_cache = None
+# AutocompleteIndex over the cache entries, rebuilt with the cache
+_autocomplete_index = None
 _cache_last_updated = None
 _cache_ttl = timedelta(hours=6)  # Refresh every 6 hours
+# Shorter queries match too many courses to be useful
+MIN_QUERY_LENGTH = 2
 
 def load_autocomplete_cache():
-    """Load optimized autocomplete data from JSON with caching"""
-    global _autocomplete_cache, _cache_last_updated
+    """Build optimized autocomplete data from the catalog store with caching"""
+    global _autocomplete_cache, _autocomplete_index, _cache_last_updated
     
     # Check if cache is still valid
     if (_autocomplete_cache is not None and 
@@ -36,15 +41,13 @@ def load_autocomplete_cache():
         return _autocomplete_cache
     
     try:
-        # Load from courses.json
-        courses_path = os.path.join(os.path.dirname(__file__), '..', 'integrations', 'courses.json')
-        with open(courses_path, 'r', encoding='utf-8') as f:
-            courses_data = json.load(f)
+        # courses.json is read once per process; after the TTL it is only re-read if it changed
+        catalog = catalog_store.reload_if_changed()
         
         # Build optimized autocomplete structure
         autocomplete_data = {}
         
-        for course in courses_data.get('courses', []):
+        for course in catalog.courses:
             course_id = course.get('id', '')
             course_name = course.get('name', '')
             
@@ -69,38 +72,49 @@ def load_autocomplete_cache():
                 'name': course_name,
                 'semesters': list(semesters),
                 'lecturers': list(lecturers)[:3],  # Limit for performance
-                'search_text': f"{course_id} {course_name}".lower(),
+                'search_text': normalize_text(f"{course_id} {course_name}"),
                 'display': f"{course_id} - {course_name}"
             }
             
             # Index by course ID for fast lookup
             autocomplete_data[course_id] = autocomplete_entry
         
+        _autocomplete_index = AutocompleteIndex(list(autocomplete_data.values()), fuzzy=catalog.fuzzy)
         _autocomplete_cache = autocomplete_data
         _cache_last_updated = datetime.now()
         
-        logger.info(f"Built autocomplete cache with {len(autocomplete_data)} courses")
+        logger.info(f"Built autocomplete cache and index with {len(autocomplete_data)} courses")
         return _autocomplete_cache
         
     except Exception as e:
         logger.error(f"Error loading autocomplete cache: {e}")
         if _autocomplete_cache is None:
             _autocomplete_cache = {}
+            _autocomplete_index = AutocompleteIndex([])
         return _autocomplete_cache
 
+def get_autocomplete_index():
+    """AutocompleteIndex of the current cache"""
+    load_autocomplete_cache()
+    return _autocomplete_index
+
 @hybrid_autocomplete_bp.route('/courses/fast-autocomplete', methods=['GET'])
 def fast_autocomplete():
     """
     Ultra-fast autocomplete using JSON-based lookup
-    Returns results in <10ms instead of 100-500ms database queries
+    Prefix completions come from the per-semester trie (id, name, then word
+    starts inside the name), and queries of 3+ characters are filled up with
+    substring matches from the trigram index, then with typo-tolerant
+    matches on names, ids and lecturers. Hebrew spelling variants
+    (niqqud, geresh/gershayim, final letters) are normalized away.
     """
     try:
-        query = request.args.get('q', '').strip().lower()
+        query = normalize_text(request.args.get('q', ''))
         semester = request.args.get('semester', '').strip()
         limit = min(int(request.args.get('limit', 8)), 15)
         
         # Minimum query length for performance
-        if len(query) < 3:
+        if len(query) < MIN_QUERY_LENGTH:
             return jsonify({
                 'success': True,
                 'suggestions': [],
@@ -108,39 +122,22 @@ def fast_autocomplete():
                 'query_too_short': True
             }), 200
         
-        # Load autocomplete cache
-        autocomplete_data = load_autocomplete_cache()
+        # Load autocomplete index
+        index = get_autocomplete_index()
         
-        # Fast in-memory search
         matches = []
-        
-        for course_id, course_data in autocomplete_data.items():
-            # Quick text matching
-            if query in course_data['search_text']:
-                # Semester filtering
-                if semester and semester not in course_data['semesters']:
-                    continue
-                
-                matches.append({
-                    'id': course_data['id'],
-                    'name': course_data['name'],
-                    'display': course_data['display'],
-                    'lecturers': course_data['lecturers']
-                })
-                
-                # Early exit for performance
-                if len(matches) >= limit:
-                    break
-        
-        # Sort by relevance (exact matches first, then by course ID)
-        matches.sort(key=lambda x: (
-            0 if query in x['name'].lower() else 1,  # Exact name matches first
-            x['id']  # Then by course ID
-        ))
+        for position in index.search(query, limit, semester):
+            course_data = index.entries[position]
+            matches.append({
+                'id': course_data['id'],
+                'name': course_data['name'],
+                'display': course_data['display'],
+                'lecturers': course_data['lecturers']
+            })
         
         return jsonify({
             'success': True,
-            'suggestions': matches[:limit],
+            'suggestions': matches,
             'source': 'json_cache',
             'query': request.args.get('q', ''),
             'cache_age_hours': (datetime.now() - _cache_last_updated).total_seconds() / 3600 if _cache_last_updated else 0
@@ -163,9 +160,10 @@ def refresh_autocomplete_cache():
     Can be called after database updates
     """
     try:
-        global _autocomplete_cache, _cache_last_updated
+        global _autocomplete_cache, _autocomplete_index, _cache_last_updated
         
         # Force cache refresh
+        catalog_store.reload()
         _autocomplete_cache = None
         _cache_last_updated = None
         
@@ -221,29 +219,15 @@ def fast_course_details(course_id):
     try:
         semester = request.args.get('semester', '').strip()
 
-        # Load courses.json directly (keeps this endpoint independent of DB)
-        courses_path = os.path.join(os.path.dirname(__file__), '..', 'integrations', 'courses.json')
-        with open(courses_path, 'r', encoding='utf-8') as f:
-            courses_data = json.load(f)
-
-        all_courses = courses_data.get('courses', [])
-        course = next((c for c in all_courses if c.get('id') == course_id), None)
+        # Catalog store lookup (keeps this endpoint independent of DB)
+        catalog = catalog_store.get()
+        course = catalog.get(course_id)
 
         if not course:
             return jsonify({'success': False, 'course': None, 'error': 'Course not found', 'course_id': course_id}), 404
 
-        # Optionally filter timeSlots by semester
-        filtered_events = course.get('events', [])
-        if semester:
-            new_events = []
-            for event in course.get('events', []):
-                filtered_time_slots = [slot for slot in event.get('timeSlots', []) if slot.get('semester') == semester]
-                if filtered_time_slots:
-                    ev = { **event, 'timeSlots': filtered_time_slots }
-                    new_events.append(ev)
-            filtered_events = new_events
-
-        filtered_course = { **course, 'events': filtered_events }
+        # timeSlots of the requested semester are precomputed
+        filtered_course = { **course, 'events': catalog.view(course_id, semester).events }
 
         return jsonify({ 'success': True, 'course': filtered_course, 'course_id': course_id }), 200
     except Exception as e:
@@ -309,12 +293,12 @@ def sync_json_from_database():
             courses_json['courses'].append(course_entry)
         
         # Write to JSON file
-        courses_path = os.path.join(os.path.dirname(__file__), '..', 'integrations', 'courses.json')
-        with open(courses_path, 'w', encoding='utf-8') as f:
+        with open(catalog_store.path, 'w', encoding='utf-8') as f:
             json.dump(courses_json, f, ensure_ascii=False, indent=2)
         
         # Refresh cache
         global _autocomplete_cache, _cache_last_updated
+        catalog_store.reload()
         _autocomplete_cache = None
         _cache_last_updated = None
         load_autocomplete_cache()
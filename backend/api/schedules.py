@@ -1,9 +1,14 @@
 from flask import Blueprint, request, jsonify, g
 from auth.routes import token_required
 from auth.auth_manager import AuthManager
+from schedule.neighborhood import reoptimize_schedule, DEFAULT_MAX_CHANGES, DEFAULT_LIMIT
+from schedule.utils import parse_time_slot
 import json
 from datetime import datetime
 
+# Neighborhoods grow combinatorially with the number of courses allowed to change
+MAX_REOPTIMIZE_CHANGES = 4
+
 schedules_bp = Blueprint('schedules', __name__)
 
 def get_auth_manager():
@@ -321,4 +326,96 @@ def delete_schedule(schedule_id):
 
     except Exception as e:
         print(f"Error deleting schedule: {e}")
-        return jsonify({'error': 'Failed to delete schedule'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to delete schedule'}), 500
+
+def _courses_from_options(course_options, removed_sections):
+    """Turn saved original_course_options into solver courses, dropping removed sections."""
+    removed = {(r.get('course'), r.get('slot')) for r in removed_sections if isinstance(r, dict)}
+    courses = []
+    for option in course_options:
+        name = option.get('name')
+        slots = {}
+        for kind in ('lectures', 'ta_times'):
+            values = option.get(kind) or []
+            if isinstance(values, str):
+                values = values.split(',')
+            parsed = [parse_time_slot(str(v).strip()) for v in values if v and (name, str(v).strip()) not in removed]
+            slots[kind] = [slot for slot in parsed if slot]
+        courses.append({'name': name, 'lectures': slots['lectures'], 'ta_times': slots['ta_times']})
+    return courses
+
+@schedules_bp.route('/<schedule_id>/reoptimize', methods=['POST'])
+@token_required
+def reoptimize_saved_schedule(schedule_id):
+    """
+    Find the closest alternatives to a saved schedule after a change.
+
+    Body (all optional):
+    - constraints: extra constraints to apply, in the /api/schedule list format
+    - remove_sections: [{"course": name, "slot": "Mon 9-11"}] for cancelled sections
+    - preference: crammed or spaced, used to rank schedules with the same number of changes
+    - max_changes: how many courses may get a different section (default 2, 1 to 4)
+    - limit: how many schedules to return (default 5)
+    """
+    user_id = g.user['id']
+
+    auth_manager = get_auth_manager()
+    if not auth_manager:
+        return jsonify({'error': 'Authentication service unavailable'}), 500
+
+    data = request.get_json(silent=True) or {}
+    constraints = data.get('constraints', [])
+    removed_sections = data.get('remove_sections', [])
+    preference = data.get('preference', 'crammed')
+    if not isinstance(constraints, list) or not isinstance(removed_sections, list):
+        return jsonify({'error': 'constraints and remove_sections must be arrays'}), 400
+    if preference not in ['crammed', 'spaced']:
+        return jsonify({'error': 'Invalid preference value'}), 400
+    try:
+        max_changes = min(int(data.get('max_changes', DEFAULT_MAX_CHANGES)), MAX_REOPTIMIZE_CHANGES)
+        limit = max(1, min(int(data.get('limit', DEFAULT_LIMIT)), 20))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_changes and limit must be integers'}), 400
+    if max_changes < 1:
+        return jsonify({'error': 'max_changes must be at least 1'}), 400
+
+    try:
+        client = auth_manager.get_client_for_user(user_id)
+
+        result = client.table("saved_schedules")\
+            .select("*")\
+            .eq("id", schedule_id)\
+            .eq("user_id", user_id)\
+            .single()\
+            .execute()
+
+        if not result.data:
+            return jsonify({'error': 'Schedule not found'}), 404
+
+        saved = result.data
+        course_options = saved.get('original_course_options') or []
+        saved_schedule = saved.get('schedule_data')
+        if not course_options or not isinstance(saved_schedule, list):
+            return jsonify({'error': 'Saved schedule has no course options to re-optimize'}), 400
+
+        saved_constraints = [c for c in (saved.get('constraints_data') or []) if isinstance(c, dict)]
+        schedules = reoptimize_schedule(
+            courses=_courses_from_options(course_options, removed_sections),
+            saved_schedule=saved_schedule,
+            preference=preference,
+            constraints=saved_constraints + constraints,
+            max_changes=max_changes,
+            limit=limit
+        )
+
+        return jsonify({
+            'schedule_id': schedule_id,
+            'schedules': schedules,
+            'max_changes': max_changes
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error re-optimizing schedule: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to re-optimize schedule'}), 500
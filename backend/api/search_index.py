@@ -0,0 +1,376 @@
+"""
+Search index over the course catalog for autocomplete
+
+TrigramIndex maps every 3-character substring of a course's search text
+("<id> <name>") to the sorted positions of the courses that contain it. The
+candidates for a query are the intersection of the posting lists of the
+query's trigrams, walked from the shortest list, and each candidate is then
+checked with a real substring test (having every trigram does not make the
+query a substring). A query therefore costs about the length of its rarest
+trigram's posting list instead of a pass over the whole catalog.
+
+Matches are ranked id prefix first, then name prefix, then any other
+substring match, and the top k are taken with a heap, so results no longer
+depend on the order of courses in the file.
+
+PrefixTrie answers completion as the user types: a path-compressed trie of
+course ids, names and the word starts inside names, where every node keeps
+the best TOP_K completions below it. A keystroke costs a walk down the
+prefix, independent of the catalog size. AutocompleteIndex combines both,
+with one trie per semester so a semester filter needs no extra work.
+
+FuzzyIndex is the typo-tolerant fallback: a SymSpell deletion dictionary
+over the words of course names, ids and lecturer names. Every word's prefix
+is indexed under all its deletions of up to MAX_EDIT characters, so the
+words within edit distance of a query word are found with a few dictionary
+lookups and then verified, in time bounded by the query length rather than
+the catalog size.
+
+Index text and queries go through the same normalize_text(): Hebrew niqqud
+is dropped, geresh/gershayim and quote marks are removed (ד"ר, ד״ר and דר
+match), final letters map to their regular forms and whitespace collapses.
+"""
+
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+NGRAM = 3
+# Completions kept per trie node; the autocomplete endpoint never asks for more
+TOP_K = 15
+# Largest edit distance of a fuzzy match, and the word prefix the deletion dictionary covers
+MAX_EDIT = 2
+FUZZY_PREFIX = 7
+# Shorter queries are not given fuzzy matches
+FUZZY_MIN_LENGTH = 4
+
+_NORMALIZE = {code: None for code in range(0x0591, 0x05C8)}  # niqqud and cantillation marks
+_NORMALIZE.update({0x05BE: "-", 0x05C0: " ", 0x05C3: " ", 0x05C6: " "})  # maqaf, paseq, sof pasuq, nun hafukha
+_NORMALIZE.update({ord(c): None for c in "'\"`\u00b4\u2018\u2019\u201a\u201b\u201c\u201d\u201e\u201f\u05f3\u05f4"})
+_NORMALIZE.update({ord(final): regular for final, regular in zip("ךםןףץ", "כמנפצ")})
+
+
+def normalize_text(text):
+    """Text as stored in the indexes: lower-cased, Hebrew-normalized, whitespace collapsed."""
+    text = unicodedata.normalize("NFKD", text).translate(_NORMALIZE)
+    return " ".join(text.lower().split())
+
+
+def words(text):
+    """Normalized words of a text."""
+    return re.findall(r"\w+", normalize_text(text))
+
+
+def ngrams(text, n=NGRAM):
+    return {text[k:k + n] for k in range(len(text) - n + 1)}
+
+
+def _contains(postings, position):
+    k = bisect_left(postings, position)
+    return k < len(postings) and postings[k] == position
+
+
+class TrigramIndex:
+    """Trigram inverted index of course ids and names, with ranked top-k search."""
+
+    def __init__(self, entries):
+        """`entries` yields (course_id, course_name) pairs; positions follow their order."""
+        self.ids = []
+        self.names = []
+        self.texts = []
+        postings = {}
+        for position, (course_id, name) in enumerate(entries):
+            course_id = normalize_text(str(course_id))
+            name = normalize_text(name or '')
+            text = f"{course_id} {name}"
+            self.ids.append(course_id)
+            self.names.append(name)
+            self.texts.append(text)
+            for gram in ngrams(text):
+                postings.setdefault(gram, []).append(position)
+        # Positions are appended in increasing order, so every list is already sorted
+        self.postings = {gram: array('I', positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def candidates(self, query):
+        """Positions whose search text contains every trigram of the query."""
+        grams = ngrams(query)
+        if not grams:
+            # Shorter than one trigram: nothing to intersect, every course is a candidate
+            return range(len(self.texts))
+        lists = []
+        for gram in grams:
+            positions = self.postings.get(gram)
+            if positions is None:
+                return []
+            lists.append(positions)
+        lists.sort(key=len)
+        shortest, others = lists[0], lists[1:]
+        return [p for p in shortest if all(_contains(other, p) for other in others)]
+
+    def _rank(self, position, query):
+        course_id = self.ids[position]
+        if course_id.startswith(query):
+            return (0, len(course_id), course_id)
+        name = self.names[position]
+        if name.startswith(query):
+            return (1, len(name), course_id)
+        return (2, self.texts[position].find(query), course_id)
+
+    def search(self, query, limit, accept=None):
+        """
+        Positions of the best `limit` courses containing `query`, best first.
+        `accept(position)` can exclude courses (e.g. by semester).
+        """
+        query = normalize_text(query)
+        matches = (
+            p for p in self.candidates(query)
+            if query in self.texts[p] and (accept is None or accept(p))
+        )
+        return heapq.nsmallest(limit, matches, key=lambda p: self._rank(p, query))
+
+
+class _TrieNode:
+    __slots__ = ("edges", "entries", "top")
+
+    def __init__(self):
+        self.edges = {}  # first character -> (edge label, child)
+        self.entries = []  # (rank, position) of the keys ending here, until finalized
+        self.top = ()
+
+
+def _common_length(a, b):
+    n = min(len(a), len(b))
+    k = 0
+    while k < n and a[k] == b[k]:
+        k += 1
+    return k
+
+
+class PrefixTrie:
+    """Path-compressed trie whose nodes hold their best k completions."""
+
+    def __init__(self, keys, k=TOP_K):
+        """`keys` yields (key, rank, position); lower ranks complete first."""
+        self.root = _TrieNode()
+        self.nodes = 1
+        for key, rank, position in keys:
+            if key:
+                self._insert(key, (rank, position))
+        self._finalize(self.root, k)
+
+    def _insert(self, key, item):
+        node = self.root
+        while True:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                child = _TrieNode()
+                child.entries.append(item)
+                node.edges[key[0]] = (key, child)
+                self.nodes += 1
+                return
+            label, child = edge
+            common = _common_length(label, key)
+            if common < len(label):
+                # The key leaves the edge part way: split it at that point
+                middle = _TrieNode()
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[key[0]] = (label[:common], middle)
+                self.nodes += 1
+                child = middle
+            node = child
+            key = key[common:]
+            if not key:
+                node.entries.append(item)
+                return
+
+    def _finalize(self, node, k):
+        """Fill node.top bottom-up; returns the node's best (rank, position) pairs."""
+        best = {}
+        items = node.entries
+        for _, child in node.edges.values():
+            items = items + self._finalize(child, k)
+        for rank, position in items:
+            if position not in best or rank < best[position]:
+                best[position] = rank
+        top = heapq.nsmallest(k, ((rank, position) for position, rank in best.items()))
+        node.top = tuple(position for _, position in top)
+        node.entries = None
+        return top
+
+    def complete(self, prefix):
+        """Positions of the best completions of `prefix`, best first."""
+        node = self.root
+        while prefix:
+            edge = node.edges.get(prefix[0])
+            if edge is None:
+                return ()
+            label, child = edge
+            if prefix.startswith(label):
+                prefix = prefix[len(label):]
+                node = child
+            elif label.startswith(prefix):
+                return child.top
+            else:
+                return ()
+        return node.top
+
+
+def completion_keys(position, course_id, name):
+    """Trie keys of a course: its id, its name and every later word start of the name."""
+    course_id = normalize_text(str(course_id))
+    name = normalize_text(name or '')
+    yield course_id, (0, len(course_id), course_id), position
+    yield name, (1, len(name), course_id), position
+    for k, char in enumerate(name):
+        if char == " " and k + 1 < len(name):
+            yield name[k + 1:], (2, len(name), course_id), position
+
+
+def max_distance(word):
+    """Edits allowed for a query word: none below 4 characters, 1 up to 6, then MAX_EDIT."""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 7 else MAX_EDIT
+
+
+def _deletes(word, distance):
+    """`word` and every string made by deleting up to `distance` of its characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:k] + w[k + 1:] for w in frontier for k in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance of a and b, or limit + 1 once it is over limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyIndex:
+    """SymSpell deletion dictionary over the words of course ids, names and lecturers."""
+
+    def __init__(self, entries):
+        """`entries` yields (key, texts) pairs, e.g. (course id, [id, name, *lecturers])."""
+        self.keys = []
+        self.terms = {}  # word -> positions of the entries containing it
+        self.deletes = {}  # deletion of a word prefix -> words
+        for position, (key, texts) in enumerate(entries):
+            self.keys.append(key)
+            for text in texts:
+                for word in words(str(text or '')):
+                    positions = self.terms.setdefault(word, [])
+                    if not positions or positions[-1] != position:
+                        positions.append(position)
+        for word in self.terms:
+            for deletion in _deletes(word[:FUZZY_PREFIX], MAX_EDIT):
+                self.deletes.setdefault(deletion, []).append(word)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, word):
+        """{indexed word: distance} of the words within max_distance(word) of `word`."""
+        limit = max_distance(word)
+        if limit == 0:
+            return {word: 0} if word in self.terms else {}
+        matches = {}
+        for deletion in _deletes(word[:FUZZY_PREFIX], limit):
+            for term in self.deletes.get(deletion, ()):
+                if term not in matches:
+                    matches[term] = edit_distance(word, term, limit)
+        return {term: distance for term, distance in matches.items() if distance <= limit}
+
+    def search(self, query, limit, accept=None):
+        """
+        Keys of the best `limit` entries matching every word of the query
+        within its edit distance, fewest total edits first. `accept(key)` can
+        exclude entries.
+        """
+        scores = None
+        for word in words(query):
+            best = {}
+            for term, distance in self.lookup(word).items():
+                for position in self.terms[term]:
+                    if distance < best.get(position, MAX_EDIT + 1):
+                        best[position] = distance
+            if scores is None:
+                scores = best
+            else:
+                scores = {p: scores[p] + distance for p, distance in best.items() if p in scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        matches = (
+            (distance, self.keys[p]) for p, distance in scores.items()
+            if accept is None or accept(self.keys[p])
+        )
+        return [key for _, key in heapq.nsmallest(limit, matches)]
+
+
+class AutocompleteIndex:
+    """
+    Prefix tries (all courses and one per semester) backed by the trigram
+    index for matches in the middle of words and, optionally, a FuzzyIndex
+    keyed by course id for misspelled queries.
+    """
+
+    def __init__(self, entries, fuzzy=None):
+        """`entries` are autocomplete entries with 'id', 'name' and 'semesters'."""
+        self.entries = entries
+        self.fuzzy = fuzzy
+        self.positions = {entry['id']: position for position, entry in enumerate(entries)}
+        self.trigrams = TrigramIndex((entry['id'], entry['name']) for entry in entries)
+        keys = [
+            key for position, entry in enumerate(entries)
+            for key in completion_keys(position, entry['id'], entry['name'])
+        ]
+        self.tries = {'': PrefixTrie(keys)}
+        for semester in sorted({s for entry in entries for s in entry['semesters']}):
+            self.tries[semester] = PrefixTrie(key for key in keys if semester in entries[key[2]]['semesters'])
+
+    def search(self, query, limit, semester=''):
+        """
+        Positions of up to `limit` courses for the query: prefix completions
+        first, then (for queries of at least NGRAM characters) other substring
+        matches, then fuzzy matches when those are still fewer than `limit`.
+        """
+        query = normalize_text(query)
+        trie = self.tries.get(semester or '')
+        if trie is None:
+            return []
+        results = list(trie.complete(query)[:limit])
+        if len(results) < limit and len(query) >= NGRAM:
+            seen = set(results)
+            def accept(position):
+                return position not in seen and (not semester or semester in self.entries[position]['semesters'])
+            results.extend(self.trigrams.search(query, limit - len(results), accept))
+        if len(results) < limit and self.fuzzy is not None and len(query) >= FUZZY_MIN_LENGTH:
+            seen = set(results)
+            def accept_id(course_id):
+                position = self.positions.get(course_id)
+                return position is not None and position not in seen and (
+                    not semester or semester in self.entries[position]['semesters'])
+            results.extend(self.positions[course_id] for course_id in self.fuzzy.search(query, limit - len(results), accept_id))
+        return results
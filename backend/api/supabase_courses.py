@@ -8,7 +8,7 @@ import os
 import logging
 from auth.routes import token_required
 from supabase import create_client, Client
-from .courses import load_courses_data
+from .catalog_store import catalog_store
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +48,60 @@ def test_supabase_connection():
             'error': f'Supabase connection failed: {str(e)}'
         }), 500
 
+def _like_literal(value):
+    """`value` with the LIKE wildcards escaped, for ilike filters matching it literally."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def search_select(category='', lecturer='', day='', semester='', department=''):
+    """
+    Embedded select of search_courses. Every embedding on the path of a
+    filter is !inner, so PostgREST returns only courses with a matching event
+    (and time slot), embedding just the matching events and slots. Lecturers
+    are matched through a separate `lecturer_filter` embedding so an event
+    still lists all of its lecturers.
+    """
+    def inner(filtered):
+        return '!inner' if filtered else ''
+    
+    lecturer_filter = 'lecturer_filter:course_event_lecturers!inner(lecturer:lecturers!inner(name)),' if lecturer else ''
+    return f'''
+        id, name, english_name, description, credits, level, language,
+        department:departments{inner(department)}(id, name, code),
+        university:universities(name, code),
+        events:course_events{inner(category or lecturer or day or semester)}(
+            id, group_number, max_students, enrolled_students, notes,
+            {lecturer_filter}
+            category:course_categories{inner(category)}(id, name, description),
+            location:locations(full_name, building_name, room_number),
+            lecturers:course_event_lecturers(
+                role, is_primary,
+                lecturer:lecturers(id, name, title, email)
+            ),
+            time_slots:time_slots{inner(day or semester)}(
+                start_time, end_time, specific_date,
+                semester:semesters{inner(semester)}(id, name, code, academic_year),
+                day:days_of_week{inner(day)}(id, name_hebrew, name_english, day_number)
+            )
+        )
+    '''
+
+def apply_search_filters(query_builder, category='', lecturer='', day='', semester='', department=''):
+    """
+    Filters of search_courses on the embeddings of search_select(): category,
+    day and semester match case-insensitively, the lecturer by substring.
+    """
+    if category:
+        query_builder = query_builder.ilike('events.category.name', _like_literal(category))
+    if lecturer:
+        query_builder = query_builder.ilike('events.lecturer_filter.lecturer.name', f'%{_like_literal(lecturer)}%')
+    if day:
+        query_builder = query_builder.ilike('events.time_slots.day.name_hebrew', _like_literal(day))
+    if semester:
+        query_builder = query_builder.ilike('events.time_slots.semester.code', _like_literal(semester))
+    if department:
+        query_builder = query_builder.eq('department.code', department)
+    return query_builder
+
 @supabase_courses_bp.route('/courses/search', methods=['GET'])
 @token_required
 def search_courses():
@@ -56,11 +110,17 @@ def search_courses():
     Query parameters:
     - q: Search query (course name, ID, lecturer)
     - limit: Maximum number of results (default: 20, max: 100)
+    - offset: Number of results to skip, for paging (default: 0)
     - category: Filter by event category (הרצאה, סדנה, etc.)
     - lecturer: Filter by lecturer name
     - day: Filter by day of week
     - semester: Filter by semester (A, B)
     - department: Filter by department code
+    All filters run in the database (see search_select), so a page holds up
+    to `limit` matching courses and `total_count` counts all of them. When the
+    text search finds fewer than `limit` courses, typo-tolerant matches on
+    course names, ids and lecturers (from the catalog's FuzzyIndex) fill up
+    the first page.
     """
     try:
         supabase = get_supabase_client()
@@ -68,118 +128,62 @@ def search_courses():
         # Get query parameters
         query = request.args.get('q', '').strip()
         limit = min(int(request.args.get('limit', 20)), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
         category = request.args.get('category', '').strip()
         lecturer = request.args.get('lecturer', '').strip()
         day = request.args.get('day', '').strip()
         semester = request.args.get('semester', '').strip()
         department = request.args.get('department', '').strip()
-        
-        # Build base query with comprehensive joins
-        base_query = '''
-            id, name, english_name, description, credits, level, language,
-            department:departments(id, name, code),
-            university:universities(name, code),
-            events:course_events(
-                id, group_number, max_students, enrolled_students, notes,
-                category:course_categories(id, name, description),
-                location:locations(full_name, building_name, room_number),
-                lecturers:course_event_lecturers(
-                    role, is_primary,
-                    lecturer:lecturers(id, name, title, email)
-                ),
-                time_slots:time_slots(
-                    start_time, end_time, specific_date,
-                    semester:semesters(id, name, code, academic_year),
-                    day:days_of_week(id, name_hebrew, name_english, day_number)
-                )
+        filters = dict(category=category, lecturer=lecturer, day=day, semester=semester, department=department)
+        select = search_select(**filters)
+        
+        def fetch_courses(match, start, size):
+            query_builder = (
+                supabase
+                .table('courses')
+                .select(select, count='exact')
+                .eq('is_active', True)
             )
-        '''
-        
-        query_builder = (
-            supabase
-            .table('courses')
-            .select(base_query)
-            .eq('is_active', True)
-            .limit(limit)
-        )
+            query_builder = apply_search_filters(match(query_builder), **filters)
+            return query_builder.order('id').range(start, start + size - 1).execute()
         
         # Apply text search filter
         if query:
             # Search in course name, English name, or course ID
             search_condition = f'name.ilike.%{query}%,english_name.ilike.%{query}%,id.ilike.%{query}%'
-            query_builder = query_builder.or_(search_condition)
-        
-        # Apply department filter
-        if department:
-            query_builder = query_builder.eq('departments.code', department)
-        
-        # Execute base query
-        result = query_builder.execute()
+            result = fetch_courses(lambda query_builder: query_builder.or_(search_condition), offset, limit)
+        else:
+            result = fetch_courses(lambda query_builder: query_builder, offset, limit)
         courses = result.data
-        
-        # Apply complex filters that require Python processing
-        filtered_courses = []
-        
-        for course in courses:
-            course_matches = True
-            filtered_events = []
-            
-            for event in course.get('events', []):
-                event_matches = True
-                
-                # Category filter
-                if category and event.get('category', {}).get('name', '').lower() != category.lower():
-                    event_matches = False
-                
-                # Lecturer filter
-                if lecturer:
-                    event_lecturers = [
-                        lec['lecturer']['name'] 
-                        for lec in event.get('lecturers', [])
-                    ]
-                    if not any(lecturer.lower() in lec_name.lower() for lec_name in event_lecturers):
-                        event_matches = False
-                
-                # Day and semester filters
-                if day or semester:
-                    matching_slots = []
-                    for slot in event.get('time_slots', []):
-                        slot_matches = True
-                        
-                        if day and slot.get('day', {}).get('name_hebrew', '').lower() != day.lower():
-                            slot_matches = False
-                        
-                        if semester and slot.get('semester', {}).get('code', '').upper() != semester.upper():
-                            slot_matches = False
-                        
-                        if slot_matches:
-                            matching_slots.append(slot)
-                    
-                    if (day or semester) and not matching_slots:
-                        event_matches = False
-                    else:
-                        # Update event with filtered time slots
-                        event = {**event, 'time_slots': matching_slots}
-                
-                if event_matches:
-                    filtered_events.append(event)
-            
-            # Only include course if it has matching events
-            if filtered_events or not (category or lecturer or day or semester):
-                course_copy = {**course, 'events': filtered_events}
-                filtered_courses.append(course_copy)
+        total_count = result.count if result.count is not None else offset + len(courses)
+        
+        # Misspelled queries: fill up the only page of results with fuzzy matches, best first
+        fuzzy_ids = []
+        if query and offset == 0 and total_count < limit:
+            found = {course['id'] for course in courses}
+            fuzzy_ids = catalog_store.get().fuzzy.search(
+                query, limit - len(courses), accept=lambda course_id: course_id not in found
+            )
+            if fuzzy_ids:
+                rank = {course_id: k for k, course_id in enumerate(fuzzy_ids)}
+                fuzzy_courses = fetch_courses(lambda query_builder: query_builder.in_('id', fuzzy_ids), 0, len(fuzzy_ids)).data
+                courses = courses + sorted(fuzzy_courses, key=lambda course: rank.get(course['id'], len(rank)))
         
         # Format results for frontend
         results = []
-        for course in filtered_courses:
+        for course in courses:
             # Extract summary information
             lecturers = set()
             categories = set()
             days = set()
             semesters = set()
             locations = set()
+            events = []
             
             for event in course.get('events', []):
+                event = {key: value for key, value in event.items() if key != 'lecturer_filter'}
+                events.append(event)
+                
                 # Lecturers
                 for lec_assoc in event.get('lecturers', []):
                     lecturers.add(lec_assoc['lecturer']['name'])
@@ -207,7 +211,7 @@ def search_courses():
                 'credits': course.get('credits'),
                 'level': course.get('level'),
                 'department': course.get('department', {}),
-                'events_count': len(course.get('events', [])),
+                'events_count': len(events),
                 'summary': {
                     'lecturers': list(lecturers),
                     'categories': list(categories),
@@ -215,13 +219,18 @@ def search_courses():
                     'semesters': list(semesters),
                     'locations': list(locations)
                 },
-                'events': course.get('events', [])  # Full event data
+                'events': events  # Full event data
             })
         
+        fuzzy_results = sum(1 for course in results if course['id'] in fuzzy_ids)
         return jsonify({
             'success': True,
             'courses': results,
             'total_results': len(results),
+            'total_count': total_count + fuzzy_results,
+            'offset': offset,
+            'has_more': offset + limit < total_count,
+            'fuzzy_results': fuzzy_results,
             'query': query,
             'filters': {
                 'category': category,
@@ -341,11 +350,8 @@ def get_course_details(course_id):
     try:
         semester = request.args.get('semester', '').strip()
 
-        courses_data = load_courses_data()
-        all_courses = courses_data.get('courses', [])
-
-        # Find course by ID
-        course = next((c for c in all_courses if c.get('id') == course_id), None)
+        catalog = catalog_store.get()
+        course = catalog.get(course_id)
 
         if not course:
             return jsonify({
@@ -355,50 +361,12 @@ def get_course_details(course_id):
                 'course_id': course_id
             }), 404
 
-        # Filter events by semester if specified
-        filtered_events = course.get('events', [])
-        if semester:
-            tmp = []
-            for event in course.get('events', []):
-                filtered_time_slots = [
-                    slot for slot in event.get('timeSlots', [])
-                    if slot.get('semester') == semester
-                ]
-                if filtered_time_slots:
-                    tmp.append({**event, 'timeSlots': filtered_time_slots})
-            filtered_events = tmp
-
-        # Build summary fields
-        lecturers = set()
-        categories = set()
-        days = set()
-        semesters = set()
-        locations = set()
-
-        for event in filtered_events:
-            for lec in event.get('lecturers', []) or []:
-                lecturers.add(lec)
-            if event.get('category'):
-                categories.add(event.get('category'))
-            if event.get('location'):
-                locations.add(event.get('location'))
-            for slot in event.get('timeSlots', []) or []:
-                if slot.get('day'):
-                    days.add(slot['day'])
-                if slot.get('semester'):
-                    semesters.add(slot['semester'])
-
+        # Events of the requested semester and their summary are precomputed
+        view = catalog.view(course_id, semester)
         enhanced_course = {
             **course,
-            'events': filtered_events,
-            'summary': {
-                'lecturers': list(lecturers),
-                'categories': list(categories),
-                'days': list(days),
-                'semesters': list(semesters),
-                'locations': list(filter(None, locations)),
-                'events_count': len(filtered_events)
-            }
+            'events': view.events,
+            'summary': view.summary
         }
 
         return jsonify({
@@ -1,9 +1,19 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, request, jsonify, g, Response, stream_with_context
 from flask_cors import CORS
 from schedule.logic import generate_schedule
+from schedule.anytime import improving_schedules, DEFAULT_TIME_LIMIT as DEFAULT_STREAM_TIME_LIMIT
+from schedule.pareto import pareto_schedules
+from schedule.sensitivity import what_if, DEFAULT_TIME_LIMIT as DEFAULT_WHAT_IF_TIME_LIMIT
+from schedule.selection import select_schedule
 from schedule.utils import parse_time_slot
-from schedule.parserAI import parse_course_text
-from ai_model.ml_parser import ScheduleParser
+from schedule.parserAI import parse_course_text, iter_course_text, constraint_parser_loader, course_text_cache
+from ai_model.loader import BackgroundLoader, DISABLED, LOADING_MODE
+from ai_model.registry import pipelines
+from ai_model.microbatch import MicroBatcher
+from ai_model.parse_cache import ParseCache, canonical_text
+from ai_model.fast_path import fast_path
+from ai_model.extraction import constraint_items
+from ai_model.vocab_guard import VocabGuard
 from auth.routes import auth_bp, token_required
 from api.schedules import schedules_bp
 from api.statistics import statistics_bp
@@ -11,14 +21,18 @@ from api.university import university_bp
 from api.contact import contact_bp
 
 from api.supabase_courses import supabase_courses_bp  # Database-based API for course details
-from api.hybrid_autocomplete import hybrid_autocomplete_bp  # Fast JSON-based autocomplete
+from api.hybrid_autocomplete import hybrid_autocomplete_bp, load_autocomplete_cache  # Fast JSON-based autocomplete
+from api.catalog_store import catalog_store
 # from api.courses import courses_bp  # Old JSON-based API (commented out)
 from auth.auth_manager import AuthManager
 import os
 from dotenv import load_dotenv
 from datetime import timedelta, datetime
 import time
+import json
 import traceback
+import gc
+import resource
 
 # Load environment variables
 load_dotenv()
@@ -52,108 +66,56 @@ print("✅ University API registered successfully")
 print("✅ Supabase courses API registered successfully")
 print("✅ Hybrid autocomplete API registered successfully")
 
-# Initialize AI parser with timeout handling
-schedule_parser = None
-model_nlp = None
+# AI parser. Loading spaCy takes seconds, so it happens in a background thread
+# (or on first use, see AI_MODEL_LOADING) and workers can serve requests right away.
+def load_constraint_extractor():
+    """Load the entity ruler + NER extractor; runs inside the loader thread"""
+    print(f"🔍 AI Model Init - Working directory: {os.getcwd()}")
+    schedule_ner_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_model', 'schedule_ner')
+    print(f"🔍 AI Model Init - Schedule NER exists: {os.path.exists(schedule_ner_path)}")
+
+    from ai_model.extraction import ConstraintExtractor
+    extractor = ConstraintExtractor(pipelines.get("schedule_ner"))
+    print(f"🔍 AI Model Init - NLP model loaded: {extractor.nlp is not None}")
+    return extractor
+
+ai_model_loader = BackgroundLoader(
+    "schedule_ner",
+    load_constraint_extractor,
+    enabled=not os.environ.get('SKIP_AI_MODEL')
+)
+
+# Parse results of the NER model by normalized text; dropped whenever the model is reloaded
+ner_cache = ParseCache("schedule_ner")
+ai_model_loader.on_reset(ner_cache.invalidate)
 
 def initialize_ai_model():
-    """Initialize AI model in a separate thread to avoid blocking startup"""
-    global schedule_parser, model_nlp
-    print(f"🔍 AI Model Init - Starting initialization...")
+    """Start loading the AI models without blocking startup"""
     print(f"🔍 AI Model Init - SKIP_AI_MODEL env var: {os.environ.get('SKIP_AI_MODEL')}")
-    print(f"🔍 AI Model Init - Working directory: {os.getcwd()}")
-    print(f"🔍 AI Model Init - Python path: {os.sys.path}")
-    
-    if not os.environ.get('SKIP_AI_MODEL'):
-        try:
-            print("🔄 Loading AI model...")
-            print("🔍 AI Model Init - About to import ScheduleParser...")
-            
-            # Check if ai_model directory exists
-            ai_model_path = os.path.join(os.getcwd(), 'ai_model')
-            print(f"🔍 AI Model Init - AI model directory path: {ai_model_path}")
-            print(f"🔍 AI Model Init - AI model directory exists: {os.path.exists(ai_model_path)}")
-            
-            if os.path.exists(ai_model_path):
-                print(f"🔍 AI Model Init - AI model directory contents: {os.listdir(ai_model_path)}")
-                schedule_ner_path = os.path.join(ai_model_path, 'schedule_ner')
-                print(f"🔍 AI Model Init - Schedule NER path: {schedule_ner_path}")
-                print(f"🔍 AI Model Init - Schedule NER exists: {os.path.exists(schedule_ner_path)}")
-                if os.path.exists(schedule_ner_path):
-                    print(f"🔍 AI Model Init - Schedule NER contents: {os.listdir(schedule_ner_path)}")
-            
-            from ai_model.ml_parser import ScheduleParser
-            print("✅ AI Model Init - ScheduleParser imported successfully")
-            
-            schedule_parser = ScheduleParser()
-            print(f"🔍 AI Model Init - ScheduleParser instantiated successfully: {schedule_parser is not None}")
-
-            
-            model_nlp = schedule_parser.nlp
-            print(f"🔍 AI Model Init - NLP model loaded: {model_nlp is not None}")
-            
-            print("✅ AI model loaded successfully")
-        except ImportError as e:
-            print(f"❌ AI Model Init - Import error: {e}")
-            print(f"❌ AI Model Init - Import error type: {type(e)}")
-            import traceback
-            print(f"❌ AI Model Init - Import traceback: {traceback.format_exc()}")
-            schedule_parser = None
-            model_nlp = None
-        except Exception as e:
-            print(f"❌ Failed to load AI model: {e}")
-            print(f"❌ AI Model Init - Error type: {type(e)}")
-            import traceback
-            print(f"❌ AI Model Init - Full traceback: {traceback.format_exc()}")
-            schedule_parser = None
-            model_nlp = None
-    else:
+    print(f"🔍 AI Model Init - Loading mode: {LOADING_MODE}")
+    if ai_model_loader.status == DISABLED:
         print("⏭️ Skipping AI model initialization (SKIP_AI_MODEL is set)")
-        schedule_parser = None
-        model_nlp = None
-    
-    print(f"🔍 AI Model Init - Final state: schedule_parser={schedule_parser is not None}, model_nlp={model_nlp is not None}")
+    ai_model_loader.warm_up()
+    constraint_parser_loader.warm_up()
 
-# Initialize AI model in background
-print("🔍 Starting AI model initialization...")
-initialize_ai_model()
-print("🔍 AI model initialization completed.")
+def ai_models_ready():
+    """Readiness: every model has finished loading (or is not going to)"""
+    return ai_model_loader.is_settled() and constraint_parser_loader.is_settled()
 
-def extract_hour_from_text(text):
-    """Converts time expressions to 24-hour integer values."""
-    text = text.strip().lower()
-    
-    if text in ["noon"]:
-        return 12
-    if text in ["midnight"]:
-        return 0
-
-    import re
-    match = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text)
-    if not match:
-        return None
-
-    hour = int(match.group(1))
-    minutes = int(match.group(2)) if match.group(2) else 0
-    period = match.group(3)
+initialize_ai_model()
 
-    if period == "pm" and hour < 12:
-        hour += 12
-    elif period == "am" and hour == 12:
-        hour = 0
+# Parsed user text keeps adding strings to the shared vocab; past a limit the
+# pipelines and both parsers are swapped for fresh copies in the background
+vocab_guard = VocabGuard(pipelines, dependents=[ai_model_loader, constraint_parser_loader])
 
-    return hour
+@app.after_request
+def check_vocab_growth(response):
+    vocab_guard.check()
+    return response
 
 def normalize_text(text):
-    """Normalize text before NER processing."""
-    day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
-    normalized = text
-    
-    for day in day_names:
-        normalized = normalized.replace(day.lower(), day.title())
-        normalized = normalized.replace(day.upper(), day.title())
-    
-    return normalized
+    """Normalize text before NER processing (also the parse cache key)."""
+    return canonical_text(text)
 
 def update_user_statistics_after_generation(user_id, courses_count, constraints_count, generation_time_ms, schedule_type, success):
     """Update user statistics after schedule generation"""
@@ -176,17 +138,77 @@ def update_user_statistics_after_generation(user_id, courses_count, constraints_
     except Exception as e:
         print(f"⚠️ Failed to update user statistics: {e}")
 
+def constraints_from_items(items):
+    """
+    Turn extracted constraint items (see ai_model/extraction.py) into
+    (constraints, raw entities). Entities without a readable value are
+    reported but yield no constraint.
+    """
+    constraints = []
+    raw_entities = []
+    for item in items:
+        raw_entities.append({
+            "specifics": item["text"],
+            "label": item["label"]
+        })
+        if item["value"] is None:
+            continue
+        if item["label"] == "NO_CLASS_BEFORE":
+            constraints.append({"type": "No Class Before", "time": item["value"]})
+        elif item["label"] == "NO_CLASS_DAY":
+            constraints.append({"type": "No Class Day", "day": item["value"]})
+        elif item["label"] == "NO_CLASS_AFTER":
+            constraints.append({"type": "No Class After", "time": item["value"]})
+        elif item["label"] == "AVOID_TA":
+            constraints.append({"type": "Avoid TA", "name": item["value"]})
+    return constraints, raw_entities
+
+def get_model_nlp():
+    """
+    The entity ruler + NER pipeline for the parse endpoints, or
+    (None, error response) when it is still loading (503) or unavailable (500).
+    """
+    print(f"🔍 CONSTRAINT PARSING: AI model status: {ai_model_loader.status}")
+
+    schedule_parser = ai_model_loader.get(wait=False)
+    if schedule_parser is None and not ai_model_loader.is_settled():
+        # Still warming up: answer right away instead of holding the worker
+        print("⏳ CONSTRAINT PARSING: AI model still loading - returning 503")
+        response = jsonify({"error": "AI model is loading, try again shortly", "status": ai_model_loader.status})
+        response.headers["Retry-After"] = "1"
+        return None, (response, 503)
+    model_nlp = schedule_parser.nlp if schedule_parser else None
+
+    if not schedule_parser or not model_nlp:
+        print("❌ CONSTRAINT PARSING: AI model not available - returning error")
+        return None, (jsonify({"error": "AI model not available"}), 500)
+    return model_nlp, None
+
+def run_parse_batch(items):
+    """Process (pipeline, text) pairs with one nlp.pipe call per pipeline (normally just one)."""
+    docs = [None] * len(items)
+    groups = {}
+    for k, (nlp, _) in enumerate(items):
+        groups.setdefault(id(nlp), (nlp, []))[1].append(k)
+    for nlp, indices in groups.values():
+        texts = [items[k][1] for k in indices]
+        for k, doc in zip(indices, nlp.pipe(texts, batch_size=len(texts))):
+            docs[k] = doc
+    return docs
+
+# Concurrent /api/parse calls arriving within a few milliseconds share one nlp.pipe call
+PARSE_MICROBATCH = os.environ.get("PARSE_MICROBATCH", "1") == "1"
+parse_batcher = MicroBatcher(
+    run_parse_batch,
+    max_wait_ms=float(os.environ.get("PARSE_BATCH_MAX_WAIT_MS", "5")),
+    max_batch_size=int(os.environ.get("PARSE_BATCH_MAX_SIZE", "32")),
+    name="parse-batcher"
+)
+
 @app.route("/api/parse", methods=["POST"])
 @token_required
 def parse_input():
     print("🔍 CONSTRAINT PARSING: Starting parse_input endpoint")
-    print(f"🔍 CONSTRAINT PARSING: schedule_parser available: {schedule_parser is not None}")
-    print(f"🔍 CONSTRAINT PARSING: model_nlp available: {model_nlp is not None}")
-    
-    if not schedule_parser or not model_nlp:
-        print("❌ CONSTRAINT PARSING: AI model not available - returning error")
-        return jsonify({"error": "AI model not available"}), 500
-        
     data = request.json
     print(f"🔍 CONSTRAINT PARSING: Received data: {data}")
     
@@ -199,10 +221,32 @@ def parse_input():
     
     normalized_text = normalize_text(text)
     print(f"🔍 CONSTRAINT PARSING: Normalized text: '{normalized_text}'")
+
+    # Common phrasings are answered by the regex fast path, even while the model loads
+    found = fast_path.parse(normalized_text, "ner")
+    if found is not None:
+        print(f"🔍 CONSTRAINT PARSING: Fast path covered the text, found {len(found)} constraints")
+        constraints, raw_entities = constraints_from_items(found)
+        return jsonify({
+            "constraints": constraints,
+            "entities": raw_entities
+        }, 200)
+
+    model_nlp, error = get_model_nlp()
+    if error:
+        return error
+
+    cached = ner_cache.get(normalized_text)
+    if cached is not None:
+        print("🔍 CONSTRAINT PARSING: Cache hit")
+        return jsonify(cached, 200)
     
     print("🔍 CONSTRAINT PARSING: About to process with NLP model")
     try:
-        doc = model_nlp(normalized_text)
+        if PARSE_MICROBATCH:
+            doc = parse_batcher.submit((model_nlp, normalized_text))
+        else:
+            doc = model_nlp(normalized_text)
         print(f"🔍 CONSTRAINT PARSING: NLP processing successful, found {len(doc.ents)} entities")
     except Exception as e:
         print(f"❌ CONSTRAINT PARSING: NLP processing failed: {e}")
@@ -210,50 +254,170 @@ def parse_input():
         print(f"❌ CONSTRAINT PARSING: Full traceback: {traceback.format_exc()}")
         return jsonify({"error": f"NLP processing failed: {str(e)}"}), 500
 
-    constraints = []
-    raw_entities = []
-
     print("🔍 CONSTRAINT PARSING: Starting entity processing...")
-    for i, ent in enumerate(doc.ents):
-        print(f"🔍 CONSTRAINT PARSING: Processing entity {i+1}: '{ent.text}' (label: {ent.label_})")
-        raw_entities.append({
-            "specifics": ent.text,
-            "label": ent.label_
-        })
+    constraints, raw_entities = constraints_from_items(constraint_items(doc))
+    result = {
+        "constraints": constraints,
+        "entities": raw_entities
+    }
+    ner_cache.put(normalized_text, result)
 
-        if ent.label_ == "NO_CLASS_BEFORE":
-            hour = extract_hour_from_text(ent.text)
-            if hour is not None:
-                constraints.append({
-                    "type": "No Class Before",
-                    "time": hour
-                })
-
-        elif ent.label_ == "NO_CLASS_DAY":
-            constraints.append({
-                "type": "No Class Day",
-                "day": ent.text.strip().capitalize()[:3]
-            })
-        elif ent.label_ == "NO_CLASS_AFTER":
-            hour = extract_hour_from_text(ent.text)
-            if hour is not None:
-                constraints.append({
-                    "type": "No Class After",
-                    "time": hour
-                })
-        elif ent.label_ == "AVOID_TA":
-            ta_name = ent.text.replace("ta", "").replace("TA", "").strip()
-            if ta_name:
-                constraints.append({
-                    "type": "Avoid TA",
-                    "name": ta_name
-                })
-            
+    return jsonify(result, 200)
+
+MAX_BATCH_TEXTS = 1000
+DEFAULT_PIPE_BATCH_SIZE = 256  # nlp.pipe throughput levels off around here for short sentences
+
+@app.route("/api/parse/batch", methods=["POST"])
+@token_required
+def parse_batch():
+    """
+    Parse many constraint texts in one call.
+
+    Body: {"texts": [...], "batch_size": optional int, "n_process": optional int}.
+    Texts the regex fast path covers are answered directly; the rest go
+    through nlp.pipe, which batches the NER work instead of running the
+    pipeline once per text. Results come back in input order.
+    """
+    data = request.json
+    texts = data.get("texts") if data else None
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return jsonify({"error": "texts must be an array of strings"}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"error": f"At most {MAX_BATCH_TEXTS} texts per batch"}), 400
+
+    batch_size = data.get("batch_size", DEFAULT_PIPE_BATCH_SIZE)
+    n_process = data.get("n_process", 1)
+    if not isinstance(batch_size, int) or batch_size < 1:
+        return jsonify({"error": "batch_size must be a positive integer"}), 400
+    if not isinstance(n_process, int) or n_process < 1:
+        return jsonify({"error": "n_process must be a positive integer"}), 400
+    # Extra processes only pay off for big batches and never beyond the CPU count
+    n_process = min(n_process, os.cpu_count() or 1, max(1, len(texts) // batch_size))
+
+    start = time.perf_counter()
+    normalized = [normalize_text(text) for text in texts]
+    results = [None] * len(texts)
+    for k, text in enumerate(normalized):
+        found = fast_path.parse(text, "ner")
+        if found is not None:
+            constraints, raw_entities = constraints_from_items(found)
+            results[k] = {"constraints": constraints, "entities": raw_entities}
+    uncovered = [k for k, result in enumerate(results) if result is None]
+
+    if uncovered:
+        model_nlp, error = get_model_nlp()
+        if error:
+            return error
+
+    try:
+        for k in uncovered:
+            results[k] = ner_cache.get(normalized[k])
+        # Only texts neither the fast path nor the cache could answer go through the pipeline
+        missing = [k for k in uncovered if results[k] is None]
+        docs = model_nlp.pipe([normalized[k] for k in missing], batch_size=batch_size, n_process=n_process) if missing else []
+        for k, doc in zip(missing, docs):
+            constraints, raw_entities = constraints_from_items(constraint_items(doc))
+            results[k] = {"constraints": constraints, "entities": raw_entities}
+            ner_cache.put(normalized[k], results[k])
+    except Exception as e:
+        print(f"❌ CONSTRAINT PARSING: Batch NLP processing failed: {e}")
+        print(f"❌ CONSTRAINT PARSING: Full traceback: {traceback.format_exc()}")
+        return jsonify({"error": f"NLP processing failed: {str(e)}"}), 500
 
     return jsonify({
-        "constraints": constraints,
-        "entities": raw_entities
-    }, 200)
+        "results": results,
+        "count": len(results),
+        "batch_size": batch_size,
+        "n_process": n_process,
+        "fast_path_hits": len(texts) - len(uncovered),
+        "cache_hits": len(uncovered) - len(missing),
+        "elapsed_ms": int((time.perf_counter() - start) * 1000)
+    }), 200
+
+@app.route("/api/parse/course-text/stream", methods=["POST"])
+@token_required
+def parse_course_text_stream():
+    """
+    Streaming variant of parse_course_text for long pasted text.
+
+    Answers with a text/event-stream: a "chunk" event with the courses and
+    constraints of every batch of sentences as soon as it is parsed, then a
+    "done" event with the totals and whether the text was truncated.
+    """
+    data = request.json
+    if not data or not isinstance(data.get("text"), str):
+        return jsonify({"error": "Missing text input"}), 400
+    text = data["text"]
+
+    def generate():
+        courses = constraints = parsed_chars = 0
+        truncated = False
+        try:
+            for piece in iter_course_text(text):
+                courses += len(piece["courses"])
+                constraints += len(piece["constraints"])
+                parsed_chars = piece["parsed_chars"]
+                truncated = piece["truncated"]
+                yield sse_event("chunk", piece)
+            yield sse_event("done", {
+                "courses": courses,
+                "constraints": constraints,
+                "parsed_chars": parsed_chars,
+                "truncated": truncated
+            })
+        except Exception as e:
+            print(f"❌ PARSER AI: Streaming parse failed: {e}")
+            yield sse_event("error", {"error": "Internal server error", "details": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def build_courses(raw_courses):
+    """
+    Parse the courses of a /api/schedule request into the solver format.
+
+    Returns (courses, None) or (None, error message).
+    """
+    courses = []
+    for i, c in enumerate(raw_courses):
+        if not isinstance(c, dict):
+            return None, f"Invalid course format at index {i}"
+
+        if not c.get("name"):
+            return None, f"Missing name for course at index {i}"
+
+        lectures = [str(l) for l in c["lectures"]] if isinstance(c["lectures"], list) else c["lectures"].split(",")
+        ta_times = [str(t) for t in c["ta_times"]] if isinstance(c["ta_times"], list) else c["ta_times"].split(",")
+
+        lec_slots = [parse_time_slot(s.strip()) for s in lectures if s]
+        ta_slots = [parse_time_slot(s.strip()) for s in ta_times if s]
+
+        credits = c.get("credits", 0)
+        if not isinstance(credits, (int, float)):
+            return None, f"Invalid credits for course at index {i}"
+
+        courses.append({
+            "name": c["name"],
+            "lectures": [s for s in lec_slots if s],
+            "ta_times": [s for s in ta_slots if s],
+            "credits": credits
+        })
+    return courses, None
+
+def range_error(value, name):
+    """Why `value` is not a {"min", "max"} window of non-negative numbers, or None when it is."""
+    if not isinstance(value, dict):
+        return f"{name} must be an object with min and/or max"
+    for key in ("min", "max"):
+        bound = value.get(key)
+        if bound is not None and (isinstance(bound, bool) or not isinstance(bound, (int, float)) or bound < 0):
+            return f"{name} {key} must be a non-negative number"
+    if value.get("min") is not None and value.get("max") is not None and value["min"] > value["max"]:
+        return f"{name} min cannot be greater than max"
+    return None
 
 @app.route("/api/schedule", methods=["POST"])
 def api_schedule():
@@ -270,9 +434,28 @@ def api_schedule():
         return jsonify({"error": "Empty courses array"}), 400
 
     preference = data.get("preference", "crammed")
-    if preference not in ["crammed", "spaced"]:
+    if preference not in ["crammed", "spaced", "pareto"]:
         return jsonify({"error": "Invalid preference value"}), 400
 
+    # Optional elective groups: pick min..max courses of each group, optionally within a credit window
+    course_groups = data.get("course_groups")
+    credit_range = data.get("credits") or {}
+    if course_groups is not None:
+        if not isinstance(course_groups, list) or not all(
+                isinstance(group, dict) and isinstance(group.get("courses"), list) for group in course_groups):
+            return jsonify({"error": "course_groups must be an array of objects with a courses array"}), 400
+        for k, group in enumerate(course_groups):
+            error = range_error(group, f"course_groups[{k}]")
+            if error:
+                return jsonify({"error": error}), 400
+        if preference == "pareto":
+            return jsonify({"error": "course_groups cannot be combined with the pareto preference"}), 400
+    error = range_error(credit_range, "credits")
+    if error:
+        return jsonify({"error": error}), 400
+    if credit_range and not course_groups:
+        return jsonify({"error": "credits requires course_groups"}), 400
+
     constraints = data.get("constraints", [])
     print(f"🔍 SCHEDULE PARSING: Received constraints: {constraints}")
     print(f"🔍 SCHEDULE PARSING: Constraints type: {type(constraints)}")
@@ -294,32 +477,44 @@ def api_schedule():
             return jsonify({"error": f"Constraint parsing failed: {str(e)}"}), 500
 
     try:
-        courses = []
-        for i, c in enumerate(data["courses"]):
-            if not isinstance(c, dict):
-                return jsonify({"error": f"Invalid course format at index {i}"}), 400
-            
-            if not c.get("name"):
-                return jsonify({"error": f"Missing name for course at index {i}"}), 400
-
-            lectures = [str(l) for l in c["lectures"]] if isinstance(c["lectures"], list) else c["lectures"].split(",")
-            ta_times = [str(t) for t in c["ta_times"]] if isinstance(c["ta_times"], list) else c["ta_times"].split(",")
-
-            lec_slots = [parse_time_slot(s.strip()) for s in lectures if s]
-            ta_slots = [parse_time_slot(s.strip()) for s in ta_times if s]
-
-
-            courses.append({
-                "name": c["name"],
-                "lectures": [s for s in lec_slots if s],
-                "ta_times": [s for s in ta_slots if s]
-            })
-
-        schedule = generate_schedule(
-            courses=courses,
-            preference=preference,
-            constraints=parsed_constraints.get("constraints") if parsed_constraints else None
-        )
+        courses, course_error = build_courses(data["courses"])
+        if course_error:
+            return jsonify({"error": course_error}), 400
+
+        if course_groups:
+            course_names = {course["name"] for course in courses}
+            grouped = [name for group in course_groups for name in group["courses"]]
+            unknown = [name for name in grouped if name not in course_names]
+            if unknown:
+                return jsonify({"error": f"Unknown courses in course_groups: {unknown}"}), 400
+            if len(grouped) != len(set(grouped)):
+                return jsonify({"error": "A course can belong to only one group"}), 400
+
+        pareto_front = None
+        selection = None
+        if preference == "pareto":
+            # Every non-dominated tradeoff; the first one doubles as "the" schedule
+            pareto_front = pareto_schedules(
+                courses=courses,
+                constraints=parsed_constraints.get("constraints") if parsed_constraints else None
+            )
+            schedule = pareto_front[0]["schedule"] if pareto_front else None
+        elif course_groups:
+            selection = select_schedule(
+                courses=courses,
+                groups=course_groups,
+                preference=preference,
+                constraints=parsed_constraints.get("constraints") if parsed_constraints else None,
+                min_credits=credit_range.get("min"),
+                max_credits=credit_range.get("max")
+            )
+            schedule = selection["schedule"] if selection else None
+        else:
+            schedule = generate_schedule(
+                courses=courses,
+                preference=preference,
+                constraints=parsed_constraints.get("constraints") if parsed_constraints else None
+            )
 
         generation_time_ms = int((time.time() - generation_start_time) * 1000)
         
@@ -364,12 +559,114 @@ def api_schedule():
                 "details": "Could not find a schedule that satisfies all constraints"
             }), 200
 
+        if pareto_front is not None:
+            return jsonify({"schedule": schedule, "pareto_front": pareto_front}), 200
+        if selection is not None:
+            return jsonify(selection), 200
+
         return jsonify({"schedule": schedule}), 200
 
     except Exception as e:
         print(f"Error generating schedule: {str(e)}")
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+MAX_SOLVER_TIME_LIMIT = 10.0  # seconds
+
+def parse_solver_request(data, default_time_limit):
+    """
+    Validate the body shared by /api/schedule/stream and /api/schedule/what-if.
+
+    Returns (courses, preference, constraints, time_limit, None) or, when the
+    request is invalid, four Nones and a (response, status) tuple.
+    """
+    def fail(message, status=400, details=None):
+        body = {"error": message}
+        if details:
+            body["details"] = details
+        return None, None, None, None, (jsonify(body), status)
+
+    if not data:
+        return fail("No data provided")
+    if not isinstance(data.get("courses"), list) or not data["courses"]:
+        return fail("Courses must be a non-empty array")
+
+    preference = data.get("preference", "crammed")
+    if preference not in ["crammed", "spaced"]:
+        return fail("Invalid preference value")
+
+    time_limit = data.get("time_limit", default_time_limit)
+    if not isinstance(time_limit, (int, float)) or time_limit <= 0:
+        return fail("time_limit must be a positive number")
+    time_limit = min(time_limit, MAX_SOLVER_TIME_LIMIT)
+
+    constraints = data.get("constraints", [])
+    if not isinstance(constraints, list):
+        try:
+            constraints = parse_course_text(constraints).get("constraints", [])
+        except Exception as e:
+            return fail(f"Constraint parsing failed: {str(e)}", 500)
+
+    try:
+        courses, course_error = build_courses(data["courses"])
+    except Exception as e:
+        return fail("Invalid course data", details=str(e))
+    if course_error:
+        return fail(course_error)
+
+    return courses, preference, constraints, time_limit, None
+
+def sse_event(event, payload):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route("/api/schedule/stream", methods=["POST"])
+def api_schedule_stream():
+    """
+    Streaming variant of /api/schedule.
+
+    Answers with a text/event-stream: an "improvement" event every time the
+    solver finds a better schedule (with its score and progress counters) and
+    a final "done" event holding the best schedule and whether it is optimal.
+    """
+    courses, preference, constraints, time_limit, error = parse_solver_request(
+        request.json, DEFAULT_STREAM_TIME_LIMIT)
+    if error:
+        return error
+
+    def generate():
+        try:
+            for event, payload in improving_schedules(courses, preference, constraints, time_limit):
+                yield sse_event(event, payload)
+        except Exception as e:
+            print(f"Error streaming schedule: {str(e)}")
+            yield sse_event("error", {"error": "Internal server error", "details": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/api/schedule/what-if", methods=["POST"])
+def api_schedule_what_if():
+    """
+    Sensitivity analysis for a /api/schedule request.
+
+    Reports the best schedule with every single constraint removed and with
+    every single course removed, flagging the removals that make the request
+    feasible or improve on the baseline score.
+    """
+    courses, preference, constraints, time_limit, error = parse_solver_request(
+        request.json, DEFAULT_WHAT_IF_TIME_LIMIT)
+    if error:
+        return error
+
+    try:
+        return jsonify(what_if(courses, preference, constraints, time_limit)), 200
+    except Exception as e:
+        print(f"Error running what-if analysis: {str(e)}")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
 # Add a test endpoint to check authentication
 @app.route("/api/test-session", methods=["GET"])
 @token_required
@@ -400,12 +697,94 @@ def test_session():
 
 @app.route("/api/health", methods=["GET"])
 def health():
+    """Liveness: the process answers. Model readiness is reported but never blocks."""
     return jsonify({
         "status": "ok",
-        "ai_model_loaded": schedule_parser is not None,
+        "ready": ai_models_ready(),
+        "ai_model_loaded": ai_model_loader.is_ready(),
+        "models": {
+            ai_model_loader.name: ai_model_loader.snapshot(),
+            constraint_parser_loader.name: constraint_parser_loader.snapshot()
+        },
+        "pipelines": pipelines.stats(),
+        "catalog": catalog_store.stats(),
+        "vocab_guard": vocab_guard.stats(),
+        "parse_batching": parse_batcher.stats() if PARSE_MICROBATCH else None,
+        "fast_path": fast_path.stats(),
+        "parse_cache": {
+            ner_cache.name: ner_cache.stats(),
+            course_text_cache.name: course_text_cache.stats()
+        },
         "time": time.time()
     }), 200
 
+def process_memory():
+    """
+    Memory of this process in kB. On Linux, split into pages shared with other
+    processes (e.g. inherited from a preloading gunicorn master) and private
+    ones, from /proc/self/smaps_rollup; elsewhere only the peak RSS is known.
+    """
+    try:
+        fields = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return {"rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pss_kb": None,
+                "shared_kb": None, "private_kb": None, "swap_kb": None}
+    return {
+        "rss_kb": fields.get("Rss"),
+        # Proportional share: shared pages are split among the processes mapping them
+        "pss_kb": fields.get("Pss"),
+        "shared_kb": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "swap_kb": fields.get("Swap")
+    }
+
+@app.route("/api/health/memory", methods=["GET"])
+def memory_diagnostics():
+    """Shared vs private memory of the worker that answers; call repeatedly to see each worker."""
+    return jsonify({
+        "pid": os.getpid(),
+        "parent_pid": os.getppid(),
+        "preloaded": LOADING_MODE == "preload",
+        "gc_frozen_objects": gc.get_freeze_count(),
+        "memory": process_memory()
+    }), 200
+
+@app.route("/api/health/ready", methods=["GET"])
+def readiness():
+    """Readiness probe: 503 until the models are loaded; also kicks off lazy loading."""
+    ai_model_loader.start()
+    constraint_parser_loader.start()
+    ready = ai_models_ready()
+    return jsonify({
+        "ready": ready,
+        "models": {
+            ai_model_loader.name: ai_model_loader.status,
+            constraint_parser_loader.name: constraint_parser_loader.status
+        }
+    }), 200 if ready else 503
+
+
+def preload_for_fork():
+    """
+    AI_MODEL_LOADING=preload: the gunicorn master has already loaded the
+    models (warm_up), so load the course catalog store and the autocomplete
+    entries built from it too, then freeze the heap.
+    Frozen objects are never visited by the garbage collector, so workers do
+    not write to (and thereby copy) the pages they inherited from the master.
+    """
+    catalog_store.get()
+    load_autocomplete_cache()
+    gc.collect()
+    gc.freeze()
+    print(f"✅ Preloaded models and catalog, froze {gc.get_freeze_count()} objects before forking")
+
+if LOADING_MODE == "preload":
+    preload_for_fork()
 
 # if __name__ == "__main__":
 #     # אפשר לדלג על מודל (לבדיקה ראשונית):
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings; gunicorn reads this file from the working directory.
+
+APP_PRELOAD=1 imports the app once in the master, which loads both spaCy
+pipelines and the course catalog (AI_MODEL_LOADING=preload) before the
+workers are forked, so the workers share those pages instead of each loading
+its own copy. /api/health/memory shows the shared and private memory of the
+worker that answers.
+"""
+
+import gc
+import os
+
+preload_app = os.environ.get("APP_PRELOAD", "0") == "1"
+if preload_app:
+    # Read by ai_model.loader when the master imports the app
+    os.environ.setdefault("AI_MODEL_LOADING", "preload")
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # The app froze its heap after loading; also freeze what the master allocated since
+        gc.freeze()
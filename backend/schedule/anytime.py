@@ -0,0 +1,170 @@
+"""
+Anytime schedule search for streaming responses.
+
+generate_schedule only returns once the search is over, which for large
+requests means the user stares at a spinner. This search yields every time it
+finds a schedule better than the previous one, so the caller can show a first
+answer almost immediately and refine it while the search keeps running.
+
+The first candidate comes from very short LNS runs. After that a
+branch-and-bound walk over the compiled options improves on it, pruning partial schedules that can no longer beat the best one
+(days already used, plus gap hours that no remaining course could fill). When
+the walk finishes before the deadline the last schedule is optimal.
+"""
+
+import time
+
+from .compiled import compile_problem, hours_mask, popcount, preference_cost, preference_key, span_mask
+from .heuristic import count_clashes, lns_search
+
+DEFAULT_TIME_LIMIT = 2.0  # seconds
+SEED_TIME_LIMIT = 0.05  # seconds per LNS run looking for the first answer
+SEED_ATTEMPTS = 10
+SEED_BUDGET = 0.25  # share of the time limit those runs may use
+
+
+def improving_schedules(courses, preference="crammed", constraints=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Yield ("improvement", payload) for each better schedule, then ("done", payload).
+
+    Improvement payloads hold the rendered "schedule", its "score" (days used
+    and gap hours, plus the scalar preference cost, lower is better) and
+    "progress" counters. The done payload repeats the best schedule (None when
+    there is none) with "optimal" telling whether the search covered the whole
+    space before the deadline.
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit
+    problem = compile_problem(courses, constraints)
+    domains = problem.domains()
+    stats = {"nodes": 0, "improvements": 0, "complete": True}
+
+    def progress():
+        return {
+            "nodes": stats["nodes"],
+            "improvements": stats["improvements"],
+            "elapsed_ms": int((time.perf_counter() - start) * 1000)
+        }
+
+    def score(assignment):
+        days, gaps, _, _ = problem.metrics(assignment)
+        return {"days_used": days, "gaps": gaps, "cost": preference_cost(days, gaps, preference)}
+
+    best = []  # [key, assignment]
+
+    def offer(assignment):
+        key = preference_key(problem.assignment_slots(assignment), preference)
+        if best and key >= best[0]:
+            return None
+        best[:] = [key, list(assignment)]
+        stats["improvements"] += 1
+        return ("improvement", {
+            "schedule": problem.to_schedule(assignment),
+            "score": score(assignment),
+            "progress": progress()
+        })
+
+    if any(not d for d in domains):
+        yield ("done", {"schedule": None, "score": None, "optimal": True, "progress": progress()})
+        return
+
+    # Quick first answer: short LNS runs with fresh seeds until one is clash-free
+    seed_deadline = start + time_limit * SEED_BUDGET
+    for rng_seed in range(SEED_ATTEMPTS):
+        seed, _ = lns_search(problem, preference, seed=rng_seed,
+                             time_limit=min(SEED_TIME_LIMIT, time_limit), domains=domains)
+        if not count_clashes(problem, seed):
+            yield offer(seed)
+            break
+        if time.perf_counter() >= seed_deadline:
+            break
+
+    for assignment in branch_and_bound(problem, preference, domains, deadline, best[0] if best else None, stats):
+        yield offer(assignment)
+
+    yield ("done", {
+        "schedule": problem.to_schedule(best[1]) if best else None,
+        "score": score(best[1]) if best else None,
+        "optimal": stats["complete"],
+        "progress": progress()
+    })
+
+
+def branch_and_bound(problem, preference="crammed", domains=None, deadline=None, incumbent=None, stats=None):
+    """
+    Yield successively better complete assignments of a compiled problem.
+
+    A domain may be [None] to leave a course out. `incumbent` is the
+    preference_key an assignment has to beat, if one is already known. When
+    given, `stats` gets a running "nodes" count and "complete", which is False
+    if the deadline stopped the walk (otherwise the last assignment yielded,
+    or the incumbent, is optimal).
+    """
+    domains = problem.domains() if domains is None else domains
+    stats = {} if stats is None else stats
+    stats.setdefault("nodes", 0)
+    stats["complete"] = True
+    n = len(problem)
+    if any(not d for d in domains):
+        return
+
+    order = sorted(range(n), key=lambda i: (len(domains[i]), i))
+    option_masks = {
+        (i, a): [(slot[0], hours_mask(slot[1], slot[2])) for slot in problem.slots[i][a]] if a is not None else []
+        for i in range(n) for a in domains[i]
+    }
+    # reach[depth][day]: every hour the courses at or after `depth` could still occupy
+    reach = [{} for _ in range(n + 1)]
+    for depth in range(n - 1, -1, -1):
+        reach[depth] = dict(reach[depth + 1])
+        i = order[depth]
+        for a in domains[i]:
+            for day, mask in option_masks[i, a]:
+                reach[depth][day] = reach[depth].get(day, 0) | mask
+
+    assignment = [None] * n
+    occupied = {}
+    best = [incumbent]
+
+    def bound_allows(depth):
+        if best[0] is None:
+            return True
+        if preference == "spaced":
+            reachable_days = len(set(occupied) | set(reach[depth]))
+            return -reachable_days <= best[0][0]
+        fillable = reach[depth]
+        final_gaps = sum(
+            popcount(span_mask(occ) & ~occ & ~fillable.get(day, 0)) for day, occ in occupied.items()
+        )
+        return (len(occupied), final_gaps) < best[0]
+
+    def visit(depth):
+        stats["nodes"] += 1
+        if deadline is not None and stats["nodes"] % 256 == 0 and time.perf_counter() >= deadline:
+            stats["complete"] = False
+        if not stats["complete"] or not bound_allows(depth):
+            return
+        if depth == n:
+            key = preference_key(problem.assignment_slots(assignment), preference)
+            if best[0] is None or key < best[0]:
+                best[0] = key
+                yield list(assignment)
+            return
+
+        i = order[depth]
+        for a in domains[i]:
+            if a is not None and not problem.is_consistent(assignment, i, a):
+                continue
+            assignment[i] = a
+            for day, mask in option_masks[i, a]:
+                occupied[day] = occupied.get(day, 0) | mask
+            yield from visit(depth + 1)
+            for day, mask in option_masks[i, a]:
+                occupied[day] ^= mask
+                if not occupied[day]:
+                    del occupied[day]
+            assignment[i] = None
+            if not stats["complete"]:
+                return
+
+    yield from visit(0)
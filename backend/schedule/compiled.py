@@ -0,0 +1,176 @@
+"""
+Compiled form of a scheduling request shared by the search engines.
+
+Every course is expanded once into its (lecture, ta) options. For each option
+we record which constraints it violates (as a bitmask over the constraint
+list) and, for every other course, which of that course's options it clashes
+with (as a bitmask over the other course's options). The engines then only
+do integer lookups in their inner loops instead of re-checking time slots.
+"""
+
+from itertools import product
+from .utils import time_conflict
+
+# Weight of one day used relative to one hour of gap when a preference has
+# to be collapsed into a single number. A week never has 1000 gap hours.
+DAY_WEIGHT = 1000
+
+
+def slot_violates(slot, constraint):
+    """Return True if a single (day, start, end) slot breaks the constraint."""
+    constraint_type = constraint.get("type", "")
+    if constraint_type == "No Class Day":
+        return slot[0] == constraint.get("day")
+    if constraint_type == "No Class Before":
+        return slot[1] < constraint.get("time", 9)
+    if constraint_type == "No Class After":
+        return slot[2] > constraint.get("time", 17)
+    return False
+
+
+def option_violates(lecture, ta, constraint):
+    """Return True if a (lecture, ta) option breaks the constraint."""
+    if constraint.get("type", "") == "Avoid Ta":
+        ta_name = constraint.get("name", "").strip()
+        return ta is not None and ta_name.lower() in str(ta).lower()
+    return any(slot is not None and slot_violates(slot, constraint) for slot in (lecture, ta))
+
+
+def day_gaps(day_slots):
+    """Gap hours between consecutive slots of a single day."""
+    gaps = 0
+    prev_end = None
+    for _, start, end in sorted(day_slots, key=lambda s: s[1]):
+        if prev_end is not None and start > prev_end:
+            gaps += start - prev_end
+        prev_end = end
+    return gaps
+
+
+def hours_mask(start, end):
+    """Bitmask of the hours a slot occupies; gap maths on a day becomes bit operations."""
+    return (1 << end) - (1 << start)
+
+
+def span_mask(mask):
+    """Every hour between the first and last occupied hour of a day."""
+    return (1 << mask.bit_length()) - (mask & -mask)
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def schedule_metrics(time_slots):
+    """
+    Objective values of a set of slots:
+    (days used, gap hours, earliest start, latest end).
+    """
+    by_day = {}
+    for slot in time_slots:
+        by_day.setdefault(slot[0], []).append(slot)
+    gaps = sum(day_gaps(slots) for slots in by_day.values())
+    earliest = min((slot[1] for slot in time_slots), default=0)
+    latest = max((slot[2] for slot in time_slots), default=0)
+    return len(by_day), gaps, earliest, latest
+
+
+def preference_key(time_slots, preference):
+    """Sort key used to rank complete schedules (lower is better)."""
+    days, gaps, _, _ = schedule_metrics(time_slots)
+    if preference == "spaced":
+        return (-days, -gaps)
+    return (days, gaps)
+
+
+def preference_cost(days, gaps, preference):
+    """Scalar version of preference_key for engines that need a number."""
+    cost = days * DAY_WEIGHT + gaps
+    return -cost if preference == "spaced" else cost
+
+
+def format_slot(slot):
+    return f"{slot[0]} {slot[1]}-{slot[2]}" if slot is not None else None
+
+
+class CompiledProblem:
+    """
+    Options, constraint violations and clash tables for a list of courses.
+
+    Courses use the same shape as generate_schedule: a dict with "name",
+    "lectures" and "ta_times", the latter two being lists of (day, start, end)
+    tuples. Options whose own lecture and TA clash are dropped at compile time
+    since no schedule can ever use them.
+    """
+
+    def __init__(self, courses, constraints=None):
+        self.courses = courses
+        self.constraints = list(constraints or [])
+        self.full_mask = (1 << len(self.constraints)) - 1
+
+        self.options = []
+        self.slots = []
+        self.violations = []
+        for course in courses:
+            options = []
+            for lecture, ta in product(course["lectures"] or [None], course["ta_times"] or [None]):
+                if lecture is not None and ta is not None and time_conflict(lecture, ta):
+                    continue
+                options.append((lecture, ta))
+            self.options.append(options)
+            self.slots.append([tuple(s for s in option if s is not None) for option in options])
+            self.violations.append([
+                sum(1 << k for k, c in enumerate(self.constraints) if option_violates(lecture, ta, c))
+                for lecture, ta in options
+            ])
+
+        # clashes[i][a][j] -> bitmask of options of course j clashing with option a of course i
+        n = len(courses)
+        self.clashes = [[[0] * n for _ in options] for options in self.options]
+        for i in range(n):
+            for j in range(i + 1, n):
+                for a, slots_a in enumerate(self.slots[i]):
+                    for b, slots_b in enumerate(self.slots[j]):
+                        if any(time_conflict(x, y) for x in slots_a for y in slots_b):
+                            self.clashes[i][a][j] |= 1 << b
+                            self.clashes[j][b][i] |= 1 << a
+
+    def __len__(self):
+        return len(self.courses)
+
+    def domain(self, i, active_mask=None):
+        """Indices of course i's options that satisfy the active constraints."""
+        mask = self.full_mask if active_mask is None else active_mask
+        return [a for a, v in enumerate(self.violations[i]) if not v & mask]
+
+    def domains(self, active_mask=None):
+        return [self.domain(i, active_mask) for i in range(len(self.courses))]
+
+    def clash(self, i, a, j, b):
+        return bool(self.clashes[i][a][j] >> b & 1)
+
+    def is_consistent(self, assignment, i, a):
+        """True if option a of course i clashes with nothing assigned so far."""
+        row = self.clashes[i][a]
+        return not any(b is not None and row[j] >> b & 1 for j, b in enumerate(assignment) if j != i)
+
+    def assignment_slots(self, assignment):
+        return [slot for i, a in enumerate(assignment) if a is not None for slot in self.slots[i][a]]
+
+    def metrics(self, assignment):
+        return schedule_metrics(self.assignment_slots(assignment))
+
+    def to_schedule(self, assignment):
+        """Render an assignment in the /api/schedule response format, skipping unassigned courses."""
+        return [
+            {
+                "name": self.courses[i]["name"],
+                "lecture": format_slot(self.options[i][a][0]),
+                "ta": format_slot(self.options[i][a][1])
+            }
+            for i, a in enumerate(assignment) if a is not None
+        ]
+
+
+def compile_problem(courses, constraints=None):
+    return CompiledProblem(courses, constraints)
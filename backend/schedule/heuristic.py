@@ -0,0 +1,223 @@
+"""
+Large-neighborhood-search engine for requests with many courses.
+
+The exhaustive search in logic.py walks the full cartesian product of every
+course's options, which stops being usable somewhere around a dozen courses.
+This engine builds a schedule greedily, then repeatedly frees a few courses
+and re-optimizes just those against the rest of the (fixed) timetable. Moves
+that make things worse are accepted with a simulated-annealing probability so
+the search can leave local optima. The best schedule seen is returned.
+
+Runs are deterministic for a given seed as long as the iteration cap is hit
+before the time limit.
+"""
+
+import math
+import random
+import time
+
+from .compiled import DAY_WEIGHT, compile_problem, day_gaps, preference_cost
+
+# Penalty of one clashing pair; dominates any difference in days or gaps
+CLASH_PENALTY = 10 ** 6
+
+DEFAULT_TIME_LIMIT = 0.8  # seconds
+DEFAULT_MAX_ITERATIONS = 3000
+STALL_LIMIT = 600  # stop after this many iterations without a new best
+NEIGHBORHOOD_SIZE = 4
+NEIGHBORHOOD_LIMIT = 256  # max combinations tried when repairing a neighborhood
+INITIAL_TEMPERATURE = DAY_WEIGHT / 2
+
+
+def count_clashes(problem, assignment, courses=None):
+    """Clashing pairs in a full assignment, or only the pairs touching `courses`."""
+    n = len(assignment)
+    if courses is None:
+        return sum(
+            1 for i in range(n) for j in range(i + 1, n)
+            if problem.clashes[i][assignment[i]][j] >> assignment[j] & 1
+        )
+    return sum(
+        1 for i in courses for j in range(n)
+        if j != i and problem.clashes[i][assignment[i]][j] >> assignment[j] & 1
+    )
+
+
+def _cost(problem, assignment, preference):
+    by_day = {}
+    for i, a in enumerate(assignment):
+        for slot in problem.slots[i][a]:
+            by_day.setdefault(slot[0], []).append(slot)
+    gaps = sum(day_gaps(slots) for slots in by_day.values())
+    return (count_clashes(problem, assignment) * CLASH_PENALTY
+            + preference_cost(len(by_day), gaps, preference))
+
+
+def _greedy(problem, domains, preference):
+    """Most-constrained-first construction picking the cheapest option for each course."""
+    n = len(problem)
+    assignment = [None] * n
+    by_day = {}
+    for i in sorted(range(n), key=lambda k: (len(domains[k]), k)):
+        best = None
+        for a in domains[i]:
+            clashes = sum(
+                1 for j, b in enumerate(assignment)
+                if b is not None and problem.clashes[i][a][j] >> b & 1
+            )
+            touched = {}
+            for slot in problem.slots[i][a]:
+                touched.setdefault(slot[0], []).append(slot)
+            new_days = sum(1 for day in touched if day not in by_day)
+            gap_delta = sum(
+                day_gaps(by_day.get(day, []) + added) - day_gaps(by_day.get(day, []))
+                for day, added in touched.items()
+            )
+            score = (clashes, preference_cost(new_days, gap_delta, preference))
+            if best is None or score < best[0]:
+                best = (score, a)
+        assignment[i] = best[1]
+        for slot in problem.slots[i][best[1]]:
+            by_day.setdefault(slot[0], []).append(slot)
+    return assignment
+
+
+def _repair(problem, assignment, freed, domains, preference, rng):
+    """
+    Re-optimize the freed courses with everything else fixed.
+
+    Depth-first over the freed courses' options (in a random order, so repeated
+    repairs of the same neighborhood explore different parts of it), pruning
+    branches that already clash more than the best leaf found, and stopping
+    after NEIGHBORHOOD_LIMIT leaves. The current assignment is excluded so the
+    caller always gets a move. Returns (cost, assignment) or None.
+    """
+    freed_set = set(freed)
+    fixed_courses = [i for i in range(len(assignment)) if i not in freed_set]
+    fixed_by_day = {}
+    for i in fixed_courses:
+        for slot in problem.slots[i][assignment[i]]:
+            fixed_by_day.setdefault(slot[0], []).append(slot)
+    fixed_gaps = {day: day_gaps(slots) for day, slots in fixed_by_day.items()}
+    fixed_gap_total = sum(fixed_gaps.values())
+    fixed_clashes = sum(
+        1 for x, i in enumerate(fixed_courses) for j in fixed_courses[x + 1:]
+        if problem.clashes[i][assignment[i]][j] >> assignment[j] & 1
+    )
+
+    # Per freed option: clashes with the fixed courses
+    fixed_hits = {}
+    for i in freed:
+        for a in domains[i]:
+            row = problem.clashes[i][a]
+            fixed_hits[i, a] = sum(1 for j in fixed_courses if row[j] >> assignment[j] & 1)
+
+    orders = [rng.sample(domains[i], len(domains[i])) for i in freed]
+    current = [assignment[i] for i in freed]
+    combo = [None] * len(freed)
+    best = []  # [(clashes, preference cost), combo]
+    leaves = [0]
+
+    def leaf(clashes):
+        leaves[0] += 1
+        if combo == current:
+            return
+        touched = {}
+        for i, a in zip(freed, combo):
+            for slot in problem.slots[i][a]:
+                touched.setdefault(slot[0], []).append(slot)
+        days = len(fixed_by_day) + sum(1 for day in touched if day not in fixed_by_day)
+        gaps = fixed_gap_total + sum(
+            day_gaps(fixed_by_day.get(day, []) + added) - fixed_gaps.get(day, 0)
+            for day, added in touched.items()
+        )
+        score = (clashes, preference_cost(days, gaps, preference))
+        if not best or score < best[0]:
+            best[:] = [score, list(combo)]
+
+    def visit(x, clashes):
+        if x == len(freed):
+            leaf(clashes)
+            return
+        i = freed[x]
+        for a in orders[x]:
+            if leaves[0] >= NEIGHBORHOOD_LIMIT:
+                return
+            row = problem.clashes[i][a]
+            c = clashes + fixed_hits[i, a] + sum(
+                1 for y in range(x) if row[freed[y]] >> combo[y] & 1
+            )
+            if best and c > best[0][0]:
+                continue
+            combo[x] = a
+            visit(x + 1, c)
+
+    visit(0, fixed_clashes)
+    if not best:
+        return None
+    (clashes, pref_cost), chosen = best
+    candidate = list(assignment)
+    for i, a in zip(freed, chosen):
+        candidate[i] = a
+    return clashes * CLASH_PENALTY + pref_cost, candidate
+
+
+def lns_search(problem, preference="crammed", seed=0, time_limit=DEFAULT_TIME_LIMIT,
+               max_iterations=DEFAULT_MAX_ITERATIONS, neighborhood_size=NEIGHBORHOOD_SIZE,
+               domains=None):
+    """
+    Run the LNS / simulated-annealing search on a compiled problem.
+
+    Returns (assignment, cost) for the best assignment found, where cost counts
+    clashing pairs times CLASH_PENALTY plus the preference cost, or (None, None)
+    when some course has no option satisfying the constraints.
+    """
+    deadline = time.perf_counter() + time_limit
+    rng = random.Random(seed)
+    domains = problem.domains() if domains is None else domains
+    if any(not d for d in domains):
+        return None, None
+
+    current = _greedy(problem, domains, preference)
+    current_cost = _cost(problem, current, preference)
+    best, best_cost = list(current), current_cost
+
+    movable = [i for i in range(len(problem)) if len(domains[i]) > 1]
+    if not movable:
+        return best, best_cost
+    k = min(neighborhood_size, len(movable))
+
+    last_improvement = 0
+    for iteration in range(max_iterations):
+        if time.perf_counter() >= deadline or iteration - last_improvement > STALL_LIMIT:
+            break
+
+        # Free a clashing course when there is one, fill up with random others
+        clashing = [i for i in movable if count_clashes(problem, current, [i])]
+        freed = [rng.choice(clashing)] if clashing else []
+        freed += rng.sample([i for i in movable if i not in freed], k - len(freed))
+
+        repaired = _repair(problem, current, freed, domains, preference, rng)
+        if repaired is None:
+            continue
+        candidate_cost, candidate = repaired
+
+        delta = candidate_cost - current_cost
+        temperature = INITIAL_TEMPERATURE * (1 - iteration / max_iterations)
+        if delta <= 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+            current, current_cost = candidate, candidate_cost
+            if current_cost < best_cost:
+                best, best_cost = list(current), current_cost
+                last_improvement = iteration
+
+    return best, best_cost
+
+
+def heuristic_schedule(courses, preference="crammed", constraints=None, seed=0,
+                       time_limit=DEFAULT_TIME_LIMIT):
+    """generate_schedule counterpart for large requests; same input and output format."""
+    problem = compile_problem(courses, constraints)
+    assignment, _ = lns_search(problem, preference, seed=seed, time_limit=time_limit)
+    if assignment is None or count_clashes(problem, assignment):
+        return None
+    return problem.to_schedule(assignment)
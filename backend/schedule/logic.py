@@ -1,7 +1,15 @@
 from itertools import product
 from .utils import time_conflict, count_days_used, count_hour_gaps
+from .heuristic import heuristic_schedule
+
+# From this many courses on the exhaustive product below is hopeless and the
+# large-neighborhood-search engine is used instead
+HEURISTIC_MIN_COURSES = 15
 
 def generate_schedule(courses, preference="crammed", constraints=None):
+    if len(courses) >= HEURISTIC_MIN_COURSES:
+        return heuristic_schedule(courses, preference, constraints)
+
     # If lectures or ta_times is empty, use [None] as a placeholder
     all_combos = [
         product(
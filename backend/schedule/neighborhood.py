@@ -0,0 +1,124 @@
+"""
+Local re-optimization around an existing schedule.
+
+When a section is cancelled or a constraint is added to a saved schedule, a
+full re-solve can return a completely different timetable. This search keeps
+the saved choice for most courses and only explores schedules that change at
+most `max_changes` of them, returning the closest valid alternatives first.
+
+Courses whose saved option is gone or now breaks a constraint must change and
+are part of every neighborhood. For each other subset of courses allowed to
+change, an option is only worth trying if everything it clashes with in the
+saved schedule is inside that subset, which the clash tables answer directly.
+"""
+
+import heapq
+from itertools import combinations
+
+from .compiled import compile_problem, format_slot, preference_key
+
+DEFAULT_MAX_CHANGES = 2
+DEFAULT_LIMIT = 5
+
+
+def current_assignment(problem, saved_schedule):
+    """
+    Map a saved schedule ([{"name", "lecture", "ta"}, ...]) onto option indices.
+
+    Courses that are missing from the saved schedule, or whose saved option no
+    longer exists, get None.
+    """
+    saved = {entry.get("name"): (entry.get("lecture"), entry.get("ta")) for entry in saved_schedule}
+    assignment = []
+    for i, course in enumerate(problem.courses):
+        wanted = saved.get(course["name"])
+        match = None
+        for a, (lecture, ta) in enumerate(problem.options[i]):
+            if wanted is not None and (format_slot(lecture), format_slot(ta)) == tuple(wanted):
+                match = a
+                break
+        assignment.append(match)
+    return assignment
+
+
+def neighborhood_search(problem, current, preference="crammed", max_changes=DEFAULT_MAX_CHANGES,
+                        limit=DEFAULT_LIMIT):
+    """
+    Valid assignments differing from `current` in at most max_changes courses.
+
+    Returns up to `limit` (changed course indices, assignment) pairs ordered by
+    number of changes, then by the preference.
+    """
+    n = len(problem)
+    domains = [set(d) for d in problem.domains()]
+    forced = [i for i in range(n) if current[i] not in domains[i]]
+    if len(forced) > max_changes:
+        return []
+
+    stable = [current[i] if i not in forced else None for i in range(n)]
+    # blockers[i][a]: bitmask of courses whose saved option clashes with option a of course i
+    blockers = [
+        {
+            a: sum(1 << j for j in range(n) if stable[j] is not None and j != i and problem.clash(i, a, j, stable[j]))
+            for a in domains[i]
+        }
+        for i in range(n)
+    ]
+    free = [i for i in range(n) if i not in forced and len(domains[i]) > 1]
+
+    results = []
+    for extra in range(max_changes - len(forced) + 1):
+        for subset in combinations(free, extra):
+            changed = sorted(forced + list(subset))
+            changed_mask = sum(1 << i for i in changed)
+            candidates = [
+                [a for a in domains[i] if a != current[i] and not blockers[i][a] & ~changed_mask]
+                for i in changed
+            ]
+            if any(not c for c in candidates):
+                continue
+            assignment = list(stable)
+            for i in changed:
+                assignment[i] = None
+            _extend(problem, assignment, changed, candidates, 0, results, preference)
+            if len(results) > 4 * limit:
+                results = heapq.nsmallest(limit, results, key=lambda r: r[0])
+        if len(results) >= limit:
+            # Every later pass changes more courses, so it cannot rank higher
+            break
+
+    best = heapq.nsmallest(limit, results, key=lambda r: r[0])
+    return [(changed, assignment) for _, changed, assignment in best]
+
+
+def _extend(problem, assignment, changed, candidates, depth, results, preference):
+    if depth == len(changed):
+        key = (len(changed), preference_key(problem.assignment_slots(assignment), preference))
+        results.append((key, list(changed), list(assignment)))
+        return
+    i = changed[depth]
+    for a in candidates[depth]:
+        if problem.is_consistent(assignment, i, a):
+            assignment[i] = a
+            _extend(problem, assignment, changed, candidates, depth + 1, results, preference)
+            assignment[i] = None
+
+
+def reoptimize_schedule(courses, saved_schedule, preference="crammed", constraints=None,
+                        max_changes=DEFAULT_MAX_CHANGES, limit=DEFAULT_LIMIT):
+    """
+    Closest valid schedules to a saved one under new constraints or course options.
+
+    Returns a list of {"schedule", "changes", "changed_courses"} entries,
+    best first; empty when nothing within max_changes works.
+    """
+    problem = compile_problem(courses, constraints)
+    current = current_assignment(problem, saved_schedule)
+    return [
+        {
+            "schedule": problem.to_schedule(assignment),
+            "changes": len(changed),
+            "changed_courses": [courses[i]["name"] for i in changed]
+        }
+        for changed, assignment in neighborhood_search(problem, current, preference, max_changes, limit)
+    ]
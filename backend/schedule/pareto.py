@@ -0,0 +1,193 @@
+"""
+Pareto-front search over several schedule objectives at once.
+
+Instead of collapsing the tradeoffs into the crammed/spaced ordering, this
+returns every non-dominated schedule over four objectives: days used, gap
+hours, earliest start (later is better) and latest end (earlier is better).
+
+The search is a depth-first walk of the compiled options that keeps a bounded
+archive of non-dominated schedules. Days used, earliest start and latest end
+can only get worse as courses are added, so a partial schedule whose
+objectives are already matched or beaten by an archived schedule is pruned.
+When the archive is full, the most crowded entry is evicted so the returned
+front stays spread out. The archive is seeded with a short LNS run so pruning
+is effective from the first nodes on.
+"""
+
+import time
+
+from .compiled import compile_problem, hours_mask, popcount, span_mask
+from .heuristic import count_clashes, lns_search
+
+DEFAULT_ARCHIVE_SIZE = 12
+DEFAULT_TIME_LIMIT = 2.0  # seconds
+SEED_TIME_LIMIT = 0.2  # seconds of LNS used to seed the archive
+SEED_MIN_SPACE = 10 ** 8  # smaller search spaces are not worth seeding
+
+OBJECTIVES = ("days_used", "gaps", "earliest_start", "latest_end")
+
+
+def weakly_dominates(u, v):
+    return all(a <= b for a, b in zip(u, v))
+
+
+def dominates(u, v):
+    return u != v and weakly_dominates(u, v)
+
+
+class ParetoArchive:
+    """Bounded set of mutually non-dominated (vector, payload) entries; vectors are minimized."""
+
+    def __init__(self, max_size=DEFAULT_ARCHIVE_SIZE):
+        self.max_size = max_size
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def covers(self, vector):
+        """True if some archived vector is at least as good as `vector` everywhere."""
+        return any(weakly_dominates(v, vector) for v, _ in self.entries)
+
+    def add(self, vector, payload):
+        """Insert if non-dominated; returns True when the archive changed."""
+        if self.covers(vector):
+            return False
+        self.entries = [(v, p) for v, p in self.entries if not dominates(vector, v)]
+        self.entries.append((vector, payload))
+        if len(self.entries) > self.max_size:
+            self._evict()
+        return True
+
+    def _evict(self):
+        """Drop the entry with the smallest crowding distance; extremes are always kept."""
+        n = len(self.entries)
+        distance = [0.0] * n
+        for k in range(len(self.entries[0][0])):
+            order = sorted(range(n), key=lambda i: self.entries[i][0][k])
+            low, high = self.entries[order[0]][0][k], self.entries[order[-1]][0][k]
+            distance[order[0]] = distance[order[-1]] = float("inf")
+            if high == low:
+                continue
+            for x in range(1, n - 1):
+                gap = self.entries[order[x + 1]][0][k] - self.entries[order[x - 1]][0][k]
+                distance[order[x]] += gap / (high - low)
+        del self.entries[min(range(n), key=lambda i: distance[i])]
+
+
+def objective_vector(days, gaps, earliest, latest):
+    return (days, gaps, -earliest, latest)
+
+
+def pareto_search(problem, max_size=DEFAULT_ARCHIVE_SIZE, time_limit=DEFAULT_TIME_LIMIT, domains=None):
+    """
+    Fill a ParetoArchive with assignments of a compiled problem.
+
+    Returns (archive, complete) where complete is False if the time limit
+    stopped the search before the whole space was covered.
+    """
+    deadline = time.perf_counter() + time_limit
+    domains = problem.domains() if domains is None else domains
+    archive = ParetoArchive(max_size)
+    if any(not d for d in domains):
+        return archive, True
+
+    n = len(problem)
+    space = 1
+    for d in domains:
+        space *= len(d)
+    if space > SEED_MIN_SPACE:
+        seed, _ = lns_search(problem, "crammed", time_limit=min(SEED_TIME_LIMIT, time_limit / 4), domains=domains)
+        if not count_clashes(problem, seed):
+            days, gaps, earliest, latest = problem.metrics(seed)
+            archive.add(objective_vector(days, gaps, earliest, latest), seed)
+
+    order = sorted(range(n), key=lambda i: (len(domains[i]), i))
+    # Try compact options first so good schedules show up early
+    option_order = {
+        i: sorted(domains[i], key=lambda a: (len({s[0] for s in problem.slots[i][a]}),
+                                             max((s[2] for s in problem.slots[i][a]), default=0)))
+        for i in range(n)
+    }
+    # Slots as per-day hour bitmasks. reach[depth][day] holds every hour some
+    # course at or after `depth` could still occupy; gap hours outside it can
+    # never be filled, which gives a lower bound on the final gaps.
+    option_masks = {
+        (i, a): [(slot[0], hours_mask(slot[1], slot[2])) for slot in problem.slots[i][a]]
+        for i in range(n) for a in domains[i]
+    }
+    reach = [{} for _ in range(n + 1)]
+    for depth in range(n - 1, -1, -1):
+        reach[depth] = dict(reach[depth + 1])
+        i = order[depth]
+        for a in domains[i]:
+            for day, mask in option_masks[i, a]:
+                reach[depth][day] = reach[depth].get(day, 0) | mask
+
+    assignment = [None] * n
+    occupied = {}
+    nodes = [0]
+    timed_out = [False]
+
+    def visit(depth, earliest, latest):
+        nodes[0] += 1
+        if nodes[0] % 256 == 0 and time.perf_counter() >= deadline:
+            timed_out[0] = True
+        if timed_out[0]:
+            return
+        if depth == n:
+            gaps = sum(popcount(span_mask(occ) & ~occ) for occ in occupied.values())
+            if not occupied:
+                earliest = latest = 0
+            archive.add(objective_vector(len(occupied), gaps, earliest, latest), list(assignment))
+            return
+
+        i = order[depth]
+        for a in option_order[i]:
+            if not problem.is_consistent(assignment, i, a):
+                continue
+            slots = problem.slots[i][a]
+            new_earliest = min([earliest] + [s[1] for s in slots])
+            new_latest = max([latest] + [s[2] for s in slots])
+            new_days = len(occupied) + len({s[0] for s in slots if s[0] not in occupied})
+            if archive.covers(objective_vector(new_days, 0, new_earliest, new_latest)):
+                continue
+
+            assignment[i] = a
+            for day, mask in option_masks[i, a]:
+                occupied[day] = occupied.get(day, 0) | mask
+            fillable = reach[depth + 1]
+            final_gaps = sum(
+                popcount(span_mask(occ) & ~occ & ~fillable.get(day, 0)) for day, occ in occupied.items()
+            )
+            if not final_gaps or not archive.covers(
+                    objective_vector(new_days, final_gaps, new_earliest, new_latest)):
+                visit(depth + 1, new_earliest, new_latest)
+            for day, mask in option_masks[i, a]:
+                occupied[day] ^= mask
+                if not occupied[day]:
+                    del occupied[day]
+            assignment[i] = None
+
+    # Start from the best possible bounds: nothing placed yet
+    visit(0, 24, 0)
+    return archive, not timed_out[0]
+
+
+def pareto_schedules(courses, constraints=None, max_size=DEFAULT_ARCHIVE_SIZE, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Non-dominated schedules for a request, ordered by days used then gaps.
+
+    Each entry has the rendered "schedule" and its "objectives". Returns an
+    empty list when no valid schedule exists.
+    """
+    problem = compile_problem(courses, constraints)
+    archive, _ = pareto_search(problem, max_size=max_size, time_limit=time_limit)
+    front = []
+    for vector, assignment in sorted(archive.entries, key=lambda e: e[0]):
+        days, gaps, neg_earliest, latest = vector
+        front.append({
+            "schedule": problem.to_schedule(assignment),
+            "objectives": dict(zip(OBJECTIVES, (days, gaps, -neg_earliest, latest)))
+        })
+    return front
@@ -1,53 +1,171 @@
+import os
 import re
-from ai_model.hybrid_parser import HybridScheduleParser
+from itertools import islice
+from ai_model.loader import BackgroundLoader
+from ai_model.parse_cache import ParseCache, canonical_text
 
-# Initialize hybrid parser for better constraint parsing
-print("🔍 PARSER AI: Initializing HybridScheduleParser...")
-try:
-    constraint_parser = HybridScheduleParser()
-    PARSER_AVAILABLE = True
-    print("🔍 PARSER AI: HybridScheduleParser initialized successfully")
-except Exception as e:
-    PARSER_AVAILABLE = False
-    print(f"❌ PARSER AI: HybridScheduleParser initialization failed: {e}")
-    import traceback
-    print(f"❌ PARSER AI: Full traceback: {traceback.format_exc()}")
+def _load_constraint_extractor():
+    # Imported here so importing this module does not pull in spaCy
+    from ai_model.extraction import ConstraintExtractor
+    from ai_model.registry import pipelines
+    print("🔍 PARSER AI: Initializing ConstraintExtractor...")
+    return ConstraintExtractor(pipelines.get("constraints"))
 
-def parse_course_text(text):
-    """Parse natural language course descriptions into structured data."""
-    print(f"🔍 PARSER AI: parse_course_text called with text: '{text}'")
-    print(f"🔍 PARSER AI: PARSER_AVAILABLE: {PARSER_AVAILABLE}")
-    
-    courses = []
-    constraints = []
-    
-    # Use hybrid parser for constraints if available
-    if PARSER_AVAILABLE:
-        print("🔍 PARSER AI: Using hybrid parser for constraints...")
+# Same single-pass extraction as /api/parse, built on first use or by a warm-up
+constraint_parser_loader = BackgroundLoader("constraint_extractor", _load_constraint_extractor)
+
+# Results by normalized text; only extractor results are cached and they
+# are dropped whenever the extractor is reloaded
+course_text_cache = ParseCache("constraint_extractor")
+constraint_parser_loader.on_reset(course_text_cache.invalidate)
+
+# A pasted syllabus can be tens of KB; longer input is cut at the last
+# sentence that fits instead of being parsed in full
+MAX_COURSE_TEXT_CHARS = int(os.environ.get("MAX_COURSE_TEXT_CHARS", "50000"))
+# Sentences are grouped into chunks of at most CHUNK_CHARS characters and
+# CHUNK_BATCH chunks share one nlp.pipe call
+CHUNK_CHARS = 2000
+CHUNK_BATCH = 16
+
+def truncate_course_text(text, limit=None):
+    """
+    (text, truncated): text cut to at most `limit` characters, at the end of
+    a sentence when one is in the second half of the allowance, otherwise
+    between words.
+    """
+    limit = MAX_COURSE_TEXT_CHARS if limit is None else limit
+    if len(text) <= limit:
+        return text, False
+    head = text[:limit]
+    end = head.rfind(".") + 1
+    if end < limit // 2:
+        end = head.rfind(" ")
+    if end <= 0:
+        end = limit
+    return text[:end].rstrip(), True
+
+def _sentences(text):
+    return [s.strip() for s in text.split('.') if s.strip()]
+
+def sentence_chunks(text, chunk_chars=None):
+    """
+    Yield the sentences of `text` in order, joined into chunks of at most
+    chunk_chars (default CHUNK_CHARS) characters. A single sentence longer
+    than that is split between words.
+    """
+    chunk_chars = chunk_chars or CHUNK_CHARS
+    chunk = []
+    size = 0
+    for sentence in _sentences(text):
+        while len(sentence) > chunk_chars:
+            cut = sentence.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            pieces = [sentence[:cut].strip(), sentence[cut:].strip()]
+            if chunk:
+                yield ". ".join(chunk)
+                chunk, size = [], 0
+            yield pieces[0]
+            sentence = pieces[1]
+        if chunk and size + len(sentence) + 2 > chunk_chars:
+            yield ". ".join(chunk)
+            chunk, size = [], 0
+        if sentence:
+            chunk.append(sentence)
+            size += len(sentence) + 2
+    if chunk:
+        yield ". ".join(chunk)
+
+def _chunk_constraints(constraint_parser, chunks):
+    """(constraints of the chunks, whether the extractor produced them)."""
+    if constraint_parser is not None:
         try:
-            constraint_result = constraint_parser.parse(text)
-            constraints = constraint_result.get("constraints", [])
-            print(f"🔍 PARSER AI: Hybrid parser succeeded, found {len(constraints)} constraints: {constraints}")
+            if len(chunks) == 1:
+                results = [constraint_parser.parse(chunks[0])]
+            else:
+                results = constraint_parser.parse_batch(chunks, batch_size=len(chunks))
+            return [c for result in results for c in result.get("constraints", [])], True
         except Exception as e:
-            print(f"❌ PARSER AI: Hybrid parser failed: {e}")
+            print(f"❌ PARSER AI: Constraint extractor failed: {e}")
             import traceback
             print(f"❌ PARSER AI: Full traceback: {traceback.format_exc()}")
             print("🔍 PARSER AI: Falling back to regex parsing...")
-            constraints = _parse_constraints_fallback(text)
-    else:
-        print("🔍 PARSER AI: Using fallback regex parsing...")
-        constraints = _parse_constraints_fallback(text)
+    return [c for chunk in chunks for c in _parse_constraints_fallback(chunk)], False
+
+def _parse_chunks(text, constraint_parser):
+    """
+    Yield (new courses, new constraints, parsed characters, by extractor)
+    for every CHUNK_BATCH chunks of `text`. A course is only yielded once it
+    is complete: the next course began or the text ended.
+    """
+    courses = []
+    current_course = None
+    emitted = 0
+    parsed = 0
+    chunks = sentence_chunks(text)
+    group = list(islice(chunks, CHUNK_BATCH))
+    while group:
+        constraints, by_model = _chunk_constraints(constraint_parser, group)
+        for chunk in group:
+            for sentence in _sentences(chunk):
+                current_course = _read_course_sentence(sentence, current_course, courses)
+        parsed += sum(len(chunk) for chunk in group)
+        group = list(islice(chunks, CHUNK_BATCH))
+        done = len(courses) if not group else len(courses) - (current_course is not None)
+        yield courses[emitted:done], constraints, parsed, by_model
+        emitted = done
+
+def iter_course_text(text):
+    """
+    Parse course text incrementally: yields {"courses", "constraints",
+    "parsed_chars", "truncated"} for every batch of chunks, so callers can
+    forward results while the rest of a long text is still being parsed.
+    """
+    text, truncated = truncate_course_text(canonical_text(text))
+    constraint_parser = constraint_parser_loader.get()
+    for courses, constraints, parsed, _ in _parse_chunks(text, constraint_parser):
+        yield {
+            "courses": courses,
+            "constraints": constraints,
+            "parsed_chars": parsed,
+            "truncated": truncated
+        }
+
+def parse_course_text(text):
+    """Parse natural language course descriptions into structured data."""
+    print(f"🔍 PARSER AI: parse_course_text called with text: '{text[:200] if isinstance(text, str) else text}'")
+    if isinstance(text, str):
+        text = canonical_text(text)
+        cached = course_text_cache.get(text)
+        if cached is not None:
+            print("🔍 PARSER AI: Cache hit")
+            return cached
+    key = text
+    text, truncated = truncate_course_text(text)
+    if truncated:
+        print(f"⚠️ PARSER AI: Text of {len(key)} characters truncated to {len(text)}")
+
+    # Waits for the parser if a warm-up is still running
+    constraint_parser = constraint_parser_loader.get()
+    print(f"🔍 PARSER AI: Constraint extractor available: {constraint_parser is not None}")
     
-    # Parse course information (existing logic)
-    print("🔍 PARSER AI: Parsing courses...")
-    courses = _parse_courses(text)
-    print(f"🔍 PARSER AI: Found {len(courses)} courses: {courses}")
+    courses = []
+    constraints = []
+    parsed_by_model = True
+    for new_courses, new_constraints, _, by_model in _parse_chunks(text, constraint_parser):
+        courses.extend(new_courses)
+        constraints.extend(new_constraints)
+        parsed_by_model = parsed_by_model and by_model
+    print(f"🔍 PARSER AI: Found {len(courses)} courses and {len(constraints)} constraints")
     
     result = {
         "courses": courses,
         "constraints": constraints
     }
-    print(f"🔍 PARSER AI: Final result: {result}")
+    if truncated:
+        result["truncated"] = True
+    if parsed_by_model and constraint_parser is not None:
+        # Fallback results are not cached so they stop as soon as the parser works
+        course_text_cache.put(key, result)
     return result
 
 def _parse_constraints_fallback(text):
@@ -78,40 +196,37 @@ def _parse_constraints_fallback(text):
     
     return constraints
 
-def _parse_courses(text):
-    """Parse course information from text"""
-    courses = []
-    sentences = [s.strip() for s in text.split('.') if s.strip()]
+def _read_course_sentence(sentence, current_course, courses):
+    """
+    Apply one sentence: a course mention starts a new course (appended to
+    `courses`), time slots go to the current one. Returns the current course.
+    """
+    sentence_lower = sentence.lower()
     
-    current_course = None
-    for sentence in sentences:
-        sentence_lower = sentence.lower()
+    # Skip constraint sentences
+    if any(phrase in sentence_lower for phrase in ["no classes", "not before", "not after", "avoid"]):
+        return current_course
         
-        # Skip constraint sentences
-        if any(phrase in sentence_lower for phrase in ["no classes", "not before", "not after", "avoid"]):
-            continue
-            
-        # Parse course information
-        course_match = re.search(r'([A-Za-z]+\s*\d+)', sentence, re.IGNORECASE)
-        time_slots = re.findall(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)\s*(?:or\s*(?:Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)\s*)*(\d{1,2})\s*-\s*(\d{1,2})', sentence, re.IGNORECASE)
-        
-        if course_match:
-            current_course = {
-                "name": course_match.group(1).strip(),
-                "lectures": [],
-                "ta_times": []
-            }
-            courses.append(current_course)
-        
-        if current_course and time_slots:
-            is_ta = "ta" in sentence_lower or "teaching assistant" in sentence_lower
-            for day, start, end in time_slots:
-                days = re.findall(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)', sentence, re.IGNORECASE)
-                for d in days:
-                    time_slot = f"{d} {start}-{end}"
-                    if is_ta:
-                        current_course["ta_times"].append(time_slot)
-                    else:
-                        current_course["lectures"].append(time_slot)
+    # Parse course information
+    course_match = re.search(r'([A-Za-z]+\s*\d+)', sentence, re.IGNORECASE)
+    time_slots = re.findall(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)\s*(?:or\s*(?:Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)\s*)*(\d{1,2})\s*-\s*(\d{1,2})', sentence, re.IGNORECASE)
+    
+    if course_match:
+        current_course = {
+            "name": course_match.group(1).strip(),
+            "lectures": [],
+            "ta_times": []
+        }
+        courses.append(current_course)
     
-    return courses
\ No newline at end of file
+    if current_course and time_slots:
+        is_ta = "ta" in sentence_lower or "teaching assistant" in sentence_lower
+        for day, start, end in time_slots:
+            days = re.findall(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Mon|Tue|Wed|Thu|Fri)', sentence, re.IGNORECASE)
+            for d in days:
+                time_slot = f"{d} {start}-{end}"
+                if is_ta:
+                    current_course["ta_times"].append(time_slot)
+                else:
+                    current_course["lectures"].append(time_slot)
+    return current_course
@@ -0,0 +1,163 @@
+"""
+Joint elective selection and arrangement.
+
+Students often have a handful of mandatory courses and a longer list of
+candidate electives of which only some should be taken. Rather than solving
+every k-subset separately, this search treats "skip the course" as one more
+option of every elective and walks all courses depth-first, pruning on:
+
+- clashes with the courses already placed,
+- group counts that are already over their max or can no longer reach their min,
+- credit totals that can no longer end up inside the requested window,
+- the preference objective (branch and bound against the best schedule so far).
+
+Courses that are not listed in any group are mandatory.
+"""
+
+import time
+
+from .compiled import compile_problem, hours_mask, popcount, span_mask
+
+DEFAULT_TIME_LIMIT = 2.0  # seconds
+
+SKIP = None
+
+
+def select_schedule(courses, groups, preference="crammed", constraints=None,
+                    min_credits=None, max_credits=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Pick and arrange the best subset of courses.
+
+    groups is a list of {"courses": [names], "min": int, "max": int}; every
+    course name may appear in at most one group. Credits are read from each
+    course's optional "credits" field (0 when missing).
+
+    Returns {"schedule", "selected_courses", "total_credits"} for the best
+    selection found, or None if no selection satisfies all the requirements.
+    """
+    deadline = time.perf_counter() + time_limit
+    problem = compile_problem(courses, constraints)
+    domains = problem.domains()
+    n = len(problem)
+
+    index = {course["name"]: i for i, course in enumerate(courses)}
+    group_of = [None] * n
+    bounds = []
+    for g, group in enumerate(groups):
+        members = [index[name] for name in group["courses"]]
+        for i in members:
+            group_of[i] = g
+        bounds.append((group.get("min", 0), group.get("max", len(members))))
+
+    credits = [course.get("credits", 0) or 0 for course in courses]
+    if any(group_of[i] is None and not domains[i] for i in range(n)):
+        return None
+
+    order = sorted(range(n), key=lambda i: (group_of[i] is not None, group_of[i] or 0, len(domains[i]), i))
+    skip_first = preference != "spaced"
+    choices = {
+        i: domains[i] if group_of[i] is None
+        else ([SKIP] + domains[i] if skip_first else domains[i] + [SKIP])
+        for i in range(n)
+    }
+    option_masks = {
+        (i, a): [(slot[0], hours_mask(slot[1], slot[2])) for slot in problem.slots[i][a]]
+        for i in range(n) for a in domains[i]
+    }
+
+    # Suffix tables indexed by depth: what the courses not yet decided can still contribute
+    remaining_members = [[0] * len(groups) for _ in range(n + 1)]
+    forced_credits = [0] * (n + 1)
+    optional_credits = [0] * (n + 1)
+    reach = [{} for _ in range(n + 1)]
+    for depth in range(n - 1, -1, -1):
+        i = order[depth]
+        remaining_members[depth] = list(remaining_members[depth + 1])
+        forced_credits[depth] = forced_credits[depth + 1]
+        optional_credits[depth] = optional_credits[depth + 1]
+        if group_of[i] is None:
+            forced_credits[depth] += credits[i]
+        else:
+            remaining_members[depth][group_of[i]] += 1
+            optional_credits[depth] += credits[i]
+        reach[depth] = dict(reach[depth + 1])
+        for a in domains[i]:
+            for day, mask in option_masks[i, a]:
+                reach[depth][day] = reach[depth].get(day, 0) | mask
+
+    assignment = [SKIP] * n
+    counts = [0] * len(groups)
+    occupied = {}
+    best = []  # [key, assignment, credits]
+    nodes = [0]
+
+    def feasible(depth, total):
+        if max_credits is not None and total + forced_credits[depth] > max_credits:
+            return False
+        if min_credits is not None and total + forced_credits[depth] + optional_credits[depth] < min_credits:
+            return False
+        return all(
+            lo <= counts[g] + remaining_members[depth][g] and counts[g] <= hi
+            for g, (lo, hi) in enumerate(bounds)
+        )
+
+    def bound_allows(depth):
+        if not best:
+            return True
+        if preference == "spaced":
+            reachable_days = len(set(occupied) | set(reach[depth]))
+            return -reachable_days <= best[0][0]
+        fillable = reach[depth]
+        final_gaps = sum(
+            popcount(span_mask(occ) & ~occ & ~fillable.get(day, 0)) for day, occ in occupied.items()
+        )
+        return (len(occupied), final_gaps) < best[0]
+
+    def visit(depth, total):
+        nodes[0] += 1
+        if nodes[0] % 256 == 0 and time.perf_counter() >= deadline:
+            return False
+        if not feasible(depth, total) or not bound_allows(depth):
+            return True
+        if depth == n:
+            gaps = sum(popcount(span_mask(occ) & ~occ) for occ in occupied.values())
+            key = (-len(occupied), -gaps) if preference == "spaced" else (len(occupied), gaps)
+            if not best or key < best[0]:
+                best[:] = [key, list(assignment), total]
+            return True
+
+        i = order[depth]
+        g = group_of[i]
+        for a in choices[i]:
+            if a is SKIP:
+                if not visit(depth + 1, total):
+                    return False
+                continue
+            if not problem.is_consistent(assignment, i, a):
+                continue
+            assignment[i] = a
+            if g is not None:
+                counts[g] += 1
+            for day, mask in option_masks[i, a]:
+                occupied[day] = occupied.get(day, 0) | mask
+            keep_going = visit(depth + 1, total + credits[i])
+            for day, mask in option_masks[i, a]:
+                occupied[day] ^= mask
+                if not occupied[day]:
+                    del occupied[day]
+            if g is not None:
+                counts[g] -= 1
+            assignment[i] = SKIP
+            if not keep_going:
+                return False
+        return True
+
+    visit(0, 0)
+    if not best:
+        return None
+    _, chosen, total_credits = best
+    return {
+        "schedule": problem.to_schedule(chosen),
+        "selected_courses": [courses[i]["name"] for i, a in enumerate(chosen) if a is not SKIP],
+        "total_credits": total_credits
+    }
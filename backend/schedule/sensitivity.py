@@ -0,0 +1,115 @@
+"""
+What-if analysis: how the best schedule changes when one constraint or one
+course is dropped.
+
+The request is compiled once. Every variant is then just a different set of
+domains over the same clash tables: dropping constraint k clears bit k from
+the active constraint mask, dropping a course gives it the single "left out"
+option None. Two more shortcuts keep this cheap:
+
+- a constraint that filters no option cannot change anything, so its variant
+  reuses the baseline result without a search,
+- the baseline schedule stays valid in every relaxed variant (minus the
+  dropped course), so it seeds branch and bound with an incumbent and only
+  strictly better schedules are explored.
+"""
+
+import time
+
+from .anytime import branch_and_bound
+from .compiled import compile_problem, preference_cost, preference_key
+
+DEFAULT_TIME_LIMIT = 3.0  # seconds for the whole analysis
+
+
+def _score(problem, assignment, preference):
+    days, gaps, _, _ = problem.metrics(assignment)
+    return {"days_used": days, "gaps": gaps, "cost": preference_cost(days, gaps, preference)}
+
+
+def _solve(problem, domains, preference, deadline, incumbent=None):
+    """Best assignment for some domains: (assignment or None, complete)."""
+    stats = {}
+    best = None
+    if incumbent is not None:
+        key = preference_key(problem.assignment_slots(incumbent), preference)
+        best = incumbent
+    else:
+        key = None
+    for assignment in branch_and_bound(problem, preference, domains, deadline, key, stats):
+        best = assignment
+    return best, stats["complete"]
+
+
+def what_if(courses, preference="crammed", constraints=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Evaluate every single-constraint and single-course removal.
+
+    Returns {"baseline", "constraint_removals", "course_removals"}. Each
+    result holds "feasible" (None when the time ran out before anything was
+    found), "score", "schedule", "improves" (better than the baseline, or
+    feasible where the baseline is not) and "complete" (the search finished,
+    so the result is optimal).
+    """
+    start = time.perf_counter()
+    problem = compile_problem(courses, constraints)
+    n = len(problem)
+    base_domains = problem.domains()
+    variant_count = 1 + len(problem.constraints) + n
+
+    def deadline_for(done):
+        # Spread what is left of the budget evenly over the remaining variants
+        now = time.perf_counter()
+        remaining = start + time_limit - now
+        return now + max(remaining, 0) / (variant_count - done)
+
+    def result(assignment, complete, base_key=None):
+        if assignment is None:
+            return {"feasible": False if complete else None, "score": None, "schedule": None,
+                    "improves": False, "complete": complete}
+        key = preference_key(problem.assignment_slots(assignment), preference)
+        return {
+            "feasible": True,
+            "score": _score(problem, assignment, preference),
+            "schedule": problem.to_schedule(assignment),
+            "improves": base_key is None or key < base_key,
+            "complete": complete
+        }
+
+    base, base_complete = _solve(problem, base_domains, preference, deadline_for(0))
+    base_key = preference_key(problem.assignment_slots(base), preference) if base is not None else None
+    baseline = result(base, base_complete)
+    baseline["improves"] = False
+    done = 1
+
+    constraint_removals = []
+    for k, constraint in enumerate(problem.constraints):
+        domains = problem.domains(problem.full_mask & ~(1 << k))
+        if domains == base_domains:
+            entry = dict(baseline)
+        else:
+            assignment, complete = _solve(problem, domains, preference, deadline_for(done), base)
+            entry = result(assignment, complete, base_key)
+        entry["constraint"] = constraint
+        constraint_removals.append(entry)
+        done += 1
+
+    course_removals = []
+    for i, course in enumerate(courses):
+        domains = list(base_domains)
+        domains[i] = [None]
+        incumbent = None
+        if base is not None:
+            incumbent = list(base)
+            incumbent[i] = None
+        assignment, complete = _solve(problem, domains, preference, deadline_for(done), incumbent)
+        entry = result(assignment, complete, base_key)
+        entry["course"] = course["name"]
+        course_removals.append(entry)
+        done += 1
+
+    return {
+        "baseline": baseline,
+        "constraint_removals": constraint_removals,
+        "course_removals": course_removals
+    }
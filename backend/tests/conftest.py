@@ -7,6 +7,9 @@ import tempfile
 # Add the parent directory to the path so we can import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Load models on first use so tests that patch spacy.load never race a warm-up thread
+os.environ.setdefault("AI_MODEL_LOADING", "lazy")
+
 from app import app as flask_app
 from auth.database import UserDatabase
 
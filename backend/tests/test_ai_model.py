@@ -1,7 +1,9 @@
+import json
 import pytest
 from unittest.mock import Mock, patch
 import spacy
 from ai_model.ml_parser import ScheduleParser
+from ai_model.parse_cache import ParseCache
 
 class TestScheduleParser:
     """Test cases for the ScheduleParser class."""
@@ -208,4 +210,701 @@ class TestConstraintIntegration:
         numeric_constraints = "No classes before 9am and I have 5 courses to schedule"
         result = parser.parse(numeric_constraints)
         
-        assert isinstance(result, dict)
\ No newline at end of file
+        assert isinstance(result, dict)
+class TestBackgroundLoader:
+    """Test cases for lazy / background model loading."""
+
+    def test_lazy_load_on_first_use(self):
+        from ai_model.loader import BackgroundLoader
+        calls = []
+        loader = BackgroundLoader("test", lambda: calls.append(1) or "model")
+        assert loader.status == "idle"
+        assert loader.get() == "model"
+        assert loader.get() == "model"
+        assert calls == [1]
+        assert loader.snapshot()["status"] == "ready"
+
+    def test_get_without_waiting_while_loading(self):
+        import threading
+        from ai_model.loader import BackgroundLoader
+        release = threading.Event()
+        loader = BackgroundLoader("test", lambda: release.wait(5) and "model")
+
+        assert loader.get(wait=False) is None
+        assert loader.status == "loading"
+        assert not loader.is_settled()
+        release.set()
+        assert loader.get(timeout=5) == "model"
+
+    def test_failed_and_disabled(self):
+        from ai_model.loader import BackgroundLoader
+        def broken():
+            raise IOError("missing model")
+        failed = BackgroundLoader("test", broken)
+        assert failed.get() is None
+        assert failed.status == "failed" and failed.is_settled()
+        assert "missing model" in failed.snapshot()["error"]
+
+        disabled = BackgroundLoader("test", lambda: "model", enabled=False)
+        assert disabled.get() is None
+        assert disabled.status == "disabled"
+
+    def test_reset_loads_again(self):
+        from ai_model.loader import BackgroundLoader
+        values = iter(["first", "second"])
+        loader = BackgroundLoader("test", lambda: next(values))
+        assert loader.get() == "first"
+        loader.reset()
+        assert loader.status == "idle"
+        assert loader.get() == "second"
+
+class TestModelReadiness:
+    """Health and parse endpoints while models are warming up."""
+
+    def test_health_reports_readiness_separately(self, client):
+        import json
+        import app as app_module
+        with patch.object(app_module.ai_model_loader, "_status", "loading"):
+            response = client.get('/api/health')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data["status"] == "ok"
+            assert data["ready"] is False
+            assert data["models"]["schedule_ner"]["status"] == "loading"
+
+            assert client.get('/api/health/ready').status_code == 503
+
+    def test_parse_returns_503_while_loading(self, client):
+        import app as app_module
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(app_module.ai_model_loader, "_status", "loading"):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.post('/api/parse',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"text": "I'd rather keep my mornings free"}
+            )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    def test_fast_path_answers_while_loading(self, client):
+        import json
+        import app as app_module
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(app_module.ai_model_loader, "_status", "loading"):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.post('/api/parse',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"text": "No classes before 9am"}
+            )
+        assert response.status_code == 200
+        body = json.loads(response.data)[0]
+        assert body["constraints"] == [{"type": "No Class Before", "time": 9}]
+        assert body["entities"] == [{"specifics": "9am", "label": "NO_CLASS_BEFORE"}]
+
+class TestPreloadAndFork:
+    """Test cases for loading everything in the gunicorn master before forking."""
+
+    def test_preload_mode_loads_synchronously(self):
+        from ai_model import loader as loader_module
+        from ai_model.loader import BackgroundLoader
+        model = BackgroundLoader("test", lambda: "model")
+        with patch.object(loader_module, "LOADING_MODE", "preload"):
+            model.warm_up()
+        assert model.status == "ready"
+
+    def test_preload_freezes_heap_after_loading_catalog(self):
+        import app as app_module
+        calls = []
+        with patch.object(app_module, "load_autocomplete_cache", side_effect=lambda: calls.append("catalog")), \
+                patch('gc.freeze', side_effect=lambda: calls.append("freeze")):
+            app_module.preload_for_fork()
+        assert calls == ["catalog", "freeze"]
+
+    def test_memory_diagnostics(self, client):
+        import json
+        import os
+        response = client.get('/api/health/memory')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["pid"] == os.getpid()
+        assert data["preloaded"] is False
+        assert data["memory"]["rss_kb"] > 0
+        if os.path.exists("/proc/self/smaps_rollup"):
+            assert data["memory"]["shared_kb"] + data["memory"]["private_kb"] > 0
+
+class TestPipelineRegistry:
+    """Test cases for the shared spaCy pipeline registry."""
+
+    def test_pipeline_loaded_once(self):
+        from ai_model.registry import PipelineRegistry
+        loads = []
+        registry = PipelineRegistry()
+        registry.register("blank", lambda: loads.append(1) or spacy.blank("en"))
+
+        assert not registry.is_loaded("blank")
+        assert registry.get("blank") is registry.get("blank")
+        assert loads == [1]
+        assert registry.stats()["blank"]["components"] == []
+
+        registry.refresh("blank")
+        registry.get("blank")
+        assert loads == [1, 1]
+
+    def test_schedule_ner_excludes_unused_components(self):
+        from ai_model import registry
+        with patch('spacy.load') as mock_load:
+            registry.load_schedule_ner()
+        assert mock_load.call_args.kwargs["exclude"] == registry.SCHEDULE_NER_UNUSED
+        assert "ner" not in registry.SCHEDULE_NER_UNUSED
+
+    def test_parsers_share_one_vocab(self):
+        """The Matcher-based parser reuses the NER pipeline instead of loading its own."""
+        from ai_model.hybrid_parser import HybridScheduleParser
+        from ai_model.registry import PipelineRegistry, load_tokenizer_pipeline
+        nlp = spacy.blank("en")
+        registry = PipelineRegistry()
+        registry.register("schedule_ner", lambda: nlp)
+        registry.register("tokenizer", load_tokenizer_pipeline)
+
+        with patch('ai_model.registry.pipelines', registry):
+            hybrid = HybridScheduleParser(nlp=registry.get("tokenizer"))
+            ml = ScheduleParser(nlp=registry.get("schedule_ner"))
+
+        assert hybrid.nlp is ml.nlp
+        assert hybrid.matcher.vocab is ml.nlp.vocab
+        constraints = hybrid.parse("No classes before 9")["constraints"]
+        assert constraints[0]["type"] == "no_classes_before"
+        assert constraints[0]["time"] == 9
+
+class TestSnapshot:
+    """Test cases for single-file pipeline snapshots."""
+
+    @pytest.fixture
+    def pipeline_dir(self, tmp_path):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler").add_patterns([{"label": "NO_CLASS_DAY", "pattern": [{"LOWER": "friday"}]}])
+        nlp.to_disk(tmp_path / "model")
+        return str(tmp_path / "model")
+
+    def test_round_trip(self, pipeline_dir):
+        from ai_model.snapshot import build_snapshot, load_snapshot, read_header
+        path = pipeline_dir + ".snapshot"
+        header = build_snapshot(spacy.load(pipeline_dir), path, source=pipeline_dir)
+
+        nlp = load_snapshot(path, source=pipeline_dir)
+        assert nlp.pipe_names == ["entity_ruler"]
+        assert [(e.text, e.label_) for e in nlp("no classes on Friday").ents] == [("Friday", "NO_CLASS_DAY")]
+        assert nlp.meta["snapshot"]["sha256"] == header["sha256"] == read_header(path)["sha256"]
+        # The default English tokenizer is rebuilt from the config instead of being stored
+        assert header["excluded"] == ["tokenizer"]
+
+    def test_build_step_snapshots_current_patterns(self, pipeline_dir):
+        from ai_model import registry, snapshot
+        from ai_model.patterns import PATTERNS
+        path = pipeline_dir + ".snapshot"
+        # pipeline_dir's ruler holds an outdated bare "friday" pattern
+        with patch.object(registry, "SCHEDULE_NER_PATH", pipeline_dir), \
+                patch.object(registry, "SCHEDULE_NER_SNAPSHOT", path), \
+                patch.object(registry, "SCHEDULE_NER_UNUSED", []):
+            snapshot.main()
+
+        nlp = snapshot.load_snapshot(path, source=pipeline_dir)
+        assert nlp.get_pipe("entity_ruler").patterns == PATTERNS
+        assert [(e.text, e.label_) for e in nlp("no classes on Friday").ents] == [("no classes on Friday", "NO_CLASS_DAY")]
+        assert not nlp("Lecture on Friday").ents
+
+    def test_rejects_corrupt_and_stale(self, pipeline_dir):
+        import os
+        from ai_model.snapshot import SnapshotError, build_snapshot, load_snapshot
+        path = pipeline_dir + ".snapshot"
+        build_snapshot(spacy.load(pipeline_dir), path, source=pipeline_dir)
+
+        data = bytearray(open(path, "rb").read())
+        data[-1] ^= 1
+        with open(path + ".bad", "wb") as f:
+            f.write(data)
+        with pytest.raises(SnapshotError, match="hash"):
+            load_snapshot(path + ".bad")
+
+        with open(os.path.join(pipeline_dir, "config.cfg"), "a") as f:
+            f.write("\n")
+        with pytest.raises(SnapshotError, match="stale"):
+            load_snapshot(path, source=pipeline_dir)
+
+    def test_registry_prefers_snapshot(self, pipeline_dir):
+        from ai_model import registry
+        from ai_model.snapshot import build_snapshot
+        path = pipeline_dir + ".snapshot"
+        header = build_snapshot(spacy.load(pipeline_dir), path, source=pipeline_dir)
+
+        with patch.object(registry, "SCHEDULE_NER_PATH", pipeline_dir), \
+                patch.object(registry, "SCHEDULE_NER_SNAPSHOT", path), \
+                patch('spacy.load') as mock_load:
+            local = registry.PipelineRegistry()
+            local.register("schedule_ner", registry.load_schedule_ner)
+            local.get("schedule_ner")
+        mock_load.assert_not_called()
+        assert local.stats()["schedule_ner"]["snapshot_sha256"] == header["sha256"]
+
+class TestBatchParse:
+    """Test cases for /api/parse/batch."""
+
+    @pytest.fixture
+    def ruler_nlp(self):
+        """Small pipeline whose entity ruler plays the NER model."""
+        nlp = spacy.blank("en")
+        ruler = nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([
+            {"label": "NO_CLASS_DAY", "pattern": [{"LOWER": "friday"}]},
+            {"label": "NO_CLASS_BEFORE", "pattern": [{"LOWER": "9"}, {"LOWER": "am"}]},
+        ])
+        return nlp
+
+    def test_batch_results_in_order(self, client, ruler_nlp):
+        import json
+        import app as app_module
+        loader = app_module.ai_model_loader
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(loader, "_status", "ready"), \
+                patch.object(loader, "_value", Mock(nlp=ruler_nlp)), \
+                patch.object(app_module, "ner_cache", ParseCache("test")):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.post('/api/parse/batch',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"texts": ["no classes on friday", "nothing here", "friday at 9 am is bad"], "batch_size": 2}
+            )
+            again = client.post('/api/parse/batch',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"texts": ["no  classes on FRIDAY", "nothing  here", "something new"]}
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["count"] == 3
+        assert data["results"][0]["constraints"] == [{"type": "No Class Day", "day": "Fri"}]
+        assert data["results"][1]["constraints"] == []
+        assert data["results"][2]["constraints"] == [
+            {"type": "No Class Day", "day": "Fri"}, {"type": "No Class Before", "time": 9}
+        ]
+        assert data["fast_path_hits"] == 1
+
+        again = json.loads(again.data)
+        assert again["fast_path_hits"] == 1
+        assert again["cache_hits"] == 1
+        assert again["results"][:2] == data["results"][:2]
+
+    def test_batch_rejects_bad_input(self, client, ruler_nlp):
+        import app as app_module
+        loader = app_module.ai_model_loader
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(loader, "_status", "ready"), \
+                patch.object(loader, "_value", Mock(nlp=ruler_nlp)):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.post('/api/parse/batch',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"texts": "no classes on friday"}
+            )
+        assert response.status_code == 400
+
+class TestMicroBatcher:
+    """Test cases for micro-batching of concurrent parse calls."""
+
+    def test_concurrent_submits_share_batches(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from ai_model.microbatch import MicroBatcher
+        sizes = []
+        def double(items):
+            sizes.append(len(items))
+            return [item * 2 for item in items]
+        batcher = MicroBatcher(double, max_wait_ms=50, max_batch_size=4)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher.submit, range(8)))
+
+        assert results == [item * 2 for item in range(8)]
+        assert sum(sizes) == 8
+        assert max(sizes) <= 4
+        assert len(sizes) < 8
+        assert batcher.stats()["items"] == 8
+
+    def test_batch_failure_reaches_every_caller(self):
+        from ai_model.microbatch import MicroBatcher
+        def broken(items):
+            raise ValueError("pipeline failed")
+        batcher = MicroBatcher(broken, max_wait_ms=1)
+        with pytest.raises(ValueError, match="pipeline failed"):
+            batcher.submit("text", timeout=5)
+
+    def test_parse_goes_through_batcher(self, client):
+        import json
+        import app as app_module
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler").add_patterns([{"label": "NO_CLASS_DAY", "pattern": [{"LOWER": "friday"}]}])
+        loader = app_module.ai_model_loader
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(loader, "_status", "ready"), \
+                patch.object(loader, "_value", Mock(nlp=nlp)), \
+                patch.object(app_module, "PARSE_MICROBATCH", True), \
+                patch.object(app_module, "ner_cache", ParseCache("test")):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            before = app_module.parse_batcher.stats()["items"]
+            response = client.post('/api/parse',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"text": "friday is out for me"}
+            )
+
+        assert response.status_code == 200
+        body = json.loads(response.data)[0]
+        assert body["constraints"] == [{"type": "No Class Day", "day": "Fri"}]
+        assert app_module.parse_batcher.stats()["items"] == before + 1
+
+class TestParseCache:
+    """Test cases for the normalized-text parse cache."""
+
+    def test_canonical_text(self):
+        from ai_model.parse_cache import canonical_text
+        assert canonical_text("  no classes on  FRIDAY\n") == "no classes on Friday"
+        assert canonical_text("no classes on friday") == "no classes on Friday"
+        assert canonical_text("Avoid TA Smith") == "Avoid TA Smith"
+
+    def test_lru_eviction_and_hit_rate(self):
+        cache = ParseCache("test", maxsize=2)
+        cache.put("a", {"constraints": []})
+        cache.put("b", {"constraints": []})
+        assert cache.get("a") == {"constraints": []}
+        cache.put("c", {"constraints": []})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.75
+
+    def test_cached_values_are_copies(self):
+        cache = ParseCache("test")
+        cache.put("a", {"constraints": []})
+        cache.get("a")["constraints"].append("changed")
+        assert cache.get("a") == {"constraints": []}
+
+    def test_invalidated_on_model_reload(self):
+        from ai_model.loader import BackgroundLoader
+        cache = ParseCache("test")
+        loader = BackgroundLoader("test", lambda: "model")
+        loader.on_reset(cache.invalidate)
+        loader.get()
+        cache.put("a", {"constraints": []})
+
+        loader.reset()
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 1
+
+        loader.get()
+        cache.put("a", {"constraints": []})
+        assert loader.reload()
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 2
+
+    def test_parse_course_text_uses_cache(self):
+        from schedule import parserAI
+        parser = Mock()
+        parser.parse.return_value = {"constraints": [{"type": "no_day", "day": "Fri"}]}
+        loader = parserAI.constraint_parser_loader
+        with patch.object(loader, "_status", "ready"), patch.object(loader, "_value", parser), \
+                patch.object(parserAI, "course_text_cache", ParseCache("test")):
+            first = parserAI.parse_course_text("No classes on friday")
+            second = parserAI.parse_course_text("No  classes on Friday ")
+
+        assert first == second
+        assert parser.parse.call_count == 1
+        parser.parse.assert_called_with("No classes on Friday")
+
+class TestFastPath:
+    """Test cases for the regex fast path in front of the spaCy parsers."""
+
+    def test_english_phrasings(self):
+        from ai_model.fast_path import FastPathParser
+        parser = FastPathParser()
+        found = parser.parse("No classes before 10am and no classes on Monday or Friday")
+        assert [(c["label"], c["value"]) for c in found] == [
+            ("NO_CLASS_BEFORE", 10), ("NO_CLASS_DAY", "Mon"), ("NO_CLASS_DAY", "Fri")
+        ]
+        assert parser.parse("please don't schedule anything after 5pm")[0]["value"] == 17
+        ta = parser.parse("Avoid TA Smith")[0]
+        assert (ta["label"], ta["value"], ta["start"], ta["end"]) == ("AVOID_TA", "Smith", 9, 14)
+
+    def test_hebrew_phrasings(self):
+        from ai_model.fast_path import FastPathParser
+        parser = FastPathParser()
+        found = parser.parse("בלי שיעורים לפני 9 ובלי שיעורים בימי ראשון ושני")
+        assert [(c["label"], c["value"]) for c in found] == [
+            ("NO_CLASS_BEFORE", 9), ("NO_CLASS_DAY", "Sun"), ("NO_CLASS_DAY", "Mon")
+        ]
+        assert parser.parse("אין שיעורים ביום שישי")[0]["value"] == "Fri"
+        assert parser.parse('לא אחרי 4 אחה"צ')[0]["value"] == 16
+        assert parser.parse("להימנע מהמתרגל כהן")[0]["value"] == "כהן"
+
+    def test_partial_coverage_falls_back(self):
+        from ai_model.fast_path import FastPathParser
+        parser = FastPathParser()
+        assert parser.parse("No classes before 9 with Smith", "test") is None
+        assert parser.parse("I like mornings", "test") is None
+        assert parser.parse("no classes on friday", "test") is not None
+        stats = parser.stats()["test"]
+        assert stats == {"attempts": 3, "covered": 1, "coverage": 0.3333}
+
+    def test_hybrid_parser_skips_matcher_when_covered(self):
+        from ai_model.hybrid_parser import HybridScheduleParser
+        hybrid = HybridScheduleParser(nlp=spacy.blank("en"))
+        with patch.object(hybrid, "matcher", side_effect=AssertionError("matcher used")):
+            result = hybrid.parse("no classes on friday")
+        assert result["fast_path"] is True
+        assert result["constraints"] == [
+            {"type": "no_day", "day": "Fri", "confidence": 0.95, "matched_text": "friday"}
+        ]
+        # Not fully covered: the matcher still runs
+        result = hybrid.parse("No classes before 9 with Smith")
+        assert "fast_path" not in result
+        assert result["constraints"][0]["time"] == 9
+
+class TestBenchmarkHarness:
+    """Test cases for parser scoring and the benchmark report."""
+
+    def test_per_label_scores(self):
+        from ai_model.evaluation import per_label_scores
+        scores = per_label_scores([
+            ({(0, 3, "NO_CLASS_DAY"), (5, 8, "AVOID_TA")}, {(0, 3, "NO_CLASS_DAY"), (9, 12, "AVOID_TA")}),
+            ({(0, 3, "NO_CLASS_DAY")}, set()),
+        ])
+        assert scores["NO_CLASS_DAY"] == {"tp": 1, "fp": 0, "fn": 1, "precision": 1.0, "recall": 0.5}
+        assert scores["AVOID_TA"]["precision"] == 0.0 and scores["AVOID_TA"]["recall"] == 0.0
+
+    def test_gold_and_predicted_constraints_line_up(self):
+        from ai_model.evaluation import gold_constraints, predicted_constraints
+        text = "No classes before eleven, none on Thursdays, avoid TA Smith"
+        gold = gold_constraints(text, {"entities": [(18, 24, "NO_CLASS_BEFORE"), (34, 43, "NO_CLASS_DAY"), (54, 59, "AVOID_TA")]})
+        predicted = predicted_constraints([
+            {"type": "no_classes_before", "time": 11},
+            {"type": "no_day", "day": "Thu"},
+            {"type": "avoid_ta", "name": "Smith"},
+        ])
+        assert gold == predicted == {(11, "NO_CLASS_BEFORE"), ("Thu", "NO_CLASS_DAY"), ("smith", "AVOID_TA")}
+
+    def test_batch_parse_matches_single_parse(self):
+        from ai_model.hybrid_parser import HybridScheduleParser
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler").add_patterns([{"label": "NO_CLASS_DAY", "pattern": [{"LOWER": "friday"}]}])
+        texts = ["no classes on friday", "friday is out", "No classes before 9 with Smith"]
+
+        ml = ScheduleParser(nlp=nlp)
+        assert ml.parse_batch(texts, batch_size=2) == [ml.parse(text) for text in texts]
+        hybrid = HybridScheduleParser(nlp=nlp)
+        assert hybrid.parse_batch(texts, batch_size=2) == [hybrid.parse(text) for text in texts]
+
+    def test_report(self):
+        from ai_model.benchmark import build_report, tolerant
+        def parse(text):
+            if "broken" in text:
+                raise ValueError("cannot parse")
+            return {"constraints": [{"type": "no_day", "day": "Fri"}] if "friday" in text else []}
+        data = [
+            ("no classes on friday", {"entities": [(14, 20, "NO_CLASS_DAY")]}),
+            ("broken text", {"entities": []}),
+        ]
+
+        report = build_report({"fake": tolerant(parse), "missing": IOError("no model")},
+                              {"test": data}, batch_sizes=[1, 2], repeat=2)
+
+        fake = report["parsers"]["fake"]
+        assert set(fake["latency"]) == {"1", "2"}
+        assert fake["latency"]["1"]["batches"] == 4 and fake["latency"]["2"]["batches"] == 2
+        assert fake["accuracy"]["test"]["NO_CLASS_DAY"]["recall"] == 1.0
+        assert fake["errors"]["test"] == 1
+        assert report["parsers"]["missing"] == {"error": "no model"}
+        json.dumps(report)
+
+class TestTraining:
+    """Test cases for the batched NER training script."""
+
+    @pytest.fixture
+    def train_ner(self, monkeypatch):
+        import os
+        # train_ner.py is a script that imports its data modules by plain name
+        monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.dirname(__file__)), "ai_model"))
+        import train_ner
+        return train_ner
+
+    def test_sweep_configs_cover_grid(self, train_ner):
+        configs = train_ner.sweep_configs({"drop_rate": [0.1, 0.2], "n_iter": [5], "batch_sizes": [(4, 32), (8, 64)]})
+        assert len(configs) == 4
+        assert {"drop_rate": 0.2, "n_iter": 5, "batch_sizes": (8, 64)} in configs
+
+    def test_short_training_run_saves_model(self, train_ner, tmp_path):
+        accuracy = train_ner.train_ner(n_iter=1, output_dir=str(tmp_path / "model"), base_model=None, verbose=False)
+        nlp = spacy.load(tmp_path / "model")
+        assert "ner" in nlp.pipe_names
+        assert 0 <= accuracy <= 100
+        assert len(train_ner.predict_entities(nlp, train_ner.TEST_DATA)) == len(train_ner.TEST_DATA)
+
+    def test_dev_split_is_held_out_of_training_data(self, train_ner):
+        train, dev = train_ner.split_dev(train_ner.TRAIN_DATA)
+        assert train_ner.split_dev(train_ner.TRAIN_DATA) == (train, dev)
+        assert len(dev) == int(len(train_ner.TRAIN_DATA) * train_ner.DEV_FRACTION)
+        assert sorted(map(str, train + dev)) == sorted(map(str, train_ner.TRAIN_DATA))
+        assert not any(example in train_ner.TEST_DATA for example in dev)
+
+    def test_sweep_selects_on_dev_and_reports_test_once(self, train_ner, tmp_path):
+        scored = []
+        calculate_accuracy = train_ner.calculate_accuracy
+
+        def recording(nlp, data, verbose=True):
+            scored.append(data)
+            return calculate_accuracy(nlp, data, verbose=verbose)
+
+        with patch.object(train_ner, "calculate_accuracy", recording):
+            config, dev_accuracy, test_accuracy = train_ner.sweep(
+                {"n_iter": [1]}, processes=1, output_dir=str(tmp_path / "model"), base_model=None)
+        assert config == {"n_iter": 1}
+        assert 0 <= dev_accuracy <= 100 and 0 <= test_accuracy <= 100
+        assert [data is train_ner.TEST_DATA for data in scored] == [False, True]
+
+class TestVocabGuard:
+    """Test cases for bounding vocab growth of long-lived pipelines."""
+
+    def test_refresh_swaps_pipeline_and_parsers(self):
+        from ai_model.registry import PipelineRegistry
+        from ai_model.loader import BackgroundLoader
+        from ai_model.vocab_guard import VocabGuard
+        registry = PipelineRegistry()
+        registry.register("schedule_ner", lambda: spacy.blank("en"))
+        registry.register("tokenizer", lambda: registry.get("schedule_ner"))
+        parser = BackgroundLoader("parser", lambda: ScheduleParser(nlp=registry.get("schedule_ner")))
+        guard = VocabGuard(registry, dependents=[parser], max_new_strings=50)
+
+        in_flight = parser.get()
+        old_nlp = registry.get("tokenizer")
+        assert not guard.check(background=False)
+        for k in range(60):
+            in_flight.parse(f"no classes with ta word{k}")
+        assert registry.vocab_growth()["schedule_ner"] > 50
+
+        assert guard.check(background=False)
+        fresh = registry.get("schedule_ner")
+        assert fresh is not old_nlp
+        # Both names of the shared pipeline move to the fresh copy
+        assert registry.get("tokenizer") is fresh
+        assert registry.vocab_growth() == {"schedule_ner": 0, "tokenizer": 0}
+        assert parser.get().nlp is fresh and parser.status == "ready"
+        # A request that got the old parser before the swap still completes
+        assert in_flight.parse("no classes on friday")["constraints"] == []
+        assert registry.stats()["schedule_ner"]["refreshes"] == 1
+        assert guard.stats()["refreshes"] == 1
+
+    def test_failed_reload_keeps_serving(self):
+        from ai_model.loader import BackgroundLoader
+        values = iter(["first"])
+        loader = BackgroundLoader("test", lambda: next(values))
+        assert loader.get() == "first"
+        assert loader.reload() is False
+        assert loader.get() == "first" and loader.status == "ready"
+
+    def test_refresh_drops_cached_parses(self):
+        from ai_model.registry import PipelineRegistry
+        from ai_model.loader import BackgroundLoader
+        from ai_model.vocab_guard import VocabGuard
+        registry = PipelineRegistry()
+        registry.register("schedule_ner", lambda: spacy.blank("en"))
+        parser = BackgroundLoader("parser", lambda: ScheduleParser(nlp=registry.get("schedule_ner")))
+        cache = ParseCache("parser")
+        parser.on_reset(cache.invalidate)
+        guard = VocabGuard(registry, dependents=[parser], max_new_strings=50)
+
+        for k in range(60):
+            text = f"no classes with ta word{k}"
+            cache.put(text, parser.get().parse(text))
+        assert len(cache) == 60
+
+        assert guard.check(background=False)
+        # Results of the old pipeline are not served after the swap
+        assert len(cache) == 0
+        assert cache.get("no classes with ta word0") is None
+
+class TestConstraintExtraction:
+    """Test cases for single-pass (entity ruler + NER) constraint extraction."""
+
+    @pytest.fixture
+    def rules_nlp(self):
+        from ai_model.extraction import with_entity_ruler
+        return with_entity_ruler(spacy.blank("en"))
+
+    def test_with_entity_ruler_enables_disabled_ruler(self):
+        from ai_model.extraction import with_entity_ruler
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler")
+        nlp.disable_pipe("entity_ruler")
+        assert with_entity_ruler(nlp).pipe_names == ["entity_ruler"]
+
+    def test_ruler_entities_become_items(self, rules_nlp):
+        from ai_model.extraction import ConstraintExtractor
+        extractor = ConstraintExtractor(rules_nlp)
+        text = "Mornings are hard, so nothing until 10 am. Also avoid TA Smith"
+        items = extractor.extract(text, "test")
+        assert [(item["label"], item["value"]) for item in items] == [
+            ("NO_CLASS_BEFORE", 10), ("AVOID_TA", "Smith")
+        ]
+        # Offsets point at the value, not at the cue words of the ruler match
+        assert [text[item["start"]:item["end"]] for item in items] == ["10 am", "Smith"]
+
+    def test_course_description_mentions_are_not_constraints(self, rules_nlp):
+        from ai_model.extraction import ConstraintExtractor
+        extractor = ConstraintExtractor(rules_nlp)
+        text = ("The lecture meets on Monday and Wednesday, no classes before 9 am. "
+                "TA Wednesday office hours are held on Tuesday in room 12. "
+                "Ask TA Cohen about the Thursday lab")
+        result = extractor.parse(text)
+        assert result["constraints"] == [{"type": "no_classes_before", "time": 9, "matched_text": "9 am"}]
+
+        items = extractor.extract("No classes on Friday, please avoid TA Smith", "test")
+        assert [(item["label"], item["value"]) for item in items] == [("NO_CLASS_DAY", "Fri"), ("AVOID_TA", "Smith")]
+
+    def test_saved_ruler_patterns_are_replaced(self):
+        from ai_model.extraction import with_entity_ruler
+        from ai_model.patterns import PATTERNS
+        # A ruler saved disabled, holding the patterns schedule_ner used to ship with
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler").add_patterns([
+            {"label": "NO_CLASS_DAY", "pattern": [{"LOWER": {"IN": ["monday", "wednesday"]}}]},
+            {"label": "AVOID_TA", "pattern": [{"LOWER": "ta"}, {"IS_TITLE": True}]},
+        ])
+        nlp.disable_pipe("entity_ruler")
+
+        nlp = with_entity_ruler(nlp)
+        assert nlp.pipe_names == ["entity_ruler"]
+        assert nlp.get_pipe("entity_ruler").patterns == PATTERNS
+        assert not nlp("Lecture on Monday").ents
+        assert not nlp("TA Wednesday office hours").ents
+
+    def test_endpoints_share_one_result(self, client, rules_nlp):
+        import app as app_module
+        from ai_model.extraction import ConstraintExtractor
+        from ai_model.evaluation import predicted_constraints
+        from schedule import parserAI
+        text = "Mornings are hard, so nothing until 10 am. Also avoid TA Smith"
+        extractor = ConstraintExtractor(rules_nlp)
+        with patch('auth.routes.get_auth_manager') as mock_manager, \
+                patch.object(app_module.ai_model_loader, "_status", "ready"), \
+                patch.object(app_module.ai_model_loader, "_value", extractor), \
+                patch.object(app_module, "ner_cache", ParseCache("test")), \
+                patch.object(parserAI.constraint_parser_loader, "_status", "ready"), \
+                patch.object(parserAI.constraint_parser_loader, "_value", extractor), \
+                patch.object(parserAI, "course_text_cache", ParseCache("test")):
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.post('/api/parse',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"text": text}
+            )
+            course_text = parserAI.parse_course_text(text)
+
+        body = json.loads(response.data)[0]
+        assert body["constraints"] == [{"type": "No Class Before", "time": 10}, {"type": "Avoid TA", "name": "Smith"}]
+        assert predicted_constraints(course_text["constraints"]) == {(10, "NO_CLASS_BEFORE"), ("smith", "AVOID_TA")}
@@ -0,0 +1,431 @@
+import pytest
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import PropertyMock, patch
+from urllib.parse import parse_qsl, urlsplit
+
+SAMPLE_CATALOG = {
+    "courses": [
+        {
+            "id": "01002",
+            "name": "ספרי התורה",
+            "events": [
+                {"id": "01002-80-0", "category": "הרצאה", "lecturers": ["ד\"ר צבי שמעון"], "location": "",
+                 "timeSlots": [{"day": "Tuesday", "from": "08:00", "to": "10:00", "semester": "A"}]},
+                {"id": "01002-81-0", "category": "תרגיל", "lecturers": ["מר כהן"], "location": "בניין 90",
+                 "timeSlots": [{"day": "Monday", "from": "10:00", "to": "12:00", "semester": "B"},
+                               {"day": "Wednesday", "from": "10:00", "to": "12:00", "semester": "A"}]}
+            ]
+        },
+        {
+            "id": "88101",
+            "name": "מבוא למדעי המחשב",
+            "events": [
+                {"id": "88101-01-0", "category": "הרצאה", "lecturers": ["פרופ' לוי"], "location": "",
+                 "timeSlots": [{"day": "Sunday", "from": "12:00", "to": "14:00", "semester": "B"}]}
+            ]
+        }
+    ]
+}
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / "courses.json"
+    path.write_text(json.dumps(SAMPLE_CATALOG, ensure_ascii=False), encoding="utf-8")
+    return path
+
+class PostgRESTStandIn(ThreadingHTTPServer):
+    """
+    Local stand-in for the PostgREST API behind Supabase: records every
+    request and answers with the queued (rows, Content-Range) responses.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                server.requests.append({
+                    "path": url.path,
+                    "params": dict(parse_qsl(url.query)),
+                    "headers": dict(self.headers),
+                })
+                rows, content_range = server.responses.pop(0) if server.responses else ([], "*/0")
+                body = json.dumps(rows).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Range", content_range)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+@pytest.fixture
+def postgrest():
+    server = PostgRESTStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    env = {
+        "SUPABASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "SUPABASE_ANON_KEY": "stand.in.key",
+    }
+    try:
+        with patch.dict(os.environ, env):
+            yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class TestCatalogStore:
+    """Test cases for the shared in-memory course catalog."""
+
+    def test_lookup_and_semester_views(self, catalog_file):
+        from api.catalog_store import CatalogStore
+        catalog = CatalogStore(str(catalog_file)).get()
+
+        assert len(catalog) == 2
+        assert catalog.get("88101")["name"] == "מבוא למדעי המחשב"
+        assert catalog.get("99999") is None
+        assert catalog.semesters == {"A", "B"}
+
+        semester_a = catalog.view("01002", "A")
+        assert [event["id"] for event in semester_a.events] == ["01002-80-0", "01002-81-0"]
+        assert semester_a.events[1]["timeSlots"] == [{"day": "Wednesday", "from": "10:00", "to": "12:00", "semester": "A"}]
+        assert sorted(semester_a.summary["days"]) == ["Tuesday", "Wednesday"]
+        assert semester_a.summary["locations"] == ["בניין 90"]
+        assert catalog.view("01002").events is catalog.get("01002")["events"]
+        # Known course without slots in the semester, unknown course
+        assert catalog.view("88101", "A").events == []
+        assert catalog.view("99999", "A") is None
+
+    def test_reload_only_when_file_changed(self, catalog_file):
+        from api.catalog_store import CatalogStore
+        store = CatalogStore(str(catalog_file))
+        first = store.get()
+        assert store.reload_if_changed() is first
+
+        changed = {"courses": SAMPLE_CATALOG["courses"][:1]}
+        catalog_file.write_text(json.dumps(changed), encoding="utf-8")
+        os.utime(catalog_file, ns=(first.source_mtime + 10**9, first.source_mtime + 10**9))
+        second = store.reload_if_changed()
+
+        assert second is not first and len(second) == 1
+        assert second.version == first.version + 1
+        # A catalog already handed out is never modified
+        assert len(first) == 2
+        assert store.stats()["loads"] == 2
+
+    def test_missing_file_yields_empty_catalog(self, tmp_path):
+        from api.catalog_store import CatalogStore
+        store = CatalogStore(str(tmp_path / "missing.json"))
+        assert len(store.get()) == 0
+
+class TestCourseDetailEndpoints:
+    """Test cases for the course detail endpoints served from the catalog store."""
+
+    @pytest.fixture
+    def store(self, catalog_file):
+        from api.catalog_store import CatalogStore
+        store = CatalogStore(str(catalog_file))
+        with patch("api.hybrid_autocomplete.catalog_store", store), \
+                patch("api.supabase_courses.catalog_store", store):
+            yield store
+
+    def test_fast_course_details(self, client, store):
+        response = client.get('/api/courses/fast-course/01002?semester=B')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [event["id"] for event in data["course"]["events"]] == ["01002-81-0"]
+        assert data["course"]["events"][0]["timeSlots"][0]["day"] == "Monday"
+
+        assert client.get('/api/courses/fast-course/99999').status_code == 404
+        assert store.stats()["loads"] == 1
+
+    def test_course_details_summary(self, client, store):
+        with patch('auth.routes.get_auth_manager') as mock_manager:
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.get('/api/courses/course/88101?semester=B',
+                headers={'Authorization': 'Bearer valid-token'})
+
+        assert response.status_code == 200
+        course = json.loads(response.data)["course"]
+        assert course["summary"] == {
+            "lecturers": ["פרופ' לוי"], "categories": ["הרצאה"], "days": ["Sunday"],
+            "semesters": ["B"], "locations": [], "events_count": 1
+        }
+
+class TestAutocompleteIndex:
+    """Test cases for the trigram index and prefix tries behind fast-autocomplete."""
+
+    def test_ranking_and_verification(self):
+        from api.search_index import TrigramIndex
+        index = TrigramIndex([
+            ("90210", "Intro to Algorithms"),
+            ("88101", "Algorithms"),
+            ("21300", "Advanced Algorithms"),
+            ("55100", "Algebra"),
+            ("77000", "abazbab"),
+        ])
+        # Name prefix first, then substring matches by position and id
+        assert index.search("algo", 10) == [1, 2, 0]
+        assert index.search("ALGORITHMS", 2) == [1, 2]
+        assert index.search("881", 10) == [1]
+        # All trigrams present, but not as one substring
+        assert index.search("abab", 10) == []
+        assert index.search("zzz", 10) == []
+        assert index.search("alg", 10, accept=lambda p: p != 1) == [3, 2, 0]
+
+    def test_hebrew_normalization(self):
+        from api.search_index import normalize_text, TrigramIndex
+        assert normalize_text('ד"ר  צבי') == normalize_text("ד״ר צבי") == "דר צבי"
+        assert normalize_text("מָבוֹא לַמַּחְשֵׁב") == "מבוא למחשב"
+        assert normalize_text("שלום") == normalize_text("שלומ")
+        assert normalize_text("Intro  TO\tCS") == "intro to cs"
+
+        index = TrigramIndex([("10001", "תורת הקוונטים"), ("10002", "מבוא לחשבון")])
+        assert index.search("הקוונטימ", 10) == [0]
+        assert index.search("מָבוֹא", 10) == [1]
+
+    def test_prefix_trie_completions(self):
+        from api.search_index import PrefixTrie
+        trie = PrefixTrie([
+            ("algebra", (1, 7), 0),
+            ("algorithms", (1, 10), 1),
+            ("algorithms", (2, 20), 2),
+            ("alps", (1, 4), 3),
+            ("al", (0, 2), 4),
+        ], k=3)
+        assert trie.complete("al") == (4, 3, 0)
+        assert trie.complete("alg") == (0, 1, 2)
+        # Prefix ending inside a compressed edge
+        assert trie.complete("algor") == (1, 2)
+        assert trie.complete("alx") == ()
+        assert trie.complete("b") == ()
+        assert len(trie.complete("")) == 3
+
+    def test_autocomplete_index_prefix_then_substring(self):
+        from api.search_index import AutocompleteIndex
+        index = AutocompleteIndex([
+            {"id": "90210", "name": "Intro to Algorithms", "semesters": ["A"]},
+            {"id": "88101", "name": "Algorithms", "semesters": ["A", "B"]},
+            {"id": "21300", "name": "Advanced Algorithms", "semesters": ["B"]},
+            {"id": "55100", "name": "Linear Algebra", "semesters": ["A"]},
+            {"id": "77000", "name": "Biology", "semesters": ["B"]},
+        ])
+        # Name prefix, then word starts inside names by name length and id
+        assert index.search("alg", 10) == [1, 3, 2, 0]
+        assert index.search("al", 10, "B") == [1, 2]
+        assert index.search("88", 10) == [1]
+        # Substring fill only for queries of a full trigram
+        assert index.search("olog", 10) == [4]
+        assert index.search("ol", 10) == []
+        assert index.search("alg", 10, "C") == []
+
+    def test_fast_autocomplete_endpoint(self, client, catalog_file):
+        from api import hybrid_autocomplete
+        from api.catalog_store import CatalogStore
+        with patch.object(hybrid_autocomplete, "catalog_store", CatalogStore(str(catalog_file))), \
+                patch.object(hybrid_autocomplete, "_autocomplete_cache", None), \
+                patch.object(hybrid_autocomplete, "_autocomplete_index", None), \
+                patch.object(hybrid_autocomplete, "_cache_last_updated", None):
+            response = client.get('/api/courses/fast-autocomplete?q=מבוא')
+            filtered = client.get('/api/courses/fast-autocomplete?q=מבוא&semester=A')
+            short = client.get('/api/courses/fast-autocomplete?q=סְפ')
+            too_short = client.get('/api/courses/fast-autocomplete?q=ס')
+
+        suggestions = json.loads(response.data)["suggestions"]
+        assert [s["id"] for s in suggestions] == ["88101"]
+        assert suggestions[0]["display"] == "88101 - מבוא למדעי המחשב"
+        assert json.loads(filtered.data)["suggestions"] == []
+        assert [s["id"] for s in json.loads(short.data)["suggestions"]] == ["01002"]
+        assert json.loads(too_short.data)["query_too_short"] is True
+
+class TestFuzzySearch:
+    """Test cases for the typo-tolerant fallback of course search."""
+
+    def test_edit_distance(self):
+        from api.search_index import edit_distance
+        assert edit_distance("algorithms", "algorithms", 2) == 0
+        assert edit_distance("algoritms", "algorithms", 2) == 1
+        assert edit_distance("alogrithms", "algorithms", 2) == 1
+        assert edit_distance("algebra", "algorithms", 2) == 3
+
+    def test_fuzzy_index_matches_names_ids_and_lecturers(self):
+        from api.catalog_store import Catalog
+        fuzzy = Catalog(SAMPLE_CATALOG).fuzzy
+        assert fuzzy.search("מבוא למדאי המחשב", 5) == ["88101"]
+        assert fuzzy.search("88110", 5) == ["88101"]
+        assert fuzzy.search("שימעון", 5) == ["01002"]
+        assert fuzzy.search("מבוא פיזיקה", 5) == []
+        assert fuzzy.search("88110", 5, accept=lambda course_id: course_id != "88101") == []
+
+    def test_autocomplete_falls_back_to_fuzzy(self, client, catalog_file):
+        from api import hybrid_autocomplete
+        from api.catalog_store import CatalogStore
+        with patch.object(hybrid_autocomplete, "catalog_store", CatalogStore(str(catalog_file))), \
+                patch.object(hybrid_autocomplete, "_autocomplete_cache", None), \
+                patch.object(hybrid_autocomplete, "_autocomplete_index", None), \
+                patch.object(hybrid_autocomplete, "_cache_last_updated", None):
+            response = client.get('/api/courses/fast-autocomplete?q=מדעי המחשפ')
+            filtered = client.get('/api/courses/fast-autocomplete?q=מדעי המחשפ&semester=A')
+
+        assert [s["id"] for s in json.loads(response.data)["suggestions"]] == ["88101"]
+        assert json.loads(filtered.data)["suggestions"] == []
+
+    def test_search_fills_up_with_fuzzy_matches(self, client, catalog_file, postgrest):
+        from api.catalog_store import CatalogStore
+        postgrest.responses = [
+            ([], "*/0"),
+            ([{"id": "88101", "name": "מבוא למדעי המחשב", "events": []}], "0-0/1"),
+        ]
+        with patch("api.supabase_courses.catalog_store", CatalogStore(str(catalog_file))), \
+                patch('auth.routes.get_auth_manager') as mock_manager:
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            response = client.get('/api/courses/search?q=למדאי המחשב',
+                headers={'Authorization': 'Bearer valid-token'})
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [course["id"] for course in data["courses"]] == ["88101"]
+        assert data["fuzzy_results"] == 1
+        assert postgrest.requests[1]["params"]["id"] == "in.(88101)"
+
+class TestFacetIndex:
+    """Test cases for the catalog facet bitsets and the legacy courses API using them."""
+
+    def test_filters_match_on_the_same_slot(self):
+        from api.catalog_store import Catalog
+        facets = Catalog(SAMPLE_CATALOG).facets
+
+        assert facets.matching_events(facets.filter_rows()) == {0: [0, 1], 1: [0]}
+        assert facets.matching_events(facets.filter_rows(category="תרגיל", semester="a")) == {0: [1]}
+        # Monday is only in semester B
+        assert facets.matching_events(facets.filter_rows(day="Monday", semester="A")) == {}
+        assert facets.matching_events(facets.filter_rows(lecturer="לוי", day="sunday")) == {1: [0]}
+        assert facets.matching_events(facets.filter_rows(category="סמינר")) == {}
+
+    def test_options_and_counts(self):
+        from api.catalog_store import Catalog
+        facets = Catalog(SAMPLE_CATALOG).facets
+
+        assert facets.options["semesters"] == ["A", "B"]
+        assert facets.options["days"] == ["Monday", "Sunday", "Tuesday", "Wednesday"]
+        assert facets.counts()["categories"] == {"הרצאה": 2, "תרגיל": 1}
+        semester_a = facets.course_mask(facets.filter_rows(semester="A"))
+        assert facets.counts(semester_a)["categories"] == {"הרצאה": 1, "תרגיל": 1}
+
+    def test_unscheduled_events_pass_day_filters(self):
+        from api.facets import FacetIndex
+        facets = FacetIndex([{"id": "1", "events": [{"category": "סדנה", "lecturers": [], "timeSlots": []}]}])
+        assert facets.matching_events(facets.filter_rows(category="סדנה", day="Friday")) == {0: [0]}
+        assert facets.options["days"] == []
+
+    @pytest.fixture
+    def legacy_client(self, catalog_file):
+        from flask import Flask
+        from api.courses import courses_bp
+        from api.catalog_store import CatalogStore
+        legacy_app = Flask(__name__)
+        legacy_app.register_blueprint(courses_bp, url_prefix='/api')
+        with patch("api.courses.catalog_store", CatalogStore(str(catalog_file))), \
+                patch('auth.routes.get_auth_manager') as mock_manager:
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            yield legacy_app.test_client()
+
+    def test_legacy_search_and_filters(self, legacy_client):
+        headers = {'Authorization': 'Bearer valid-token'}
+        data = json.loads(legacy_client.get('/api/courses/search?category=תרגיל', headers=headers).data)
+        assert [course["id"] for course in data["courses"]] == ["01002"]
+        assert [event["id"] for event in data["courses"][0]["events"]] == ["01002-81-0"]
+
+        data = json.loads(legacy_client.get('/api/courses/search?q=מבוא&semester=A', headers=headers).data)
+        assert data["courses"] == []
+
+        data = json.loads(legacy_client.get('/api/courses/filters?semester=B', headers=headers).data)
+        assert data["filters"]["lecturers"] == ["ד\"ר צבי שמעון", "מר כהן", "פרופ' לוי"]
+        # Counted per course: 01002 is in semester B, and also has days in semester A
+        assert data["counts"]["days"] == {"Monday": 1, "Sunday": 1, "Tuesday": 1, "Wednesday": 1}
+        assert data["counts"]["categories"] == {"הרצאה": 2, "תרגיל": 1}
+
+    def test_unfiltered_search_skips_facets(self, legacy_client):
+        from api.catalog_store import Catalog
+        headers = {'Authorization': 'Bearer valid-token'}
+        with patch.object(Catalog, "facets", new_callable=PropertyMock) as mock_facets:
+            data = json.loads(legacy_client.get('/api/courses/search?limit=1', headers=headers).data)
+        mock_facets.assert_not_called()
+        assert [course["id"] for course in data["courses"]] == ["01002"]
+        assert len(data["courses"][0]["events"]) == 2
+
+class TestSearchPushdown:
+    """Test cases for the database-side filters of the Supabase course search."""
+
+    def search(self, client, url):
+        with patch('auth.routes.get_auth_manager') as mock_manager:
+            mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+            return client.get(url, headers={'Authorization': 'Bearer valid-token'})
+
+    def test_filters_become_inner_embedded_conditions(self, client, postgrest):
+        course = {
+            "id": "88101", "name": "מבוא למדעי המחשב", "department": {"code": "89"},
+            "events": [{
+                "id": "88101-01-0",
+                "lecturer_filter": [{"lecturer": {"name": "פרופ' לוי"}}],
+                "category": {"name": "הרצאה"},
+                "location": None,
+                "lecturers": [{"role": "instructor", "is_primary": True, "lecturer": {"name": "פרופ' לוי"}},
+                              {"role": "assistant", "is_primary": False, "lecturer": {"name": "מר כהן"}}],
+                "time_slots": [{"day": {"name_hebrew": "ראשון"}, "semester": {"code": "B"}}],
+            }],
+        }
+        postgrest.responses = [([course], "20-20/21")]
+        response = self.search(client,
+            '/api/courses/search?category=הרצאה&lecturer=לוי&day=ראשון&semester=b&limit=10&offset=20')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        request = postgrest.requests[0]
+        params = request["params"]
+        select = params["select"]
+        assert request["path"] == "/rest/v1/courses"
+        assert "events:course_events!inner(" in select
+        assert "lecturer_filter:course_event_lecturers!inner(lecturer:lecturers!inner(name))" in select
+        assert "category:course_categories!inner(" in select
+        assert "time_slots:time_slots!inner(" in select
+        assert "day:days_of_week!inner(" in select
+        assert "department:departments(" in select
+        assert params["events.category.name"] == "ilike.הרצאה"
+        assert params["events.lecturer_filter.lecturer.name"] == "ilike.%לוי%"
+        assert params["events.time_slots.day.name_hebrew"] == "ilike.ראשון"
+        assert params["events.time_slots.semester.code"] == "ilike.b"
+        assert (params["offset"], params["limit"], params["order"]) == ("20", "10", "id.asc")
+        assert "count=exact" in request["headers"]["Prefer"]
+
+        assert data["total_count"] == 21 and data["offset"] == 20 and data["has_more"] is False
+        event = data["courses"][0]["events"][0]
+        assert "lecturer_filter" not in event
+        # The lecturer filter does not narrow the lecturers an event lists
+        assert sorted(data["courses"][0]["summary"]["lecturers"]) == ["מר כהן", "פרופ' לוי"]
+        # A page that does not exhaust the matches asks for no fuzzy fill
+        assert len(postgrest.requests) == 1
+
+    def test_unfiltered_search_pages_without_inner_joins(self, client, postgrest):
+        postgrest.responses = [([{"id": "01002", "name": "ספרי התורה", "events": []}], "0-0/45")]
+        response = self.search(client, '/api/courses/search?department=89&limit=1')
+
+        data = json.loads(response.data)
+        params = postgrest.requests[0]["params"]
+        assert "!inner" not in params["select"].replace("departments!inner", "")
+        assert "department:departments!inner(" in params["select"]
+        assert params["department.code"] == "eq.89"
+        assert (params["offset"], params["limit"]) == ("0", "1")
+        assert data["total_count"] == 45 and data["has_more"] is True
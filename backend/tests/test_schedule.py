@@ -3,6 +3,7 @@ from unittest.mock import Mock, patch
 from schedule.logic import generate_schedule
 from schedule.parserAI import parse_course_text
 from auth.auth_manager import AuthManager
+from ai_model.parse_cache import ParseCache
 import json
 
 def test_generate_schedule_no_conflicts(sample_courses):
@@ -164,6 +165,71 @@ def test_parse_invalid_constraints():
     assert isinstance(parsed, dict)
     assert "constraints" in parsed
 
+def test_sentence_chunks_and_truncation():
+    """Long text is cut at a sentence end and grouped into bounded chunks."""
+    from schedule.parserAI import sentence_chunks, truncate_course_text
+    text = "CS101 lecture Mon 9-11. No classes on Friday. Math101 lecture Tue 10-12."
+    assert list(sentence_chunks(text, chunk_chars=30)) == [
+        "CS101 lecture Mon 9-11", "No classes on Friday", "Math101 lecture Tue 10-12"
+    ]
+    assert list(sentence_chunks(text, chunk_chars=50)) == [
+        "CS101 lecture Mon 9-11. No classes on Friday", "Math101 lecture Tue 10-12"
+    ]
+    assert all(len(chunk) <= 10 for chunk in sentence_chunks("word " * 20, chunk_chars=10))
+
+    cut, truncated = truncate_course_text(text, limit=60)
+    assert truncated and cut == "CS101 lecture Mon 9-11. No classes on Friday."
+    assert truncate_course_text(text) == (text, False)
+
+def test_long_course_text_streams_in_chunks():
+    """Courses are yielded once complete, in order, batch by batch."""
+    from schedule import parserAI
+    sentences = []
+    for k in range(40):
+        sentences += [f"CS{100 + k} lecture Wed {k % 12 + 8}-{k % 12 + 10}", "Attendance is expected"]
+    sentences.append("No classes on Friday")
+    text = ". ".join(sentences) + "."
+
+    with patch.object(parserAI, "CHUNK_CHARS", 200), patch.object(parserAI, "CHUNK_BATCH", 2), \
+            patch.object(parserAI, "course_text_cache", ParseCache("test")):
+        pieces = list(parserAI.iter_course_text(text))
+        parsed = parserAI.parse_course_text(text)
+
+    assert len(pieces) > 1
+    streamed = [course for piece in pieces for course in piece["courses"]]
+    assert streamed == parsed["courses"]
+    assert [course["name"] for course in streamed] == [f"CS{100 + k}" for k in range(40)]
+    assert streamed[3]["lectures"] == ["Wed 11-13"]
+    assert {"type": "no_day", "day": "Fri"} in [
+        {"type": c["type"], "day": c.get("day")} for c in parsed["constraints"]
+    ]
+    assert pieces[-1]["parsed_chars"] <= len(text) and not pieces[-1]["truncated"]
+
+def test_oversized_course_text_is_truncated():
+    from schedule import parserAI
+    text = "CS101 lecture Mon 9-11. " * 10
+    with patch.object(parserAI, "MAX_COURSE_TEXT_CHARS", 60), \
+            patch.object(parserAI, "course_text_cache", ParseCache("test")):
+        parsed = parserAI.parse_course_text(text)
+    assert parsed["truncated"] is True
+    assert len(parsed["courses"]) == 2
+
+def test_course_text_stream_endpoint(client):
+    with patch('auth.routes.get_auth_manager') as mock_manager:
+        mock_manager.return_value.validate_session.return_value = {"id": "test-user-id"}
+        response = client.post('/api/parse/course-text/stream',
+            headers={'Authorization': 'Bearer valid-token'},
+            json={"text": "CS101 lecture Mon 9-11. No classes on Friday."}
+        )
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    messages = [m for m in response.get_data(as_text=True).split("\n\n") if m]
+    assert messages[0].startswith("event: chunk\n")
+    assert messages[-1].startswith("event: done\n")
+    done = json.loads(messages[-1].split("data: ", 1)[1])
+    assert done["courses"] == 1 and done["truncated"] is False
+
 class TestScheduleAPI:
     """Test cases for the schedule API endpoints."""
     
@@ -304,4 +370,346 @@ class TestScheduleAPI:
                 data = json.loads(response.data)
                 assert "message" in data
                 assert "schedule" in data
-                assert data["schedule"]["id"] == "schedule-123"
\ No newline at end of file
+                assert data["schedule"]["id"] == "schedule-123"
+
+def _large_course_request(count=16):
+    """Deterministic request with `count` courses and a known clash-free assignment."""
+    days = ["Sun", "Mon", "Tue", "Wed", "Thu"]
+    courses = []
+    for i in range(count):
+        day = days[i % 5]
+        start = 8 + 2 * (i // 5)
+        courses.append({
+            "name": f"C{i}",
+            "lectures": [(days[(i + 2) % 5], 10, 12), (day, start, start + 2), (days[(i + 1) % 5], 12, 14)],
+            "ta_times": [(days[(i + 3) % 5], 16, 17), (day, 17, 18)] if i % 3 == 0 else []
+        })
+    return courses
+
+def test_heuristic_matches_exhaustive_on_small_request():
+    """The LNS engine should find the same optimum as the exhaustive search on small inputs."""
+    from schedule.heuristic import heuristic_schedule
+    courses = _large_course_request(6)
+
+    for preference in ["crammed", "spaced"]:
+        exhaustive = generate_schedule(courses, preference, [])
+        heuristic = heuristic_schedule(courses, preference, [])
+        assert _schedule_key(exhaustive, preference) == _schedule_key(heuristic, preference)
+
+def test_generate_schedule_large_request_uses_heuristic():
+    """Large requests should finish quickly, deterministically and without conflicts."""
+    import time
+    courses = _large_course_request(18)
+    constraints = [{"type": "No Class After", "time": 18}]
+
+    start = time.time()
+    schedule = generate_schedule(courses, "crammed", constraints)
+    elapsed = time.time() - start
+
+    assert schedule is not None
+    assert len(schedule) == 18
+    assert elapsed < 2
+    assert _check_no_conflicts(schedule)
+    assert schedule == generate_schedule(courses, "crammed", constraints)
+
+def _schedule_key(schedule, preference):
+    from schedule.compiled import preference_key
+    from schedule.utils import parse_time_slot
+    slots = [parse_time_slot(c[kind]) for c in schedule for kind in ("lecture", "ta") if c[kind]]
+    return preference_key(slots, preference)
+
+def test_pareto_schedules_returns_non_dominated_front():
+    """Pareto mode should return only mutually non-dominated tradeoffs."""
+    from schedule.pareto import pareto_schedules
+    courses = [
+        {"name": "CS101", "lectures": [("Mon", 8, 10), ("Tue", 12, 14)], "ta_times": []},
+        {"name": "Math101", "lectures": [("Mon", 14, 16), ("Tue", 10, 12)], "ta_times": []}
+    ]
+
+    front = pareto_schedules(courses, [])
+    vectors = [
+        (o["days_used"], o["gaps"], -o["earliest_start"], o["latest_end"])
+        for o in (entry["objectives"] for entry in front)
+    ]
+
+    # Both on Tuesday is the most compact; Mon 8-16 is dominated by it and must not appear
+    assert front[0]["objectives"] == {"days_used": 1, "gaps": 0, "earliest_start": 10, "latest_end": 14}
+    assert (1, 4, -8, 16) not in vectors
+    for u in vectors:
+        for v in vectors:
+            assert u == v or not all(a <= b for a, b in zip(u, v))
+
+def test_pareto_archive_is_bounded():
+    """The archive never grows past its size and keeps the extremes."""
+    from schedule.pareto import ParetoArchive
+    archive = ParetoArchive(max_size=3)
+    for k in range(10):
+        archive.add((k, 9 - k), k)
+    assert len(archive) == 3
+    assert {payload for _, payload in archive.entries} >= {0, 9}
+
+class TestParetoAPI:
+    """Test cases for the pareto preference of the schedule API."""
+
+    def test_generate_pareto_front(self, client):
+        response = client.post('/api/schedule', json={
+            "courses": [
+                {"name": "CS101", "lectures": ["Mon 8-10", "Wed 12-14"], "ta_times": ["Mon 10-11"]},
+                {"name": "Math101", "lectures": ["Mon 11-13", "Thu 9-11"], "ta_times": []}
+            ],
+            "constraints": [],
+            "preference": "pareto"
+        })
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["pareto_front"]
+        assert data["schedule"] == data["pareto_front"][0]["schedule"]
+
+def test_select_schedule_picks_electives_within_credit_window():
+    """Elective selection should honour group counts and the credit window jointly."""
+    from schedule.selection import select_schedule
+    courses = [
+        {"name": "Core", "lectures": [("Mon", 9, 11)], "ta_times": [], "credits": 4},
+        {"name": "ElectiveA", "lectures": [("Mon", 9, 11)], "ta_times": [], "credits": 3},  # clashes with Core
+        {"name": "ElectiveB", "lectures": [("Mon", 11, 13)], "ta_times": [], "credits": 2},
+        {"name": "ElectiveC", "lectures": [("Tue", 9, 11)], "ta_times": [], "credits": 3},
+        {"name": "ElectiveD", "lectures": [("Mon", 13, 15)], "ta_times": [], "credits": 3},
+    ]
+    groups = [{"courses": ["ElectiveA", "ElectiveB", "ElectiveC", "ElectiveD"], "min": 2, "max": 2}]
+
+    result = select_schedule(courses, groups, "crammed", [], min_credits=9, max_credits=10)
+
+    assert result is not None
+    assert "Core" in result["selected_courses"]
+    assert "ElectiveA" not in result["selected_courses"]
+    # B + D keeps everything on Monday without gaps and lands on 9 credits
+    assert set(result["selected_courses"]) == {"Core", "ElectiveB", "ElectiveD"}
+    assert result["total_credits"] == 9
+    assert _check_no_conflicts(result["schedule"])
+
+def test_select_schedule_infeasible_credit_window():
+    from schedule.selection import select_schedule
+    courses = [
+        {"name": "Core", "lectures": [("Mon", 9, 11)], "ta_times": [], "credits": 4},
+        {"name": "ElectiveA", "lectures": [("Tue", 9, 11)], "ta_times": [], "credits": 2},
+    ]
+    groups = [{"courses": ["ElectiveA"], "min": 0, "max": 1}]
+    assert select_schedule(courses, groups, "crammed", [], min_credits=10) is None
+
+class TestCourseGroupsAPI:
+    """Test cases for elective groups in the schedule API."""
+
+    def test_generate_with_course_groups(self, client):
+        response = client.post('/api/schedule', json={
+            "courses": [
+                {"name": "Core", "lectures": ["Mon 9-11"], "ta_times": [], "credits": 4},
+                {"name": "ElectiveA", "lectures": ["Mon 11-13"], "ta_times": [], "credits": 2},
+                {"name": "ElectiveB", "lectures": ["Wed 9-11"], "ta_times": [], "credits": 2}
+            ],
+            "course_groups": [{"courses": ["ElectiveA", "ElectiveB"], "min": 1, "max": 1}],
+            "credits": {"min": 6},
+            "constraints": [],
+            "preference": "crammed"
+        })
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["selected_courses"] == ["Core", "ElectiveA"]
+        assert data["total_credits"] == 6
+
+    def test_course_groups_unknown_course(self, client):
+        response = client.post('/api/schedule', json={
+            "courses": [{"name": "Core", "lectures": ["Mon 9-11"], "ta_times": []}],
+            "course_groups": [{"courses": ["Missing"], "min": 1}],
+            "constraints": []
+        })
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("extra", [
+        {"course_groups": [{"courses": ["Core"], "min": "one"}]},
+        {"course_groups": [{"courses": ["Core"], "min": 2, "max": 1}]},
+        {"course_groups": [{"courses": ["Core"], "min": 1}], "credits": {"min": -1}},
+        {"course_groups": [{"courses": ["Core"], "min": 1}], "credits": {"min": "6"}},
+        {"course_groups": [{"courses": ["Core"], "min": 1}], "credits": {"min": 8, "max": 6}},
+        {"credits": {"min": 6}},
+    ])
+    def test_invalid_course_group_and_credit_windows(self, client, extra):
+        response = client.post('/api/schedule', json={
+            "courses": [{"name": "Core", "lectures": ["Mon 9-11"], "ta_times": [], "credits": 4}],
+            "constraints": [],
+            **extra
+        })
+        assert response.status_code == 400
+        assert "error" in json.loads(response.data)
+
+def test_reoptimize_schedule_changes_as_little_as_possible():
+    """Dropping Thursday should only move the course that was on Thursday."""
+    from schedule.neighborhood import reoptimize_schedule
+    courses = [
+        {"name": "CS101", "lectures": [("Thu", 9, 11), ("Mon", 9, 11)], "ta_times": []},
+        {"name": "Math101", "lectures": [("Mon", 11, 13), ("Tue", 9, 11)], "ta_times": []},
+        {"name": "Phys101", "lectures": [("Tue", 9, 11), ("Wed", 9, 11)], "ta_times": []},
+    ]
+    saved = [
+        {"name": "CS101", "lecture": "Thu 9-11", "ta": None},
+        {"name": "Math101", "lecture": "Mon 11-13", "ta": None},
+        {"name": "Phys101", "lecture": "Tue 9-11", "ta": None},
+    ]
+
+    results = reoptimize_schedule(courses, saved, "crammed", [{"type": "No Class Day", "day": "Thu"}])
+
+    assert results[0]["changes"] == 1
+    assert results[0]["changed_courses"] == ["CS101"]
+    assert results[0]["schedule"][0]["lecture"] == "Mon 9-11"
+    assert results[0]["schedule"][1:] == saved[1:]
+    assert all(r["changes"] <= 2 for r in results)
+
+def test_reoptimize_schedule_too_many_forced_changes():
+    from schedule.neighborhood import reoptimize_schedule
+    courses = [{"name": f"C{i}", "lectures": [("Thu", 9 + 2 * i, 11 + 2 * i), ("Mon", 9 + 2 * i, 11 + 2 * i)],
+                "ta_times": []} for i in range(3)]
+    saved = [{"name": f"C{i}", "lecture": f"Thu {9 + 2 * i}-{11 + 2 * i}", "ta": None} for i in range(3)]
+    assert reoptimize_schedule(courses, saved, "crammed", [{"type": "No Class Day", "day": "Thu"}], max_changes=2) == []
+
+class TestReoptimizeAPI:
+    """Test cases for re-optimizing a saved schedule."""
+
+    def test_reoptimize_saved_schedule(self, client):
+        from api import schedules
+        mock_client = Mock()
+        mock_client.table.return_value.select.return_value.eq.return_value.eq.return_value\
+            .single.return_value.execute.return_value.data = {
+                "id": "schedule-123",
+                "schedule_data": [
+                    {"name": "CS101", "lecture": "Mon 9-11", "ta": "Thu 12-13"},
+                    {"name": "Math101", "lecture": "Tue 10-12", "ta": None}
+                ],
+                "original_course_options": [
+                    {"name": "CS101", "lectures": ["Mon 9-11"], "ta_times": ["Thu 12-13", "Mon 12-13"]},
+                    {"name": "Math101", "lectures": ["Tue 10-12", "Thu 10-12"], "ta_times": []}
+                ],
+                "constraints_data": []
+            }
+        mock_manager = Mock()
+        mock_manager.validate_session.return_value = {"id": "test-user-id"}
+        mock_manager.get_client_for_user.return_value = mock_client
+
+        with patch('auth.routes.get_auth_manager', return_value=mock_manager), \
+                patch.object(schedules, 'get_auth_manager', return_value=mock_manager):
+            response = client.post('/api/schedules/schedule-123/reoptimize',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"remove_sections": [{"course": "CS101", "slot": "Thu 12-13"}]}
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        best = data["schedules"][0]
+        assert best["changed_courses"] == ["CS101"]
+        assert best["schedule"][0] == {"name": "CS101", "lecture": "Mon 9-11", "ta": "Mon 12-13"}
+
+    @pytest.mark.parametrize("max_changes", [0, -3])
+    def test_reoptimize_rejects_max_changes_below_one(self, client, max_changes):
+        from api import schedules
+        mock_manager = Mock()
+        mock_manager.validate_session.return_value = {"id": "test-user-id"}
+
+        with patch('auth.routes.get_auth_manager', return_value=mock_manager), \
+                patch.object(schedules, 'get_auth_manager', return_value=mock_manager):
+            response = client.post('/api/schedules/schedule-123/reoptimize',
+                headers={'Authorization': 'Bearer valid-token'},
+                json={"remove_sections": [], "max_changes": max_changes}
+            )
+
+        assert response.status_code == 400
+        mock_manager.get_client_for_user.assert_not_called()
+
+def test_improving_schedules_ends_with_optimum():
+    """Scores only improve and the final event matches the exhaustive search."""
+    from schedule.anytime import improving_schedules
+    courses = [
+        {"name": "CS101", "lectures": [("Mon", 9, 11), ("Wed", 9, 11)], "ta_times": [("Mon", 11, 12), ("Thu", 9, 10)]},
+        {"name": "Math101", "lectures": [("Mon", 12, 14), ("Tue", 9, 11)], "ta_times": []},
+        {"name": "Phys101", "lectures": [("Wed", 10, 12), ("Mon", 14, 16)], "ta_times": [("Tue", 11, 12)]},
+    ]
+
+    events = list(improving_schedules(courses, "crammed", []))
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "done" and set(kinds[:-1]) == {"improvement"}
+    costs = [payload["score"]["cost"] for kind, payload in events if kind == "improvement"]
+    assert costs == sorted(costs, reverse=True) and len(set(costs)) == len(costs)
+
+    done = events[-1][1]
+    assert done["optimal"] is True
+    assert done["schedule"] == generate_schedule(courses, "crammed", [])
+    assert done["score"]["cost"] == costs[-1]
+
+def test_improving_schedules_infeasible():
+    from schedule.anytime import improving_schedules
+    courses = [{"name": "CS101", "lectures": [("Mon", 9, 11)], "ta_times": []}]
+    events = list(improving_schedules(courses, "crammed", [{"type": "No Class Day", "day": "Mon"}]))
+    assert events == [("done", events[0][1])]
+    assert events[0][1]["schedule"] is None
+
+def test_schedule_stream_endpoint(client):
+    response = client.post('/api/schedule/stream', json={
+        "courses": [
+            {"name": "CS101", "lectures": ["Mon 9-11", "Wed 9-11"], "ta_times": ["Mon 11-12"]},
+            {"name": "Math101", "lectures": ["Mon 12-14"], "ta_times": []}
+        ],
+        "constraints": [],
+        "preference": "crammed"
+    })
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    messages = [m for m in response.get_data(as_text=True).split("\n\n") if m]
+    assert messages[0].startswith("event: improvement\n")
+    assert messages[-1].startswith("event: done\n")
+    done = json.loads(messages[-1].split("data: ", 1)[1])
+    assert done["optimal"] is True
+    assert done["schedule"][0] == {"name": "CS101", "lecture": "Mon 9-11", "ta": "Mon 11-12"}
+
+def test_schedule_stream_rejects_pareto(client):
+    response = client.post('/api/schedule/stream', json={
+        "courses": [{"name": "CS101", "lectures": ["Mon 9-11"], "ta_times": []}],
+        "preference": "pareto"
+    })
+    assert response.status_code == 400
+
+def test_what_if_reports_relaxations():
+    """Dropping the Monday ban or the blocking course makes the request feasible."""
+    from schedule.sensitivity import what_if
+    courses = [
+        {"name": "CS101", "lectures": [("Mon", 9, 11)], "ta_times": []},
+        {"name": "Math101", "lectures": [("Tue", 9, 11)], "ta_times": []},
+    ]
+    constraints = [{"type": "No Class Day", "day": "Mon"}, {"type": "No Class Day", "day": "Fri"}]
+
+    result = what_if(courses, "crammed", constraints)
+
+    assert result["baseline"]["feasible"] is False
+    monday, friday = result["constraint_removals"]
+    assert monday["feasible"] and monday["improves"]
+    assert monday["schedule"] == generate_schedule(courses, "crammed", constraints[1:])
+    assert friday["feasible"] is False and not friday["improves"]
+    by_course = {entry["course"]: entry for entry in result["course_removals"]}
+    assert by_course["CS101"]["feasible"] and by_course["CS101"]["improves"]
+    assert by_course["CS101"]["schedule"] == [{"name": "Math101", "lecture": "Tue 9-11", "ta": None}]
+    assert by_course["Math101"]["feasible"] is False
+
+def test_schedule_what_if_endpoint(client):
+    response = client.post('/api/schedule/what-if', json={
+        "courses": [
+            {"name": "CS101", "lectures": ["Mon 9-11", "Wed 9-11"], "ta_times": []},
+            {"name": "Math101", "lectures": ["Wed 12-14"], "ta_times": []}
+        ],
+        "constraints": [{"type": "No Class Before", "time": 10}],
+        "preference": "crammed"
+    })
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["baseline"]["feasible"] is False
+    assert data["constraint_removals"][0]["improves"] is True
+    assert data["constraint_removals"][0]["score"]["days_used"] == 1